@@ -7,6 +7,7 @@ from flask_cors import CORS
 from app.routes.ai_routes import ai_bp
 from app.database.migrations import init_database, test_database_connection
 from app.routes.user_story_routes import user_story_routes
+from app.services.token_counter import BPE_FILE, prewarm_encoding
 
 # Cargar variables de entorno desde .env si existe
 env_path = Path(__file__).parent.parent / '.env'
@@ -41,6 +42,10 @@ def create_app(config_class=Config):
         except Exception as e:
             print(f"⚠️ Error en configuración de base de datos: {str(e)}")
     
+    # Precargar el encoder de tokens desde el archivo BPE local (sin red)
+    if BPE_FILE:
+        prewarm_encoding()
+    
     # Registrar blueprints
     from app.routes.task_routes import task_bp
     app.register_blueprint(task_bp, url_prefix='/tasks')
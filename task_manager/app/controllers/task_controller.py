@@ -1,11 +1,11 @@
 from flask import current_app, jsonify, request, redirect, url_for
-from typing import Tuple, Dict, Any
+from typing import Tuple, Dict, Any, Optional
 from app.utils.task_manager import TaskManager
 from app.models.task import Task
 from app.models.enums import TaskCategory
-from app.services.ai_service import AIService
-from app.models.task_db import TaskDB
-from app.database.azure_connection import get_db_session
+from app.services.ai_service import ai_error_status, get_ai_service
+from app.services.bulk_enrichment import bulk_enrichment_status, start_bulk_enrichment
+from app.services.enrichment_jobs import enqueue_enrichment, get_job_queue
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,25 +17,14 @@ class TaskController:
         """Inicializa el controlador con una instancia de TaskManager"""
         self.task_manager = TaskManager()
     
-    def get_all_tasks(self) -> Tuple[Dict[str, Any], int]:
+    def get_all_tasks(self, filters: Optional[Dict[str, Any]] = None,
+                      sort: Optional[str] = None, view: Optional[str] = None) -> Tuple[Dict[str, Any], int]:
         """Obtiene todas las tareas con información de historia de usuario"""
         try:
             # Usar TaskManager actualizado que ya incluye información de User Story
-            tasks = self.task_manager.get_all_tasks()
+            tasks = self.task_manager.get_all_tasks(filters=filters, sort=sort, view=view)
             
-            # Convertir categorías a nombres de visualización
-            category_display_names = TaskCategory.get_display_names()
-            tasks_with_display_names = []
-            
-            for task_dict in tasks:
-                # Convertir categoría a nombre de visualización
-                task_dict['category'] = category_display_names.get(task_dict['category'], 'Otro')
-                
-                # Asegurar que el campo user_story_project tenga un valor por defecto
-                if not task_dict.get('user_story_project'):
-                    task_dict['user_story_project'] = 'Sin proyecto asignado'
-                
-                tasks_with_display_names.append(task_dict)
+            tasks_with_display_names = self._with_display_names(tasks)
             
             return {
                 'success': True,
@@ -59,6 +48,66 @@ class TaskController:
                 'message': str(e)
             }, 500
     
+    def get_tasks_page(self, limit: Any = None, after: Optional[str] = None,
+                       filters: Optional[Dict[str, Any]] = None,
+                       sort: Optional[str] = None, view: Optional[str] = None) -> Tuple[Dict[str, Any], int]:
+        """Obtiene una página de tareas usando paginación por cursor"""
+        try:
+            try:
+                limit = int(limit) if limit not in (None, '') else None
+            except (TypeError, ValueError):
+                return {
+                    'success': False,
+                    'error': 'El parámetro limit debe ser un número entero'
+                }, 400
+            
+            try:
+                page = self.task_manager.iter_tasks_page(
+                    limit=limit, after=after or None, filters=filters, sort=sort, view=view
+                )
+            except ValueError as e:
+                return {
+                    'success': False,
+                    'error': str(e)
+                }, 400
+            
+            tasks_with_display_names = self._with_display_names(page['tasks'])
+            
+            return {
+                'success': True,
+                'data': tasks_with_display_names,
+                'total': len(tasks_with_display_names),
+                'next_cursor': page['next_cursor'],
+                'has_more': page['has_more'],
+                'limit': page['limit'],
+                'message': 'Tareas obtenidas exitosamente'
+            }, 200
+        
+        except Exception as e:
+            logger.error(f"Error inesperado en get_tasks_page: {str(e)}")
+            return {
+                'success': False,
+                'error': f'Database error: {str(e)}',
+                'message': str(e)
+            }, 500
+    
+    def _with_display_names(self, tasks: list) -> list:
+        """Convierte las categorías a nombres de visualización y completa el proyecto"""
+        category_display_names = TaskCategory.get_display_names()
+        tasks_with_display_names = []
+        
+        for task_dict in tasks:
+            # Convertir categoría a nombre de visualización
+            task_dict['category'] = category_display_names.get(task_dict['category'], 'Otro')
+            
+            # Asegurar que el campo user_story_project tenga un valor por defecto
+            if not task_dict.get('user_story_project'):
+                task_dict['user_story_project'] = 'Sin proyecto asignado'
+            
+            tasks_with_display_names.append(task_dict)
+        
+        return tasks_with_display_names
+    
     def get_task_by_id(self, task_id: int) -> Tuple[Dict[str, Any], int]:
         """Obtiene una tarea específica por ID"""
         try:
@@ -289,83 +338,38 @@ class TaskController:
                 'message': str(e)
             }, 500
     
-    def get_stats(self) -> Tuple[Dict[str, Any], int]:
+    def get_stats(self, include_per_task: bool = False) -> Tuple[Dict[str, Any], int]:
         """
         Obtiene estadísticas generales de las tareas.
         
+        Las estadísticas se agregan en TaskManager (GROUP BY / agregados
+        condicionales en SQL) sin cargar todas las tareas en memoria.
+        
+        Args:
+            include_per_task: Si es True incluye las series de tokens, costos y
+                títulos por tarea
+        
         Returns:
             Tuple[Dict[str, Any], int]: Estadísticas y código de estado
         """
         logger.debug("Entrando a get_stats")
         try:
-            tasks = self.task_manager.get_all_tasks()
-            logger.debug(f"Tareas cargadas: {len(tasks)}")
-            logger.debug(f"Tipo de tasks: {type(tasks)}")
+            stats = self.task_manager.get_stats(include_per_task=include_per_task)
             
-            if not tasks:
-                logger.warning("No se encontraron tareas")
-                return {
-                    'success': True,
-                    'data': {
-                        'total_tasks': 0,
-                        'total_effort': 0,
-                        'total_hours_incomplete': 0,
-                        'status_counts': {},
-                        'priority_counts': {},
-                        'assigned_hours': {},
-                        'tokens_por_tarea': [],
-                        'costos_por_tarea': [],
-                        'titulos_tareas': []
-                    }
-                }, 200
-            
-            # Imprimir detalles de cada tarea
-            for task in tasks:
-                logger.debug(f"Tarea ID {task['id']}: assigned_to='{task['assigned_to']}', effort={task['effort']}")
-            
-            # Estadísticas básicas
-            total_tasks = len(tasks)
-            total_hours = sum(task['effort'] for task in tasks)
-
-            # Calcular horas solo para tareas no completadas
-            total_hours_incomplete = sum(task['effort'] for task in tasks if task['status'] != 'completada')
-            
-            # Conteo por estado
-            status_counts = {}
-            for task in tasks:
-                status_counts[task['status']] = status_counts.get(task['status'], 0) + 1
-            
-            # Conteo por prioridad
-            priority_counts = {}
-            for task in tasks:
-                priority_counts[task['priority']] = priority_counts.get(task['priority'], 0) + 1
-            
-            # Horas por persona asignada
-            assigned_hours = {}
-            logger.debug("Iniciando bucle de assigned_hours")
-            for task in tasks:
-                person = task['assigned_to'] or 'Sin asignar'
-                logger.debug(f"Procesando tarea {task['id']}, assigned_to='{person}', effort={task['effort']}")
-                assigned_hours[person] = assigned_hours.get(person, 0) + task['effort']
-            
-            logger.debug(f"assigned_hours final: {assigned_hours}")
-
-            # Tokens, costos y títulos de tareas
-            tokens_por_tarea = [task.get('tokens_gastados', 0) or 0 for task in tasks]
-            costos_por_tarea = [float(task.get('costos', 0.0) or 0.0) for task in tasks]
-            titulos_tareas = [task['title'] for task in tasks]
-
             data_to_return = {
-                'total_tasks': total_tasks,
-                'total_effort': total_hours,
-                'total_hours_incomplete': total_hours_incomplete,
-                'status_counts': status_counts,
-                'priority_counts': priority_counts,
-                'assigned_hours': assigned_hours,
-                'tokens_por_tarea': tokens_por_tarea,
-                'costos_por_tarea': costos_por_tarea,
-                'titulos_tareas': titulos_tareas
+                'total_tasks': stats['total_tasks'],
+                'total_effort': stats['total_effort'],
+                'total_hours_incomplete': stats['total_hours_incomplete'],
+                'total_tokens': stats['total_tokens'],
+                'total_costos': stats['total_costos'],
+                'status_counts': stats['status_counts'],
+                'priority_counts': stats['priority_counts'],
+                'assigned_hours': stats['assigned_hours']
             }
+            if include_per_task:
+                data_to_return['tokens_por_tarea'] = stats.get('tokens_por_tarea', [])
+                data_to_return['costos_por_tarea'] = stats.get('costos_por_tarea', [])
+                data_to_return['titulos_tareas'] = stats.get('titulos_tareas', [])
 
             logger.debug(f"Datos a retornar: {data_to_return}")
 
@@ -390,7 +394,7 @@ class TaskController:
                     'error': 'Se requiere el título de la tarea'
                 }, 400
             
-            ai_service = AIService()
+            ai_service = get_ai_service()
             result = ai_service.generate_description(data['title'])
             
             if result['success']:
@@ -402,7 +406,7 @@ class TaskController:
                 return {
                     'success': False,
                     'error': result['error']
-                }, 500
+                }, ai_error_status(result)
                 
         except Exception as e:
             return {
@@ -419,7 +423,7 @@ class TaskController:
                     'error': 'Se requiere el título de la tarea'
                 }, 400
             
-            ai_service = AIService()
+            ai_service = get_ai_service()
             result = ai_service.estimate_effort(
                 data['title'],
                 data.get('description', ''),
@@ -435,7 +439,7 @@ class TaskController:
                 return {
                     'success': False,
                     'error': result['error']
-                }, 500
+                }, ai_error_status(result)
                 
         except Exception as e:
             return {
@@ -452,7 +456,7 @@ class TaskController:
                     'error': 'Se requiere el título de la tarea'
                 }, 400
             
-            ai_service = AIService()
+            ai_service = get_ai_service()
             result = ai_service.analyze_risks(
                 data['title'],
                 data.get('description', ''),
@@ -468,7 +472,7 @@ class TaskController:
                 return {
                     'success': False,
                     'error': result['error']
-                }, 500
+                }, ai_error_status(result)
                 
         except Exception as e:
             return {
@@ -485,7 +489,7 @@ class TaskController:
                     'error': 'Se requiere el análisis de riesgos'
                 }, 400
             
-            ai_service = AIService()
+            ai_service = get_ai_service()
             result = ai_service.generate_mitigation(
                 data.get('title', ''),
                 data.get('description', ''),
@@ -502,7 +506,7 @@ class TaskController:
                 return {
                     'success': False,
                     'error': result['error']
-                }, 500
+                }, ai_error_status(result)
                 
         except Exception as e:
             return {
@@ -519,7 +523,7 @@ class TaskController:
                     'error': 'Se requiere el título de la tarea'
                 }, 400
             
-            ai_service = AIService()
+            ai_service = get_ai_service()
             result = ai_service.categorize_task(
                 data['title'],
                 data.get('description', '')
@@ -534,7 +538,7 @@ class TaskController:
                 return {
                     'success': False,
                     'error': result['error']
-                }, 500
+                }, ai_error_status(result)
                 
         except Exception as e:
             return {
@@ -543,70 +547,122 @@ class TaskController:
             }, 500
 
     def enrich_task(self, task_id):
-        """Enriquece una tarea con IA"""
+        """
+        Encola el enriquecimiento con IA de una tarea
+        
+        El trabajo se ejecuta en segundo plano; la respuesta 202 incluye el id
+        del trabajo para consultar su estado con get_enrichment_job.
+        """
         try:
-            db = get_db_session()
-            if not db:
+            if self.task_manager.get_task(task_id) is None:
                 return {
                     'success': False,
-                    'error': 'No hay conexión a base de datos disponible'
-                }, 503
+                    'error': 'Tarea no encontrada'
+                }, 404
+            
+            job = enqueue_enrichment(task_id)
+            return {
+                'success': True,
+                'message': 'Enriquecimiento de la tarea en cola',
+                'data': self._job_to_dict(job)
+            }, 202
                 
-            task = db.query(TaskDB).filter(TaskDB.id == task_id).first()
-            if not task:
+        except Exception as e:
+            logger.error(f"Error al encolar el enriquecimiento de la tarea {task_id}: {str(e)}")
+            return {
+                'success': False,
+                'error': f'Error interno del servidor: {str(e)}'
+            }, 500
+
+    def get_enrichment_job(self, job_id: str) -> Tuple[Dict[str, Any], int]:
+        """Obtiene el estado de un trabajo de enriquecimiento y, si terminó, la tarea enriquecida"""
+        try:
+            job = get_job_queue().get(job_id)
+            if job is None:
                 return {
                     'success': False,
-                    'error': 'Tarea no encontrada'
+                    'error': 'Trabajo de enriquecimiento no encontrado'
                 }, 404
+            
+            return {
+                'success': True,
+                'data': self._job_to_dict(job)
+            }, 200
                 
-            try:
-                ai_service = AIService()
-                # Llamar a IA para enriquecer la tarea
-                enriched = ai_service.process_task({
-                    'title': task.title,
-                    'description': task.description or ''
-                })
-                
-                if enriched.get('success', False):
-                    # Actualizar la tarea con los datos enriquecidos
-                    task.description = enriched.get('description', task.description)
-                    task.category = enriched.get('category', task.category)
-                    task.effort = enriched.get('effort', task.effort)
-                    task.risk_analysis = enriched.get('risk_analysis', task.risk_analysis)
-                    task.mitigation_plan = enriched.get('risk_mitigation', task.mitigation_plan)
-                    task.tokens_gastados = enriched.get('tokens_gastados', task.tokens_gastados)
-                    task.costos = enriched.get('costos', task.costos)
-                    db.commit()
-                    
-                    return {
-                        'success': True,
-                        'message': 'Tarea enriquecida exitosamente',
-                        'data': {
-                            'id': task.id,
-                            'title': task.title,
-                            'description': task.description,
-                            'category': task.category,
-                            'effort': task.effort,
-                            'risk_analysis': task.risk_analysis,
-                            'mitigation_plan': task.mitigation_plan,
-                            'tokens_gastados': task.tokens_gastados,
-                            'costos': task.costos
-                        }
-                    }, 200
-                else:
-                    return {
-                        'success': False,
-                        'error': enriched.get('error', 'Error al enriquecer la tarea')
-                    }, 500
-                    
-            except Exception as ai_error:
+        except Exception as e:
+            logger.error(f"Error al consultar el trabajo de enriquecimiento {job_id}: {str(e)}")
+            return {
+                'success': False,
+                'error': f'Error interno del servidor: {str(e)}'
+            }, 500
+
+    def enrich_pending_tasks(self, data: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], int]:
+        """
+        Lanza en segundo plano el enriquecimiento de todas las tareas pendientes
+        
+        Args:
+            data: Opciones concurrency, batch_size, limit, mode y reset (todas opcionales)
+        """
+        data = data or {}
+        options = {}
+        try:
+            for key in ('concurrency', 'batch_size', 'limit'):
+                if data.get(key) not in (None, ''):
+                    options[key] = int(data[key])
+        except (TypeError, ValueError):
+            return {
+                'success': False,
+                'error': 'concurrency, batch_size y limit deben ser números enteros'
+            }, 400
+        if data.get('mode'):
+            options['mode'] = data['mode']
+        options['reset'] = bool(data.get('reset', False))
+        
+        try:
+            progress = start_bulk_enrichment(**options)
+            if progress is None:
                 return {
                     'success': False,
-                    'error': f'Error en el servicio de IA: {str(ai_error)}'
-                }, 503
-                
+                    'error': 'Ya hay un enriquecimiento masivo en curso'
+                }, 409
+            return {
+                'success': True,
+                'message': 'Enriquecimiento masivo iniciado',
+                'data': progress
+            }, 202
+        except ValueError as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }, 400
         except Exception as e:
+            logger.error(f"Error al iniciar el enriquecimiento masivo: {str(e)}")
             return {
                 'success': False,
                 'error': f'Error interno del servidor: {str(e)}'
-            }, 500
\ No newline at end of file
+            }, 500
+
+    def get_enrich_pending_status(self) -> Tuple[Dict[str, Any], int]:
+        """Obtiene el progreso y el rendimiento del último enriquecimiento masivo"""
+        progress = bulk_enrichment_status()
+        if progress is None:
+            return {
+                'success': False,
+                'error': 'No se ha ejecutado ningún enriquecimiento masivo'
+            }, 404
+        return {
+            'success': True,
+            'data': progress
+        }, 200
+
+    def _job_to_dict(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Representación de un trabajo de enriquecimiento para la API"""
+        return {
+            'job_id': job['id'],
+            'task_id': job['task_id'],
+            'status': job['status'],
+            'attempts': job['attempts'],
+            'status_url': f"/tasks/enrich-jobs/{job['id']}",
+            'result': job['result'],
+            'error': job['error']
+        }
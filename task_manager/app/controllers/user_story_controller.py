@@ -22,6 +22,28 @@ class UserStoryController:
         self.service.generate_tasks_for_user_story(user_story_id)
         return redirect(url_for('user_story_routes.tasks_for_user_story', user_story_id=user_story_id))
 
+    def generate_tasks_bulk(self):
+        try:
+            data = request.get_json(silent=True) or {}
+            user_story_ids = data.get('user_story_ids')
+            if not isinstance(user_story_ids, list) or not user_story_ids:
+                return jsonify({"success": False, "error": "Se requiere la lista user_story_ids."}), 400
+            try:
+                user_story_ids = [int(user_story_id) for user_story_id in user_story_ids]
+                workers = int(data['workers']) if data.get('workers') else None
+            except (TypeError, ValueError):
+                return jsonify({"success": False, "error": "user_story_ids y workers deben ser números enteros."}), 400
+            created = self.service.generate_tasks_for_user_stories(user_story_ids, workers=workers)
+            return jsonify({
+                "success": True,
+                "data": {
+                    "tasks_created": {str(user_story_id): len(tasks) for user_story_id, tasks in created.items()},
+                    "total_tasks": sum(len(tasks) for tasks in created.values())
+                }
+            }), 200
+        except Exception as e:
+            return jsonify({"success": False, "error": str(e)}), 500
+
     def tasks_for_user_story(self, user_story_id):
         # Obtener la User Story
         user_story = self.service.get_user_story(user_story_id)
@@ -0,0 +1,36 @@
+from sqlalchemy import create_engine, text
+import os
+from dotenv import load_dotenv
+
+# Cargar variables de entorno
+load_dotenv()
+
+connection_string = os.getenv('AZURE_MYSQL_CONNECTION_STRING')
+ssl_ca = os.getenv('AZURE_MYSQL_SSL_CA')
+ssl_verify = os.getenv('AZURE_MYSQL_SSL_VERIFY', 'true').lower() == 'true'
+
+ssl_config = {}
+if ssl_ca:
+    ssl_config = {
+        'ssl': {
+            'ca': ssl_ca,
+            'verify_cert': ssl_verify
+        }
+    }
+
+engine = create_engine(connection_string, connect_args=ssl_config)
+
+# Índices usados por el listado de tareas (las tablas nuevas ya los crean con create_all)
+INDEXES = [
+    ('ix_tasks_created_at_id', 'CREATE INDEX ix_tasks_created_at_id ON tasks (created_at, id);'),
+    ('ix_tasks_assigned_to_status', 'CREATE INDEX ix_tasks_assigned_to_status ON tasks (assigned_to, status);'),
+    ('ix_tasks_status_priority', 'CREATE INDEX ix_tasks_status_priority ON tasks (status, priority);'),
+]
+
+with engine.connect() as conn:
+    for name, statement in INDEXES:
+        try:
+            conn.execute(text(statement))
+            print(f'✅ Índice {name} creado en tasks.')
+        except Exception as e:
+            print(f'⚠️ Error o el índice {name} ya existe: {e}')
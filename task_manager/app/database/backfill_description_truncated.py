@@ -0,0 +1,133 @@
+from sqlalchemy import create_engine, text
+import os
+from pathlib import Path
+from dotenv import load_dotenv
+
+from app.utils.file_lock import update_json
+from app.utils.json_store import get_json_store
+from app.utils.task_manager import truncate_text
+
+# Tablas con columna description_truncated
+TABLES = ('tasks', 'user_story')
+
+# Archivos del modo JSON
+JSON_FILES = ('tasks.json', 'user_stories.json')
+
+BATCH_SIZE = 500
+
+
+def add_columns(conn):
+    """Añade la columna description_truncated a las tablas si no existe"""
+    for table in TABLES:
+        try:
+            conn.execute(text(f'ALTER TABLE {table} ADD COLUMN description_truncated TEXT NULL;'))
+            conn.commit()
+            print(f'✅ Columna description_truncated añadida a {table}.')
+        except Exception as e:
+            conn.rollback()
+            print(f'⚠️ Error o la columna ya existe en {table}: {e}')
+
+
+def backfill_table(conn, table, batch_size=BATCH_SIZE):
+    """
+    Rellena description_truncated en las filas que no la tienen, por lotes de id.
+
+    Args:
+        conn: Conexión de SQLAlchemy
+        table: Nombre de la tabla
+        batch_size: Filas por lote
+
+    Returns:
+        int: Número de filas actualizadas
+    """
+    updated = 0
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            text(f'SELECT id, description FROM {table} '
+                 f'WHERE description_truncated IS NULL AND id > :last_id ORDER BY id LIMIT :limit'),
+            {'last_id': last_id, 'limit': batch_size}
+        ).fetchall()
+        if not rows:
+            break
+        conn.execute(
+            text(f'UPDATE {table} SET description_truncated = :value WHERE id = :id'),
+            [{'id': row[0], 'value': truncate_text(row[1] or '', 30)} for row in rows]
+        )
+        conn.commit()
+        updated += len(rows)
+        last_id = rows[-1][0]
+    return updated
+
+
+def _fill_truncated(record):
+    record['description_truncated'] = truncate_text(record.get('description') or '', 30)
+
+
+def backfill_json_file(json_file):
+    """
+    Rellena description_truncated en un archivo JSON del modo sin base de datos.
+
+    ``tasks.json`` se actualiza a través de su almacén (diario y bloqueo
+    compartidos con la aplicación); el resto de archivos con update_json.
+
+    Returns:
+        int: Número de registros actualizados
+    """
+    if not json_file.exists():
+        return 0
+
+    if json_file.name == 'tasks.json':
+        store = get_json_store(json_file)
+        pending = [record['id'] for record in store.all() if record.get('description_truncated') is None]
+        for task_id in pending:
+            store.update(task_id, _fill_truncated)
+        return len(pending)
+
+    updated = 0
+
+    def fill_missing(records):
+        nonlocal updated
+        for record in records:
+            if record.get('description_truncated') is None:
+                _fill_truncated(record)
+                updated += 1
+        return records
+
+    update_json(json_file, fill_missing, indent=2, ensure_ascii=False)
+    return updated
+
+
+if __name__ == '__main__':
+    # Cargar variables de entorno
+    load_dotenv()
+
+    data_dir = Path(__file__).parent.parent.parent / 'data'
+    for name in JSON_FILES:
+        count = backfill_json_file(data_dir / name)
+        print(f'✅ {count} registros actualizados en {name}.')
+
+    connection_string = os.getenv('AZURE_MYSQL_CONNECTION_STRING')
+    if not connection_string:
+        print('⚠️ AZURE_MYSQL_CONNECTION_STRING no está configurada. Solo se actualizaron los archivos JSON.')
+        raise SystemExit(0)
+
+    ssl_ca = os.getenv('AZURE_MYSQL_SSL_CA')
+    ssl_verify = os.getenv('AZURE_MYSQL_SSL_VERIFY', 'true').lower() == 'true'
+
+    ssl_config = {}
+    if ssl_ca:
+        ssl_config = {
+            'ssl': {
+                'ca': ssl_ca,
+                'verify_cert': ssl_verify
+            }
+        }
+
+    engine = create_engine(connection_string, connect_args=ssl_config)
+
+    with engine.connect() as conn:
+        add_columns(conn)
+        for table in TABLES:
+            count = backfill_table(conn, table)
+            print(f'✅ {count} filas actualizadas en {table}.')
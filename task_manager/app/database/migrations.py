@@ -2,6 +2,7 @@ import logging
 from app.database.azure_connection import azure_mysql, Base
 from app.models.task_db import TaskDB
 from app.models.user_story_db import UserStory
+from app.models.task_stats_db import TaskStatsDB
 
 logger = logging.getLogger(__name__)
 
@@ -103,6 +104,31 @@ def create_sample_data():
         logger.error(f"❌ Error al crear datos de ejemplo: {str(e)}")
         return False
 
+def init_task_stats():
+    """Construye la tabla de contadores task_stats a partir de las tareas existentes"""
+    try:
+        logger.info("📊 Inicializando contadores de estadísticas...")
+        
+        from app.database.azure_connection import get_db_session
+        from app.utils.task_stats import reconcile_task_stats
+        
+        session = get_db_session()
+        if session is None:
+            logger.warning("⚠️ No hay sesión de base de datos disponible")
+            return False
+        
+        try:
+            report = reconcile_task_stats(session)
+        finally:
+            session.close()
+        
+        logger.info(f"✅ Contadores inicializados ({report['rows']} filas, {len(report['drift'])} diferencias)")
+        return True
+        
+    except Exception as e:
+        logger.error(f"❌ Error al inicializar contadores: {str(e)}")
+        return False
+
 def run_database_setup():
     """Ejecuta la configuración completa de la base de datos"""
     print("🚀 Configurando base de datos Azure MySQL...")
@@ -122,6 +148,11 @@ def run_database_setup():
         print("❌ No se pudieron crear datos de ejemplo")
         return False
     
+    # Inicializar contadores de estadísticas
+    if not init_task_stats():
+        print("❌ No se pudieron inicializar los contadores de estadísticas")
+        return False
+    
     print("🎉 Configuración de base de datos completada exitosamente")
     return True
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Float, Enum, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, Enum, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database.azure_connection import Base
@@ -23,6 +23,8 @@ class TaskDB(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     title = Column(String(255), nullable=False, index=True)
     description = Column(Text, nullable=True)
+    # Primeras 30 palabras de la descripción, calculadas al escribir
+    description_truncated = Column(Text, nullable=True)
     
     # Campos de prioridad y estado
     priority = Column(Enum(PriorityEnum), default=PriorityEnum.MEDIA, nullable=False)
@@ -52,6 +54,14 @@ class TaskDB(Base):
     user_story_id = Column(Integer, ForeignKey('user_story.id'), nullable=True)
     user_story = relationship("UserStory", backref="tasks")
     
+    __table_args__ = (
+        # Índice para la paginación por cursor (created_at, id)
+        Index('ix_tasks_created_at_id', 'created_at', 'id'),
+        # Índices para los filtros más habituales del listado ("mis tareas abiertas")
+        Index('ix_tasks_assigned_to_status', 'assigned_to', 'status'),
+        Index('ix_tasks_status_priority', 'status', 'priority'),
+    )
+    
     def __repr__(self):
         return f"<TaskDB(id={self.id}, title='{self.title}', status='{self.status.value}')>"
     
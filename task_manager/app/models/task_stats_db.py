@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, Float
+from app.database.azure_connection import Base
+
+class TaskStatsDB(Base):
+    """
+    Modelo SQLAlchemy para la tabla de contadores agregados de tareas.
+
+    Cada fila acumula número de tareas, esfuerzo, tokens y costos de un grupo
+    (dimension, bucket): ('total', '*'), ('status', 'pendiente'),
+    ('priority', 'alta'), ('assignee', 'Ana'), etc.
+    """
+
+    __tablename__ = "task_stats"
+
+    dimension = Column(String(20), primary_key=True)
+    bucket = Column(String(100), primary_key=True)
+    task_count = Column(Integer, default=0, nullable=False)
+    effort = Column(Integer, default=0, nullable=False)
+    tokens = Column(Integer, default=0, nullable=False)
+    costos = Column(Float, default=0.0, nullable=False)
+
+    def __repr__(self):
+        return f"<TaskStatsDB(dimension='{self.dimension}', bucket='{self.bucket}', task_count={self.task_count})>"
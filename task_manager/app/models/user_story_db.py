@@ -11,6 +11,8 @@ class UserStory(Base):
     goal = Column(String(255), nullable=False)
     reason = Column(String(255), nullable=False)
     description = Column(Text, nullable=False)
+    # Primeras 30 palabras de la descripción, calculadas al escribir
+    description_truncated = Column(Text, nullable=True)
     priority = Column(Enum(PriorityEnum), nullable=False)
     story_points = Column(Integer, nullable=False)
     effort_hours = Column(Float, nullable=False)
@@ -1,16 +1,18 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from app.models.task import Task
 from app.utils.task_manager import TaskManager
-import uuid
+from app.services.ai_service import CIRCUIT_OPEN, ai_error_status
+from app.services.circuit_breaker import OPEN
 import json
+import uuid
 
 # Crear el Blueprint
 ai_bp = Blueprint('ai', __name__, url_prefix='/ai')
 
 # Inicializar el servicio de IA de forma segura
 try:
-    from app.services.ai_service import AIService
-    ai_service = AIService()
+    from app.services.ai_service import get_ai_service
+    ai_service = get_ai_service()
     print("✅ Servicio de IA inicializado correctamente")
 except Exception as e:
     print(f"⚠️ Error al inicializar el servicio de IA: {str(e)}")
@@ -19,13 +21,6 @@ except Exception as e:
 
 # Diccionario en memoria para tokens/costos por formulario
 formulario_stats = {}
-TASKS_JSON_PATH = 'data/tasks.json'
-def load_tasks():
-    with open(TASKS_JSON_PATH, 'r', encoding='utf-8') as f:
-        return json.load(f)
-def save_tasks(tasks):
-    with open(TASKS_JSON_PATH, 'w', encoding='utf-8') as f:
-        json.dump(tasks, f, ensure_ascii=False, indent=2)
 
 def handle_ai_error(error_msg):
     """Función utilitaria para manejar errores de IA con mensajes específicos"""
@@ -41,7 +36,7 @@ def process_ai_response(result, form_id, token_index):
     """Función utilitaria para procesar respuestas de IA"""
     if not result['success']:
         error_msg = handle_ai_error(result.get('error', 'Error desconocido'))
-        return jsonify({'success': False, 'error': error_msg}), 500
+        return jsonify({'success': False, 'error': error_msg}), ai_error_status(result)
     
     if form_id not in formulario_stats:
         return jsonify({'success': False, 'error': 'Error de formulario: form_id no encontrado'}), 500
@@ -53,6 +48,64 @@ def process_ai_response(result, form_id, token_index):
     
     return total_tokens, total_cost
 
+def sse_event(event, data):
+    """Formatea un evento Server-Sent Events con datos JSON"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def circuit_open_response():
+    """
+    Respuesta 503 si el circuito de IA está abierto, None en otro caso.
+
+    Los endpoints streaming la comprueban antes de crear la Response: una vez
+    iniciado el stream ya solo se puede informar con un evento 'error'.
+    """
+    breaker = getattr(ai_service, 'circuit_breaker', None)
+    if breaker is None or breaker.state != OPEN:
+        return None
+    result = {
+        'success': False,
+        'error': 'Servicio de IA no disponible temporalmente. Intente nuevamente en unos segundos.',
+        'error_code': CIRCUIT_OPEN
+    }
+    return jsonify({'success': False, 'error': result['error']}), ai_error_status(result)
+
+def stream_ai_response(events, form_id, token_index):
+    """
+    Reenvía como SSE los eventos de un método streaming de AIService.
+
+    Emite 'token' por fragmento y, al terminar, 'done' con el uso de la llamada
+    y los totales del formulario (o 'error' si la llamada falla).
+    """
+    def generate():
+        for event, payload in events:
+            if event == 'delta':
+                yield sse_event('token', {'text': payload})
+            elif event == 'error':
+                yield sse_event('error', {
+                    'success': False,
+                    'error': handle_ai_error(payload.get('error', 'Error desconocido')),
+                    'status': ai_error_status(payload)
+                })
+            else:
+                stats = formulario_stats.get(form_id)
+                if stats is not None:
+                    stats['tokens'][token_index] = payload['total_tokens']
+                    stats['costs'][token_index] = payload['cost']
+                yield sse_event('done', {
+                    'success': True,
+                    'usage': payload,
+                    'total_tokens': sum(stats['tokens']) if stats else payload['total_tokens'],
+                    'cost': sum(stats['costs']) if stats else payload['cost'],
+                    'form_id': form_id
+                })
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        # Evitar que proxies intermedios acumulen la respuesta
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @ai_bp.route('/create-form', methods=['POST'])
 def create_form():
     form_id = str(uuid.uuid4())
@@ -62,6 +115,46 @@ def create_form():
     }
     return jsonify({'success': True, 'form_id': form_id})
 
+@ai_bp.route('/health', methods=['GET'])
+def health():
+    """Estado de la dependencia de Azure OpenAI (circuit breaker, limitador y caché)"""
+    if ai_service is None:
+        return jsonify({'success': True, 'available': False, 'circuit': None})
+    circuit = ai_service.circuit_breaker.snapshot() if ai_service.circuit_breaker else None
+    return jsonify({
+        'success': True,
+        'available': circuit is None or circuit['state'] != 'open',
+        'circuit': circuit,
+        'rate_limit': ai_service.rate_limiter.utilization() if ai_service.rate_limiter else None,
+        'cache': ai_service.cache.stats() if ai_service.cache else None
+    })
+
+@ai_bp.route('/cache-stats', methods=['GET'])
+def cache_stats():
+    """Aciertos y fallos de la caché de respuestas del LLM"""
+    if ai_service is None or getattr(ai_service, 'cache', None) is None:
+        return jsonify({'success': True, 'enabled': False})
+    return jsonify({'success': True, 'enabled': True, **ai_service.cache.stats()})
+
+@ai_bp.route('/rate-limit', methods=['GET'])
+def rate_limit():
+    """Uso de los presupuestos RPM/TPM, de la concurrencia y de los reintentos de llamadas al LLM"""
+    if ai_service is None or getattr(ai_service, 'rate_limiter', None) is None:
+        return jsonify({'success': True, 'enabled': False})
+    return jsonify({
+        'success': True,
+        'enabled': True,
+        **ai_service.rate_limiter.utilization(),
+        'retry': ai_service.retry_policy.metrics()
+    })
+
+@ai_bp.route('/prompt-budget', methods=['GET'])
+def prompt_budget():
+    """Prompts recortados y tokens ahorrados por el presupuesto de tokens"""
+    if ai_service is None or getattr(ai_service, 'prompt_budget', None) is None:
+        return jsonify({'success': True, 'enabled': False})
+    return jsonify({'success': True, 'enabled': True, **ai_service.prompt_budget.metrics()})
+
 @ai_bp.route('/generate-description', methods=['POST'])
 def generate_description():
     """Endpoint para generar una descripción con IA"""
@@ -94,6 +187,25 @@ def generate_description():
         error_msg = handle_ai_error(str(e))
         return jsonify({'success': False, 'error': error_msg}), 500
 
+@ai_bp.route('/generate-description/stream', methods=['POST'])
+def generate_description_stream():
+    """Versión Server-Sent Events de /generate-description"""
+    if ai_service is None:
+        return jsonify({'success': False, 'error': 'Servicio de IA no disponible'}), 503
+    
+    data = request.get_json(silent=True) or {}
+    form_id = data.get('form_id')
+    if 'title' not in data or not form_id:
+        return jsonify({'error': 'Se requiere el título de la tarea y form_id'}), 400
+    if form_id not in formulario_stats:
+        return jsonify({'success': False, 'error': 'Error de formulario: form_id no encontrado'}), 500
+    
+    circuit_open = circuit_open_response()
+    if circuit_open is not None:
+        return circuit_open
+    
+    return stream_ai_response(ai_service.generate_description_stream(data['title']), form_id, 0)
+
 @ai_bp.route('/categorize', methods=['POST'])
 def categorize():
     """Endpoint para categorizar una tarea con IA"""
@@ -231,6 +343,31 @@ def generate_mitigation():
         error_msg = handle_ai_error(str(e))
         return jsonify({'success': False, 'error': error_msg}), 500
 
+@ai_bp.route('/generate-mitigation/stream', methods=['POST'])
+def generate_mitigation_stream():
+    """Versión Server-Sent Events de /generate-mitigation"""
+    if ai_service is None:
+        return jsonify({'success': False, 'error': 'Servicio de IA no disponible'}), 503
+    
+    data = request.get_json(silent=True) or {}
+    form_id = data.get('form_id')
+    if 'title' not in data or not form_id:
+        return jsonify({'error': 'Se requiere el título de la tarea y form_id'}), 400
+    if form_id not in formulario_stats:
+        return jsonify({'success': False, 'error': 'Error de formulario: form_id no encontrado'}), 500
+    
+    circuit_open = circuit_open_response()
+    if circuit_open is not None:
+        return circuit_open
+    
+    events = ai_service.generate_mitigation_stream(
+        data['title'],
+        data.get('description', ''),
+        data.get('category', ''),
+        data.get('risk_analysis', '')
+    )
+    return stream_ai_response(events, form_id, 4)
+
 @ai_bp.route('/process-task', methods=['POST'])
 def process_task():
     """Endpoint para procesar una tarea completa con IA"""
@@ -1,5 +1,6 @@
 from flask import Blueprint, render_template, request, jsonify, flash, redirect, url_for
 from app.controllers.task_controller import TaskController
+from app.utils.task_manager import TASK_FILTER_KEYS
 
 # Crear el blueprint para las rutas de tareas
 task_bp = Blueprint('tasks', __name__)
@@ -43,8 +44,27 @@ def stats():
 # Rutas de la API
 @task_bp.route('/api/list')
 def api_list_tasks():
-    """Obtiene la lista de tareas en formato JSON."""
-    response, status_code = task_controller.get_all_tasks()
+    """
+    Obtiene la lista de tareas en formato JSON.
+    
+    Admite los filtros status, priority, category, assigned_to, user_story_id,
+    created_from y created_to, y el parámetro sort (por ejemplo '-created_at').
+    Si se indican los parámetros limit y/o after se devuelve una sola página
+    (paginación por cursor); en caso contrario se devuelven todas las tareas.
+    Con view=summary se omiten description, risk_analysis, mitigation_plan y
+    user_story_description (queda description_truncated).
+    """
+    limit = request.args.get('limit')
+    after = request.args.get('after')
+    filters = {key: request.args.get(key) for key in TASK_FILTER_KEYS if request.args.get(key)}
+    sort = request.args.get('sort') or None
+    view = request.args.get('view') or None
+    if limit is None and after is None:
+        response, status_code = task_controller.get_all_tasks(filters=filters or None, sort=sort, view=view)
+    else:
+        response, status_code = task_controller.get_tasks_page(
+            limit=limit, after=after, filters=filters or None, sort=sort, view=view
+        )
     return jsonify(response), status_code
 
 @task_bp.route('/api/<int:task_id>')
@@ -73,8 +93,14 @@ def api_delete_task(task_id):
 
 @task_bp.route('/api/stats')
 def api_get_stats():
-    """Obtiene estadísticas de las tareas."""
-    response, status_code = task_controller.get_stats()
+    """
+    Obtiene estadísticas de las tareas.
+    
+    Las series por tarea (tokens, costos y títulos) solo se incluyen con
+    per_task=true, ya que requieren recorrer todas las tareas.
+    """
+    include_per_task = request.args.get('per_task', 'false').lower() == 'true'
+    response, status_code = task_controller.get_stats(include_per_task=include_per_task)
     return jsonify(response), status_code
 
 # Rutas para las funciones del chatbot
@@ -115,6 +141,25 @@ def api_categorize_task():
 
 @task_bp.route('/<int:task_id>/enrich', methods=['POST'])
 def enrich_task(task_id):
-    """Enriquece una tarea con IA."""
+    """Encola el enriquecimiento de una tarea con IA (202 con el id del trabajo)."""
     response, status_code = task_controller.enrich_task(task_id)
+    return jsonify(response), status_code
+
+@task_bp.route('/enrich-pending', methods=['POST'])
+def enrich_pending_tasks():
+    """Lanza el enriquecimiento masivo de las tareas pendientes."""
+    data = request.get_json(silent=True) or {}
+    response, status_code = task_controller.enrich_pending_tasks(data)
+    return jsonify(response), status_code
+
+@task_bp.route('/enrich-pending', methods=['GET'])
+def get_enrich_pending_status():
+    """Consulta el progreso del enriquecimiento masivo."""
+    response, status_code = task_controller.get_enrich_pending_status()
+    return jsonify(response), status_code
+
+@task_bp.route('/enrich-jobs/<job_id>', methods=['GET'])
+def get_enrichment_job(job_id):
+    """Consulta el estado de un trabajo de enriquecimiento."""
+    response, status_code = task_controller.get_enrichment_job(job_id)
     return jsonify(response), status_code
\ No newline at end of file
@@ -19,6 +19,10 @@ def create_user_story_json():
     else:
         return controller.create_user_story()
 
+@user_story_routes.route('/user-stories/generate-tasks', methods=['POST'])
+def generate_tasks_bulk():
+    return controller.generate_tasks_bulk()
+
 @user_story_routes.route('/user-stories/<int:user_story_id>/generate-tasks', methods=['POST'])
 def generate_tasks(user_story_id):
     return controller.generate_tasks(user_story_id)
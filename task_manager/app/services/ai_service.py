@@ -1,13 +1,169 @@
+import json
 import os
-from typing import Dict, Any, Optional, Tuple
-import openai
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from dotenv import load_dotenv
 from app.models.enums import TaskCategory
-import tiktoken
+from app.services.circuit_breaker import CircuitOpenError, get_circuit_breaker
+from app.services.llm_cache import cache_key, get_llm_cache
+from app.services.llm_retry import get_retry_policy, is_retryable
+from app.services.openai_client import azure_openai_settings, get_openai_client
+from app.services.prompt_budget import get_prompt_budget
+from app.services.rate_limiter import RateLimitExceeded, get_rate_limiter
+from app.services.token_counter import count_tokens, count_tokens_batch
 
 # Cargar variables de entorno
 load_dotenv()
 
+# Prompts de sistema de las etapas de process_task
+ENRICH_DESCRIPTION_SYSTEM_PROMPT = "Eres un experto en gestión de tareas. Genera una descripción profesional de máximo 300 palabras a partir de la tarea que te da el usuario."
+ENRICH_CATEGORY_SYSTEM_PROMPT = "Eres un experto en clasificación de tareas. Devuelve ÚNICAMENTE una categoría a partir de el tipo de tarea y la descrición. La categoría debe pertenecer a una de las siguientes opciones: Testing y Control de Calidad, Desarrollo Frontend, Desarrollo Backend, Desarrollo General , Diseño de Sistemas, Documentación, Base de Datos Seguridad, Infraestructura, Mantenimiento, Investigación, Supervisión, Riesgos Laborales, Limpieza, Otro."
+ENRICH_EFFORT_SYSTEM_PROMPT = "Eres un experto en estimación de tiempo para la ejecución de tareas. Calcula el tiempo en horas que toma ejecutar la tarea correspondiente, este dato debe estar entre 2 a 48 horas. Las tareas de desarrollo, control de calidad y testing toman al menos 8 horas, las tarewas de desarrollo de frontend, back end y desarrollo general toman 24 horas, las tarea de documentacion toma 4 horas, la tarea de base de datos toma 16 horas, la tarea de investigación toma 48 horas, supervisión y riesgos laborales toma 4 horas y otros toma 6 horas Devuelve ÚNICAMENTE un número de horas."
+ENRICH_RISKS_SYSTEM_PROMPT = "Eres un experto en análisis de riesgos de ejecucion de tareas. Identifica los riesgos potenciales según la tarea y la descripción de la tarea. Genera una respuesta de máximo 200 palabras."
+ENRICH_MITIGATION_SYSTEM_PROMPT = "Eres un experto en gestión de riesgos de un laboratorio de control de calidad de la industria farmacéutica. Genera un plan de mitigación para los riesgos potenciales según la tarea, su descripción y la descripción de los riesgos. Genera una respuesta de máximo 300 palabras."
+
+# Prompts de sistema de los métodos individuales (versiones normal, streaming y asíncrona)
+DESCRIPTION_SYSTEM_PROMPT = "Eres un experto en gestión de tareas de control de calidad. Genera una descripción profesional de máximo 200 palabras."
+CATEGORY_SYSTEM_PROMPT = "Eres un experto en clasificación de tareas. Devuelve ÚNICAMENTE una categoría a partir de el tipo de tarea y la descripción. La categoría debe pertenecer a una de las siguientes opciones: Testing y Control de Calidad, Desarrollo Frontend, Desarrollo Backend, Desarrollo General , Diseño de Sistemas, Documentación, Base de Datos Seguridad, Infraestructura, Mantenimiento, Investigación, Supervisión, Riesgos Laborales, Limpieza, Otro."
+EFFORT_SYSTEM_PROMPT = "Eres un experto en estimación de tiempo para la ejecución de tareas. Calcula el tiempo en horas que toma ejecutar la tarea correspondiente, este dato debe estar entre 2 a 48 horas. Las tareas de desarrollo, control de calidad y testing toman al menos 8 horas, las tarewas de desarrollo de frontend, back end y desarrollo general toman 24 horas, la tarea de documentacion toma 4 horas, la tarea de base de datos toma 16 horas, la tarea de investigación toma 48 horas, supervisión y riesgos laborales toma 4 horas y otros toma 6 horas Devuelve ÚNICAMENTE un número de horas."
+RISKS_SYSTEM_PROMPT = "Eres un experto en análisis de riesgos que se presentan en la ejecución de tareas. Identifica los riesgos potenciales según la tarea y la descripción de la tarea. Genera una respuesta de máximo 200 palabras."
+MITIGATION_SYSTEM_PROMPT = (
+    "Eres un experto en gestión de riesgos en la ejecuciòn de tareas. Genera un plan de mitigación para los riesgos "
+    "potenciales según la tarea, su descripción y la descripción de los riesgos. Genera una respuesta de máximo 200 palabras."
+)
+
+# Prompts de generación de historias de usuario y tareas
+USER_STORY_SYSTEM_PROMPT = (
+    "Eres un experto en gestión ágil de proyectos. Genera una historia de usuario en formato JSON con los campos: project, role, goal, reason, description, priority (baja, media, alta, bloqueante), story_points (1-8), effort_hours (decimal). Responde solo el JSON, sin explicaciones."
+)
+TASKS_SYSTEM_PROMPT = (
+    "Eres un experto en gestión de un laboratorio de control de calidad para la industria farmacéutica. "
+    "Genera exactamente 5 tareas en formato JSON para una historia de usuario. "
+    "Cada tarea debe tener un título concreto de máximo 30 palabras y una descripción de máximo 100 palabras. "
+    "El formato debe ser: [{\"title\": \"Título de la tarea\", \"description\": \"Descripción de la tarea\"}, ...]. "
+    "Responde solo el JSON, sin explicaciones."
+)
+
+# Prompts de usuario del plan de mitigación (las secciones se recortan con el presupuesto de tokens)
+ENRICH_MITIGATION_USER_PROMPT = "Genera un plan de mitigación para los siguientes riesgos: {title} - {description} - {risks}"
+MITIGATION_USER_PROMPT = (
+    "Genera un plan de mitigación para los siguientes riesgos: {title} - {description} - {category} - {risk_analysis}"
+)
+
+# Código de error de los resultados cuando el circuito de Azure OpenAI está abierto
+CIRCUIT_OPEN = 'circuit_open'
+
+# Modos de ejecución de process_task
+ENRICHMENT_MODES = ('sequential', 'parallel', 'one_shot')
+
+# Enriquecimiento en una sola llamada: todos los campos en un objeto JSON
+ONE_SHOT_SYSTEM_PROMPT = (
+    "Eres un experto en gestión de tareas de un laboratorio de control de calidad de la industria farmacéutica. "
+    "A partir del título de la tarea devuelve ÚNICAMENTE un objeto JSON con los campos: "
+    "description (descripción profesional de máximo 300 palabras), "
+    "category (una de: Testing y Control de Calidad, Desarrollo Frontend, Desarrollo Backend, Desarrollo General, "
+    "Diseño de Sistemas, Documentación, Base de Datos, Seguridad, Infraestructura, Mantenimiento, Investigación, "
+    "Supervisión, Riesgos Laborales, Limpieza, Otro), "
+    "effort (número entero de horas entre 2 y 48), "
+    "risk_analysis (riesgos potenciales, máximo 200 palabras) y "
+    "mitigation (plan de mitigación de esos riesgos, máximo 300 palabras)."
+)
+
+# Esquema de la respuesta del modo one_shot: campo -> tipos aceptados
+ONE_SHOT_SCHEMA = {
+    'description': (str,),
+    'category': (str,),
+    'effort': (int, float, str),
+    'risk_analysis': (str,),
+    'mitigation': (str,)
+}
+
+
+def ai_error_status(result: Dict[str, Any]) -> int:
+    """Código HTTP de un resultado fallido: 503 con el circuito abierto, 500 en otro caso"""
+    return 503 if result.get('error_code') == CIRCUIT_OPEN else 500
+
+
+def parse_user_story_response(response_text: str) -> dict:
+    """
+    Decodifica la historia de usuario devuelta por el modelo
+    
+    Raises:
+        ValueError: Si la respuesta no contiene un objeto JSON válido
+    """
+    try:
+        return json.loads(response_text)
+    except Exception:
+        # Si la respuesta no es JSON válido, intentar extraer el bloque JSON
+        match = re.search(r'\{[\s\S]*\}', response_text)
+        if match:
+            return json.loads(match.group(0))
+        raise ValueError(f"Respuesta de IA no es JSON válido: {response_text}")
+
+
+def parse_tasks_response(response_text: str) -> list:
+    """Decodifica la lista de tareas devuelta por el modelo, con tareas genéricas como último recurso"""
+    try:
+        tasks = json.loads(response_text)
+        # Asegurar que devolvemos una lista
+        if isinstance(tasks, list):
+            return tasks
+        else:
+            # Si no es una lista, intentar convertir
+            return [tasks] if isinstance(tasks, dict) else []
+    except Exception as e:
+        print(f"Error parsing JSON response: {e}")
+        print(f"Response text: {response_text}")
+        # Si la respuesta no es JSON válido, intentar extraer el bloque JSON
+        match = re.search(r'\[[\s\S]*\]', response_text)
+        if match:
+            try:
+                return json.loads(match.group(0))
+            except:
+                pass
+        # Fallback: crear tareas básicas
+        return [
+            {"title": "Tarea 1", "description": "Descripción de la tarea 1"},
+            {"title": "Tarea 2", "description": "Descripción de la tarea 2"},
+            {"title": "Tarea 3", "description": "Descripción de la tarea 3"},
+            {"title": "Tarea 4", "description": "Descripción de la tarea 4"},
+            {"title": "Tarea 5", "description": "Descripción de la tarea 5"}
+        ]
+
+
+def validate_enrichment(data: Any) -> Dict[str, Any]:
+    """
+    Valida la respuesta del modo one_shot contra ONE_SHOT_SCHEMA
+    
+    Args:
+        data: Objeto JSON decodificado
+        
+    Returns:
+        Dict[str, Any]: Campos del esquema con effort convertido a entero
+        
+    Raises:
+        ValueError: Si falta un campo, tiene un tipo incorrecto o está vacío
+    """
+    if not isinstance(data, dict):
+        raise ValueError("La respuesta no es un objeto JSON")
+    fields = {}
+    for field, types in ONE_SHOT_SCHEMA.items():
+        value = data.get(field)
+        if isinstance(value, bool) or not isinstance(value, types):
+            raise ValueError(f"Campo '{field}' ausente o con tipo incorrecto")
+        if isinstance(value, str) and not value.strip():
+            raise ValueError(f"Campo '{field}' vacío")
+        fields[field] = value.strip() if isinstance(value, str) else value
+    try:
+        fields['effort'] = int(float(fields['effort']))
+    except (ValueError, OverflowError):
+        # OverflowError: valores no finitos como 1e999
+        raise ValueError("Campo 'effort' no numérico")
+    return fields
+
 class AIService:
     """Servicio para interactuar con Azure OpenAI"""
     
@@ -24,20 +180,8 @@ class AIService:
                 self._setup_testing_mode()
                 return
             
-            # Obtener las credenciales del archivo .env
-            api_key = os.getenv("AZURE_OPENAI_API_KEY")
-            api_version = os.getenv("AZURE_OPENAI_API_VERSION")
-            azure_endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
-            
-            # Verificar que todas las credenciales estén presentes
-            if not all([api_key, api_version, azure_endpoint]):
-                raise ValueError("Faltan credenciales de Azure OpenAI en el archivo .env")
-            
-            # Configurar OpenAI para Azure (nueva API v1.x)
-            openai.api_key = api_key
-            openai.api_version = api_version
-            openai.azure_endpoint = azure_endpoint
-            # NO poner openai.base_url ni openai.api_base
+            # Verificar las credenciales del archivo .env (el cliente se crea al primer uso)
+            azure_openai_settings()
             
             self.deployment_name = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
             if not self.deployment_name:
@@ -60,6 +204,10 @@ class AIService:
         
         # Atributos esperados por los tests
         self.client = None  # Mock client
+        self.cache = None
+        self.rate_limiter = None
+        self.retry_policy = None
+        self.circuit_breaker = None
         self.temperature = 0.7
         self.max_tokens = 1000
         
@@ -68,18 +216,15 @@ class AIService:
         self.frequency_penalty = float(os.getenv("FREQUENCY_PENALTY", "0.0"))
         self.presence_penalty = float(os.getenv("PRESENCE_PENALTY", "0.0"))
         
-        # Configurar encoding para testing
-        try:
-            self.encoding = tiktoken.encoding_for_model("gpt-3.5-turbo")
-        except:
-            self.encoding = None
+        # Topes de tokens de los prompts y de la salida
+        self.prompt_budget = get_prompt_budget()
     
     def _setup_production_mode(self):
         """Configura el servicio para modo producción"""
         self.is_testing = False
         
-        # Atributos esperados por los tests
-        self.client = openai  # Cliente real
+        # Cliente compartido con pool de conexiones (se crea en la primera llamada)
+        self.client = None
         self.temperature = 0.7
         self.max_tokens = 1000
         
@@ -88,11 +233,26 @@ class AIService:
         self.frequency_penalty = float(os.getenv("FREQUENCY_PENALTY", "0.0"))
         self.presence_penalty = float(os.getenv("PRESENCE_PENALTY", "0.0"))
         
-        # Configurar encoding
-        try:
-            self.encoding = tiktoken.encoding_for_model("gpt-3.5-turbo")
-        except:
-            self.encoding = None
+        # Caché de respuestas compartida por el proceso (None si está desactivada)
+        self.cache = get_llm_cache()
+        
+        # Presupuestos RPM/TPM y concurrencia compartidos por el proceso
+        self.rate_limiter = get_rate_limiter()
+        
+        # Reintentos con backoff para los errores transitorios
+        self.retry_policy = get_retry_policy()
+        
+        # Corta las llamadas mientras Azure OpenAI está degradado
+        self.circuit_breaker = get_circuit_breaker()
+        
+        # Topes de tokens de los prompts y de la salida
+        self.prompt_budget = get_prompt_budget()
+
+    def _client(self):
+        """Cliente de Azure OpenAI compartido por el proceso"""
+        if self.client is None:
+            self.client = get_openai_client()
+        return self.client
 
     def _mock_llm_response(self, system_prompt: str, user_prompt: str) -> Tuple[str, Dict[str, Any]]:
         """Respuesta mock para modo testing"""
@@ -104,63 +264,279 @@ class AIService:
         }
         return mock_response, {'usage': mock_usage}
 
-    def _call_llm(self, system_prompt: str, user_prompt: str) -> Tuple[str, Dict[str, Any]]:
-        """Llama al LLM de Azure OpenAI usando la nueva API v1.x"""
+    def _cache_key(self, system_prompt: str, user_prompt: str, json_mode: bool,
+                   max_tokens: Optional[int] = None) -> Optional[str]:
+        """Clave de caché de la llamada o None si la caché está desactivada"""
+        if self.cache is None:
+            return None
+        return cache_key(
+            deployment=self.deployment_name,
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            temperature=self.temperature,
+            top_p=self.top_p,
+            frequency_penalty=self.frequency_penalty,
+            presence_penalty=self.presence_penalty,
+            max_tokens=max_tokens or self.max_tokens,
+            json_mode=json_mode
+        )
+
+    def _cached_result(self, content: str, original: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        """
+        Estadísticas de una respuesta servida desde la caché
+        
+        No se consumen tokens, así que el coste es cero; los valores de la
+        llamada original se conservan para poder medir el ahorro.
+        """
+        return content, {
+            'input_tokens': 0,
+            'output_tokens': 0,
+            'total_tokens': 0,
+            'cost': 0.0,
+            'cache_hit': True,
+            'original_total_tokens': original.get('total_tokens', 0),
+            'original_cost': original.get('cost', 0.0)
+        }
+
+    def _call_llm(self, system_prompt: str, user_prompt: str, json_mode: bool = False) -> Tuple[str, Dict[str, Any]]:
+        """
+        Llama al LLM de Azure OpenAI usando la nueva API v1.x
+        
+        Args:
+            system_prompt: Prompt de sistema
+            user_prompt: Prompt de usuario
+            json_mode: Solicitar un objeto JSON (response_format json_object)
+        """
         # Si estamos en modo testing, usar respuesta mock
         if self.is_testing:
             return self._mock_llm_response(system_prompt, user_prompt)
+        
+        # max_tokens según lo que deja el prompt en la ventana de contexto
+        prompt_tokens, max_tokens = self._output_budget(system_prompt, user_prompt)
+        key = self._cache_key(system_prompt, user_prompt, json_mode, max_tokens)
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return self._cached_result(*cached)
+        
+        # Falla al instante si el circuito está abierto
+        self.circuit_breaker.before_call()
+        
+        # Estimación previa como la de Azure: prompt + max_tokens de salida
+        estimated_tokens = prompt_tokens + max_tokens
         try:
-            # Llamada real a OpenAI (nueva API)
-            response = openai.chat.completions.create(
-                model=self.deployment_name,  # Para Azure, deployment_name es el modelo
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=self.temperature,
-                max_tokens=self.max_tokens,
-                top_p=self.top_p,
-                frequency_penalty=self.frequency_penalty,
-                presence_penalty=self.presence_penalty,
-                stop=None,
-                # Azure requiere api_version y deployment_id/model
+            content, stats = self.retry_policy.call(
+                lambda timeout: self._limited_completion(
+                    system_prompt, user_prompt, json_mode, estimated_tokens, timeout, max_tokens
+                )
             )
-            # Extraer la respuesta y estadísticas
-            content = response.choices[0].message.content.strip()
-            usage = response.usage
-            # Calcular estadísticas
-            stats = {
-                'input_tokens': usage.prompt_tokens,
-                'output_tokens': usage.completion_tokens,
-                'total_tokens': usage.total_tokens,
-                'cost': self.calculate_cost(usage.prompt_tokens, usage.completion_tokens)
+        except RateLimitExceeded:
+            # Rechazo local: no se llegó a probar la dependencia
+            self.circuit_breaker.release()
+            raise
+        except Exception as e:
+            # Solo los fallos transitorios indican que la dependencia está degradada
+            self.circuit_breaker.record(not is_retryable(e))
+            raise self._api_error(e) from e
+        self.circuit_breaker.record(True)
+        if key is not None:
+            self.cache.set(key, content, stats)
+        return content, stats
+
+    def _limited_completion(self, system_prompt: str, user_prompt: str, json_mode: bool,
+                            estimated_tokens: int, timeout: float,
+                            max_tokens: Optional[int] = None) -> Tuple[str, Dict[str, Any]]:
+        """Un intento de llamada: reserva presupuesto en el limitador y envía la petición"""
+        started = time.monotonic()
+        with self.rate_limiter.acquire(estimated_tokens, timeout) as record_usage:
+            # La espera en cola consume parte del plazo de la llamada
+            timeout = max(0.0, timeout - (time.monotonic() - started))
+            content, stats = self._request_completion(system_prompt, user_prompt, json_mode, timeout, max_tokens)
+            record_usage(stats['total_tokens'])
+        return content, stats
+
+    def _output_budget(self, system_prompt: str, user_prompt: str) -> Tuple[int, int]:
+        """Tokens de los prompts y max_tokens de la llamada dentro de la ventana de contexto"""
+        prompt_tokens = self.count_tokens(system_prompt) + self.count_tokens(user_prompt)
+        return prompt_tokens, self.prompt_budget.max_output_tokens(prompt_tokens, self.max_tokens)
+
+    def _fit_prompt(self, stage: str, template: str, trimmable: Tuple[str, ...], **sections: str) -> Tuple[str, int]:
+        """
+        Prompt de usuario de una etapa recortado a su presupuesto de tokens
+        
+        Args:
+            stage: Etapa (ver prompt_budget.STAGE_PROMPT_TOKENS)
+            template: Plantilla con un campo por sección
+            trimmable: Secciones recortables, de la más antigua a la más reciente
+            **sections: Texto de cada sección
+            
+        Returns:
+            Tuple[str, int]: Prompt y tokens ahorrados
+        """
+        return self.prompt_budget.fit(template, sections, trimmable, self.prompt_budget.stage_limit(stage))
+
+    def _stream_llm(self, system_prompt: str, user_prompt: str) -> Iterator[Tuple[str, Any]]:
+        """
+        Llama al LLM en modo streaming
+        
+        Aplica la caché, el circuit breaker, el limitador y los reintentos igual
+        que _call_llm; los reintentos solo cubren el establecimiento del stream.
+        
+        Args:
+            system_prompt: Prompt de sistema
+            user_prompt: Prompt de usuario
+            
+        Yields:
+            Tuple[str, Any]: ('delta', texto) por fragmento y al final ('done', estadísticas)
+        """
+        if self.is_testing:
+            content, _ = self._mock_llm_response(system_prompt, user_prompt)
+            yield 'delta', content
+            yield 'done', {
+                'input_tokens': 50,
+                'output_tokens': 20,
+                'total_tokens': 70,
+                'cost': self.calculate_cost(50, 20)
             }
-            return content, stats
+            return
+        
+        prompt_tokens, max_tokens = self._output_budget(system_prompt, user_prompt)
+        key = self._cache_key(system_prompt, user_prompt, False, max_tokens)
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                content, stats = self._cached_result(*cached)
+                yield 'delta', content
+                yield 'done', stats
+                return
+        
+        self.circuit_breaker.before_call()
+        estimated_tokens = prompt_tokens + max_tokens
+        try:
+            started = time.monotonic()
+            with self.rate_limiter.acquire(estimated_tokens, self.retry_policy.deadline) as record_usage:
+                stream = self.retry_policy.call(
+                    lambda timeout: self._client().chat.completions.create(
+                        model=self.deployment_name,
+                        messages=[
+                            {"role": "system", "content": system_prompt},
+                            {"role": "user", "content": user_prompt}
+                        ],
+                        temperature=self.temperature,
+                        max_tokens=max_tokens,
+                        top_p=self.top_p,
+                        frequency_penalty=self.frequency_penalty,
+                        presence_penalty=self.presence_penalty,
+                        stop=None,
+                        timeout=timeout,
+                        stream=True,
+                        stream_options={'include_usage': True}
+                    ),
+                    # La espera en cola consume parte del plazo de la llamada
+                    deadline=self.retry_policy.deadline - (time.monotonic() - started)
+                )
+                parts = []
+                usage = None
+                for chunk in stream:
+                    if getattr(chunk, 'usage', None):
+                        usage = chunk.usage
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        parts.append(chunk.choices[0].delta.content)
+                        yield 'delta', chunk.choices[0].delta.content
+                
+                content = ''.join(parts).strip()
+                if usage is not None:
+                    input_tokens, output_tokens = usage.prompt_tokens, usage.completion_tokens
+                else:
+                    # Versiones de API sin include_usage: estimar con el encoding
+                    input_tokens = prompt_tokens
+                    output_tokens = self.count_tokens(content)
+                stats = {
+                    'input_tokens': input_tokens,
+                    'output_tokens': output_tokens,
+                    'total_tokens': input_tokens + output_tokens,
+                    'cost': self.calculate_cost(input_tokens, output_tokens)
+                }
+                record_usage(stats['total_tokens'])
+        except (RateLimitExceeded, GeneratorExit):
+            # Rechazo local o cliente desconectado: no dice nada de la dependencia
+            self.circuit_breaker.release()
+            raise
         except Exception as e:
-            # Manejar diferentes tipos de errores de OpenAI
-            error_msg = str(e)
-            if "rate limit" in error_msg.lower():
-                print(f"Error de límite de velocidad: {e}")
-                raise Exception("Límite de velocidad excedido. Intente nuevamente más tarde.")
-            elif "authentication" in error_msg.lower() or "unauthorized" in error_msg.lower():
-                print(f"Error de autenticación: {e}")
-                raise Exception("Error de autenticación con Azure OpenAI.")
-            elif "api" in error_msg.lower():
-                print(f"Error de API: {e}")
-                raise Exception("Error en la API de Azure OpenAI.")
-            else:
-                print(f"Error inesperado: {e}")
-                raise Exception(f"Error inesperado al llamar a la API: {str(e)}")
+            self.circuit_breaker.record(not is_retryable(e))
+            raise self._api_error(e) from e
+        
+        self.circuit_breaker.record(True)
+        if key is not None:
+            self.cache.set(key, content, stats)
+        yield 'done', stats
+
+    def _request_completion(self, system_prompt: str, user_prompt: str, json_mode: bool,
+                            timeout: Optional[float] = None,
+                            max_tokens: Optional[int] = None) -> Tuple[str, Dict[str, Any]]:
+        """Envía la petición a Azure OpenAI y devuelve la respuesta y sus estadísticas"""
+        # Llamada real a OpenAI (nueva API)
+        response = self._client().chat.completions.create(
+            model=self.deployment_name,  # Para Azure, deployment_name es el modelo
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            temperature=self.temperature,
+            max_tokens=max_tokens or self.max_tokens,
+            top_p=self.top_p,
+            frequency_penalty=self.frequency_penalty,
+            presence_penalty=self.presence_penalty,
+            stop=None,
+            timeout=timeout,
+            # Azure requiere api_version y deployment_id/model
+            **({'response_format': {'type': 'json_object'}} if json_mode else {})
+        )
+        return self._completion_result(response)
+
+    def _completion_result(self, response: Any) -> Tuple[str, Dict[str, Any]]:
+        """Texto de una chat completion y sus estadísticas de tokens y coste"""
+        # Extraer la respuesta y estadísticas
+        content = response.choices[0].message.content.strip()
+        usage = response.usage
+        # Calcular estadísticas
+        stats = {
+            'input_tokens': usage.prompt_tokens,
+            'output_tokens': usage.completion_tokens,
+            'total_tokens': usage.total_tokens,
+            'cost': self.calculate_cost(usage.prompt_tokens, usage.completion_tokens)
+        }
+        return content, stats
+
+    def _api_error(self, e: Exception) -> Exception:
+        """Convierte un error de OpenAI en la excepción con mensaje en español que ven las rutas"""
+        # Manejar diferentes tipos de errores de OpenAI
+        error_msg = str(e)
+        if "rate limit" in error_msg.lower():
+            print(f"Error de límite de velocidad: {e}")
+            return Exception("Límite de velocidad excedido. Intente nuevamente más tarde.")
+        elif "authentication" in error_msg.lower() or "unauthorized" in error_msg.lower():
+            print(f"Error de autenticación: {e}")
+            return Exception("Error de autenticación con Azure OpenAI.")
+        elif "api" in error_msg.lower():
+            print(f"Error de API: {e}")
+            return Exception("Error en la API de Azure OpenAI.")
+        else:
+            print(f"Error inesperado: {e}")
+            return Exception(f"Error inesperado al llamar a la API: {str(e)}")
 
     def count_tokens(self, text: str) -> int:
-        """Cuenta los tokens en un texto"""
-        if self.encoding is None:
-            # Fallback: aproximación simple
-            return int(len(text.split()) * 1.3)  # Aproximación
-        try:
-            return len(self.encoding.encode(text))
-        except:
-            return int(len(text.split()) * 1.3)  # Fallback
+        """
+        Cuenta los tokens en un texto
+
+        Usa el encoder del proceso en cada llamada, de modo que si su carga
+        falló y se reintenta con éxito se deja de aproximar.
+        """
+        return count_tokens(text)
+
+    def count_tokens_batch(self, texts: List[str]) -> List[int]:
+        """Cuenta los tokens de varios textos en una sola pasada multihilo"""
+        return count_tokens_batch(texts)
 
     def calculate_cost(self, input_tokens: int, output_tokens: int) -> float:
         """Calcula el costo aproximado de la llamada"""
@@ -173,99 +549,216 @@ class AIService:
         
         return input_cost + output_cost
 
-    def process_task(self, task_data: Dict[str, Any]) -> Dict[str, Any]:
+    def _enrichment_stages(self, title: str, description: str) -> Tuple[Dict[str, Tuple[str, str]], Dict[str, int]]:
+        """
+        Prompts de las etapas de enriquecimiento que solo dependen de la descripción
+        
+        La descripción se recorta al presupuesto de cada etapa.
+        
+        Args:
+            title: Título de la tarea
+            description: Descripción generada en la primera etapa
+            
+        Returns:
+            Tuple: Etapa -> (prompt de sistema, prompt de usuario) y etapa -> tokens ahorrados
+        """
+        templates = {
+            'categorization': (ENRICH_CATEGORY_SYSTEM_PROMPT, "Categoriza la tarea: {title} - {description}"),
+            'effort_estimation': (ENRICH_EFFORT_SYSTEM_PROMPT, "Estima las horas para: {title} - {description}"),
+            'risk_analysis': (ENRICH_RISKS_SYSTEM_PROMPT, "Analiza los riesgos de: {title} - {description}"),
+        }
+        stages = {}
+        saved = {}
+        for name, (system_prompt, template) in templates.items():
+            user_prompt, saved[name] = self._fit_prompt(
+                name, template, ('description',), title=title, description=description
+            )
+            stages[name] = (system_prompt, user_prompt)
+        return stages, saved
+
+    def _run_stages(self, stages: Dict[str, Tuple[str, str]], mode: str) -> Dict[str, Tuple[str, Dict[str, Any]]]:
+        """
+        Ejecuta etapas independientes, en orden o en paralelo
+        
+        Args:
+            stages: Etapa -> (prompt de sistema, prompt de usuario)
+            mode: 'sequential' o 'parallel'
+            
+        Returns:
+            Dict[str, Tuple[str, Dict[str, Any]]]: Etapa -> (respuesta, estadísticas)
+        """
+        if mode == 'sequential' or len(stages) < 2:
+            return {name: self._call_llm(*prompts) for name, prompts in stages.items()}
+        
+        with ThreadPoolExecutor(max_workers=len(stages), thread_name_prefix='ai-stage') as executor:
+            futures = {name: executor.submit(self._call_llm, *prompts) for name, prompts in stages.items()}
+            # result() propaga la primera excepción de cualquier etapa
+            return {name: future.result() for name, future in futures.items()}
+
+    def _one_shot_enrichment(self, title: str) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Enriquece la tarea con una sola llamada que devuelve un objeto JSON
+        
+        Args:
+            title: Título de la tarea
+            
+        Returns:
+            Tuple[Optional[Dict[str, Any]], Dict[str, Any]]: Campos validados (None si
+            la respuesta no cumple el esquema) y estadísticas de la llamada
+        """
+        response_text, info = self._call_llm(ONE_SHOT_SYSTEM_PROMPT, f"Tarea: {title}", json_mode=True)
+        try:
+            return validate_enrichment(json.loads(response_text)), info
+        except (ValueError, TypeError) as e:
+            print(f"⚠️ Respuesta JSON de enriquecimiento no válida, se usa el modo por etapas: {e}")
+            return None, info
+
+    def _error_result(self, e: Exception) -> Dict[str, Any]:
+        """Respuesta de error de los métodos públicos; marca el circuito abierto para responder 503"""
+        result = {
+            'success': False,
+            'error': str(e)
+        }
+        if isinstance(e, CircuitOpenError):
+            result['error_code'] = CIRCUIT_OPEN
+        return result
+
+    def _map_category(self, category: str) -> str:
+        """Convierte la categoría devuelta por el modelo en el valor interno del enum"""
+        category_clean = category.strip().lower()
+        
+        # Primero intentar buscar directamente en los valores del enum
+        valid_values = TaskCategory.get_values()
+        if category_clean in valid_values:
+            return category_clean
+        
+        # Si no se encuentra, intentar mapear desde nombres de visualización
+        display_names = TaskCategory.get_display_names()
+        reverse_mapping = {display_name.lower(): value for value, display_name in display_names.items()}
+        return reverse_mapping.get(category_clean, 'otro')
+
+    def _category_from_display_name(self, category: str) -> str:
+        """Valor interno del enum para el nombre de visualización devuelto por el modelo ('otro' si no coincide)"""
+        display_names = TaskCategory.get_display_names()
+        # Crear mapeo inverso: nombre de visualización -> valor interno
+        reverse_mapping = {display_name: value for value, display_name in display_names.items()}
+        return reverse_mapping.get(category.strip(), 'otro')
+
+    def _parse_effort(self, effort: str) -> int:
+        """Horas estimadas por el modelo como entero (0 si la respuesta no es un número)"""
+        try:
+            return int(effort.strip())
+        except ValueError:
+            return 0
+
+    def _enrichment_mode(self, mode: Optional[str]) -> str:
+        """
+        Modo de process_task: el indicado o AI_ENRICHMENT_MODE ('sequential' por defecto)
+        
+        Raises:
+            ValueError: Si el modo no es uno de ENRICHMENT_MODES
+        """
+        mode = (mode or os.getenv('AI_ENRICHMENT_MODE', 'sequential')).lower()
+        if mode not in ENRICHMENT_MODES:
+            raise ValueError(f"Modo de enriquecimiento no válido: {mode}")
+        return mode
+
+    def process_task(self, task_data: Dict[str, Any], mode: Optional[str] = None) -> Dict[str, Any]:
         """
         Procesa una tarea completa con todas las funcionalidades de IA
         
+        Las etapas siguen sus dependencias: descripción -> (categoría, esfuerzo,
+        riesgos) -> mitigación. En modo 'parallel' las tres etapas intermedias se
+        lanzan a la vez, de modo que la latencia pasa de cinco a tres llamadas.
+        El modo 'one_shot' pide todos los campos en un único objeto JSON y, si la
+        respuesta no es válida, recurre al modo por etapas en paralelo.
+        
         Args:
             task_data: Diccionario con los datos de la tarea
+            mode: 'sequential', 'parallel' o 'one_shot' (por defecto AI_ENRICHMENT_MODE)
             
         Returns:
             Dict[str, Any]: Datos de la tarea procesados
         """
+        mode = self._enrichment_mode(mode)
+        
         try:
-            # Generar descripción
-            description, desc_info = self._call_llm(
-                "Eres un experto en gestión de tareas. Genera una descripción profesional de máximo 300 palabras a partir de la tarea que te da el usuario.",
-                f"Genera una descripción para la tarea: {task_data.get('title', '')}"
-            )
-            
-            # Categorizar
-            category, cat_info = self._call_llm(
-                "Eres un experto en clasificación de tareas. Devuelve ÚNICAMENTE una categoría a partir de el tipo de tarea y la descrición. La categoría debe pertenecer a una de las siguientes opciones: Testing y Control de Calidad, Desarrollo Frontend, Desarrollo Backend, Desarrollo General , Diseño de Sistemas, Documentación, Base de Datos Seguridad, Infraestructura, Mantenimiento, Investigación, Supervisión, Riesgos Laborales, Limpieza, Otro.",
-                f"Categoriza la tarea: {task_data.get('title', '')} - {description}"
-            )
-            
-            # Estimar esfuerzo
-            effort, eff_info = self._call_llm(
-                "Eres un experto en estimación de tiempo para la ejecución de tareas. Calcula el tiempo en horas que toma ejecutar la tarea correspondiente, este dato debe estar entre 2 a 48 horas. Las tareas de desarrollo, control de calidad y testing toman al menos 8 horas, las tarewas de desarrollo de frontend, back end y desarrollo general toman 24 horas, las tarea de documentacion toma 4 horas, la tarea de base de datos toma 16 horas, la tarea de investigación toma 48 horas, supervisión y riesgos laborales toma 4 horas y otros toma 6 horas Devuelve ÚNICAMENTE un número de horas.",
-                f"Estima las horas para: {task_data.get('title', '')} - {description}"
-            )
+            title = task_data.get('title', '')
+            ai_processing = {}
+            
+            if mode == 'one_shot':
+                fields, one_shot_info = self._one_shot_enrichment(title)
+                ai_processing['one_shot'] = one_shot_info
+                if fields is not None:
+                    task_data.update({
+                        'description': fields['description'],
+                        'category': self._map_category(fields['category']),
+                        'effort': fields['effort'],
+                        'risk_analysis': fields['risk_analysis'],
+                        'risk_mitigation': fields['mitigation']
+                    })
+                    return self._with_accounting(task_data, ai_processing)
+                mode = 'parallel'
             
-            # Analizar riesgos
-            risks, risk_info = self._call_llm(
-                "Eres un experto en análisis de riesgos de ejecucion de tareas. Identifica los riesgos potenciales según la tarea y la descripción de la tarea. Genera una respuesta de máximo 200 palabras.",
-                f"Analiza los riesgos de: {task_data.get('title', '')} - {description}"
+            # Generar descripción
+            description, ai_processing['description'] = self._call_llm(
+                ENRICH_DESCRIPTION_SYSTEM_PROMPT,
+                f"Genera una descripción para la tarea: {title}"
             )
             
-            # Generar mitigación
-            mitigation, mit_info = self._call_llm(
-                "Eres un experto en gestión de riesgos de un laboratorio de control de calidad de la industria farmacéutica. Genera un plan de mitigación para los riesgos potenciales según la tarea, su descripción y la descripción de los riesgos. Genera una respuesta de máximo 300 palabras.",
-                f"Genera un plan de mitigación para los siguientes riesgos: {task_data.get('title', '')} - {description} - {risks}"
+            # Categorizar, estimar esfuerzo y analizar riesgos (solo dependen de la descripción)
+            stages, saved = self._enrichment_stages(title, description)
+            results = self._run_stages(stages, mode)
+            category, ai_processing['categorization'] = results['categorization']
+            effort, ai_processing['effort_estimation'] = results['effort_estimation']
+            risks, ai_processing['risk_analysis'] = results['risk_analysis']
+            
+            # Generar mitigación (si no cabe todo, se recorta antes la descripción que los riesgos)
+            mitigation_prompt, saved['mitigation'] = self._fit_prompt(
+                'mitigation', ENRICH_MITIGATION_USER_PROMPT, ('description', 'risks'),
+                title=title, description=description, risks=risks
             )
-            
-            # Convertir categoría a valor interno usando el mapeo del enum
-            category_clean = category.strip().lower()
-            
-            # Primero intentar buscar directamente en los valores del enum
-            valid_values = TaskCategory.get_values()
-            if category_clean in valid_values:
-                category_value = category_clean
-            else:
-                # Si no se encuentra, intentar mapear desde nombres de visualización
-                display_names = TaskCategory.get_display_names()
-                reverse_mapping = {display_name.lower(): value for value, display_name in display_names.items()}
-                category_value = reverse_mapping.get(category_clean, 'otro')
+            mitigation, ai_processing['mitigation'] = self._call_llm(ENRICH_MITIGATION_SYSTEM_PROMPT, mitigation_prompt)
+            self._record_savings(ai_processing, saved)
             
             # Actualizar datos de la tarea
-            total_tokens = (
-                desc_info['total_tokens'] +
-                cat_info['total_tokens'] +
-                eff_info['total_tokens'] +
-                risk_info['total_tokens'] +
-                mit_info['total_tokens']
-            )
-            
-            total_cost = (
-                desc_info['cost'] +
-                cat_info['cost'] +
-                eff_info['cost'] +
-                risk_info['cost'] +
-                mit_info['cost']
-            )
-            
             task_data.update({
                 'description': description,
-                'category': category_value,
+                'category': self._map_category(category),
                 'effort': int(effort) if effort.isdigit() else 0,
                 'risk_analysis': risks,
-                'risk_mitigation': mitigation,
-                'tokens_gastados': total_tokens,
-                'costos': total_cost,
-                'ai_processing': {
-                    'description': desc_info,
-                    'categorization': cat_info,
-                    'effort_estimation': eff_info,
-                    'risk_analysis': risk_info,
-                    'mitigation': mit_info
-                }
+                'risk_mitigation': mitigation
             })
+            return self._with_accounting(task_data, ai_processing)
             
-            return task_data
-            
+        except CircuitOpenError:
+            raise
         except Exception as e:
             raise Exception(f"Error al procesar la tarea: {str(e)}")
 
+    def _record_savings(self, ai_processing: Dict[str, Dict[str, Any]], saved: Dict[str, int]) -> None:
+        """Anota en las estadísticas de las etapas recortadas los tokens de prompt ahorrados"""
+        for name, tokens in saved.items():
+            if tokens:
+                ai_processing[name] = dict(ai_processing[name], prompt_tokens_saved=tokens)
+
+    def _with_accounting(self, task_data: Dict[str, Any], ai_processing: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Añade a la tarea los tokens y costes totales, los tokens ahorrados y el desglose por etapa"""
+        task_data.update({
+            'tokens_gastados': sum(info['total_tokens'] for info in ai_processing.values()),
+            'costos': sum(info['cost'] for info in ai_processing.values()),
+            'tokens_ahorrados': sum(info.get('prompt_tokens_saved', 0) for info in ai_processing.values()),
+            'ai_processing': ai_processing
+        })
+        return task_data
+
+    def _mitigation_prompt(self, title: str, description: str, category: str, risk_analysis: str) -> Tuple[str, int]:
+        """Prompt de usuario de generate_mitigation dentro del presupuesto y tokens ahorrados"""
+        return self._fit_prompt(
+            'mitigation', MITIGATION_USER_PROMPT, ('description', 'risk_analysis'),
+            title=title, description=description, category=category, risk_analysis=risk_analysis
+        )
+
     def generate_description(self, title: str) -> Dict[str, Any]:
         """
         Genera una descripción detallada para una tarea
@@ -278,7 +771,7 @@ class AIService:
         """
         try:
             description, token_info = self._call_llm(
-                "Eres un experto en gestión de tareas de control de calidad. Genera una descripción profesional de máximo 200 palabras.",
+                DESCRIPTION_SYSTEM_PROMPT,
                 f"Genera una descripción para la tarea: {title}"
             )
             
@@ -301,10 +794,7 @@ class AIService:
             return response
             
         except Exception as e:
-            return {
-                'success': False,
-                'error': str(e)
-            }
+            return self._error_result(e)
 
     def categorize_task(self, title: str, description: str = '') -> Dict[str, Any]:
         """
@@ -319,33 +809,63 @@ class AIService:
         """
         try:
             category, token_info = self._call_llm(
-                "Eres un experto en clasificación de tareas. Devuelve ÚNICAMENTE una categoría a partir de el tipo de tarea y la descripción. La categoría debe pertenecer a una de las siguientes opciones: Testing y Control de Calidad, Desarrollo Frontend, Desarrollo Backend, Desarrollo General , Diseño de Sistemas, Documentación, Base de Datos Seguridad, Infraestructura, Mantenimiento, Investigación, Supervisión, Riesgos Laborales, Limpieza, Otro.",
+                CATEGORY_SYSTEM_PROMPT,
                 f"Categoriza la tarea: {title} - {description}"
             )
             
-            # Limpiar la categoría
-            category = category.strip()
+            return {
+                'success': True,
+                'category': self._category_from_display_name(category),
+                'total_tokens': token_info['total_tokens'],
+                'cost': token_info['cost']
+            }
             
-            # Usar el mapeo del enum para convertir nombres de visualización a valores internos
+        except Exception as e:
+            return self._error_result(e)
+
+    def categorize_tasks_batch(self, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Categoriza varias tareas con una sola llamada al LLM
+        
+        Args:
+            items: Lista de diccionarios con 'title' y opcionalmente 'description'
+            
+        Returns:
+            Dict[str, Any]: 'categories' con una categoría por tarea, en el mismo
+            orden que ``items``, y metadatos de la llamada
+        """
+        if not items:
+            return {'success': True, 'categories': [], 'total_tokens': 0, 'cost': 0.0}
+        try:
             display_names = TaskCategory.get_display_names()
-            # Crear mapeo inverso: nombre de visualización -> valor interno
-            reverse_mapping = {display_name: value for value, display_name in display_names.items()}
+            options = ', '.join(display_names.values())
+            numbered = '\n'.join(
+                f"{i + 1}. {item.get('title', '')} - {item.get('description', '')}"
+                for i, item in enumerate(items)
+            )
+            response_text, token_info = self._call_llm(
+                "Eres un experto en clasificación de tareas. Asigna a cada tarea de la lista ÚNICAMENTE una categoría "
+                f"a partir del tipo de tarea y la descripción. Las categorías posibles son: {options}. "
+                "Devuelve un objeto JSON con el campo categories: una lista con una categoría por tarea, "
+                "en el mismo orden y con el mismo número de elementos que la lista recibida.",
+                f"Categoriza las siguientes {len(items)} tareas:\n{numbered}",
+                json_mode=True
+            )
             
-            # Convertir la categoría al valor interno
-            select_value = reverse_mapping.get(category, 'otro')
+            data = json.loads(response_text)
+            categories = data.get('categories') if isinstance(data, dict) else data
+            if not isinstance(categories, list) or len(categories) != len(items):
+                raise ValueError(f"Se esperaban {len(items)} categorías y se recibió: {response_text}")
             
             return {
                 'success': True,
-                'category': select_value,
+                'categories': [self._category_from_display_name(str(category)) for category in categories],
                 'total_tokens': token_info['total_tokens'],
                 'cost': token_info['cost']
             }
             
         except Exception as e:
-            return {
-                'success': False,
-                'error': str(e)
-            }
+            return self._error_result(e)
 
     def estimate_effort(self, title: str, description: str = '', category: str = '') -> Dict[str, Any]:
         """
@@ -361,29 +881,19 @@ class AIService:
         """
         try:
             effort, token_info = self._call_llm(
-                "Eres un experto en estimación de tiempo para la ejecución de tareas. Calcula el tiempo en horas que toma ejecutar la tarea correspondiente, este dato debe estar entre 2 a 48 horas. Las tareas de desarrollo, control de calidad y testing toman al menos 8 horas, las tarewas de desarrollo de frontend, back end y desarrollo general toman 24 horas, la tarea de documentacion toma 4 horas, la tarea de base de datos toma 16 horas, la tarea de investigación toma 48 horas, supervisión y riesgos laborales toma 4 horas y otros toma 6 horas Devuelve ÚNICAMENTE un número de horas.",
+                EFFORT_SYSTEM_PROMPT,
                 f"Estima las horas para: {title} - {description} - {category}"
             )
             
-            # Limpiar y convertir el esfuerzo a entero
-            effort = effort.strip()
-            try:
-                effort = int(effort)
-            except ValueError:
-                effort = 0
-            
             return {
                 'success': True,
-                'effort': effort,
+                'effort': self._parse_effort(effort),
                 'total_tokens': token_info['total_tokens'],
                 'cost': token_info['cost']
             }
             
         except Exception as e:
-            return {
-                'success': False,
-                'error': str(e)
-            }
+            return self._error_result(e)
 
     def analyze_risks(self, title: str, description: str = '', category: str = '') -> Dict[str, Any]:
         """
@@ -399,7 +909,7 @@ class AIService:
         """
         try:
             risks, token_info = self._call_llm(
-                "Eres un experto en análisis de riesgos que se presentan en la ejecución de tareas. Identifica los riesgos potenciales según la tarea y la descripción de la tarea. Genera una respuesta de máximo 200 palabras.",
+                RISKS_SYSTEM_PROMPT,
                 f"Analiza los riesgos de: {title} - {description} - {category}"
             )
             
@@ -411,10 +921,7 @@ class AIService:
             }
             
         except Exception as e:
-            return {
-                'success': False,
-                'error': str(e)
-            }
+            return self._error_result(e)
 
     def generate_mitigation(self, title: str, description: str = '', category: str = '', risk_analysis: str = '') -> Dict[str, Any]:
         """
@@ -430,76 +937,83 @@ class AIService:
             Dict[str, Any]: Plan de mitigación y metadatos
         """
         try:
-            mitigation, token_info = self._call_llm(
-                "Eres un experto en gestión de riesgos en la ejecuciòn de tareas. Genera un plan de mitigación para los riesgos potenciales según la tarea, su descripción y la descripción de los riesgos. Genera una respuesta de máximo 200 palabras.",
-                f"Genera un plan de mitigación para los siguientes riesgos: {title} - {description} - {category} - {risk_analysis}"
-            )
+            user_prompt, saved = self._mitigation_prompt(title, description, category, risk_analysis)
+            mitigation, token_info = self._call_llm(MITIGATION_SYSTEM_PROMPT, user_prompt)
             
             return {
                 'success': True,
                 'mitigation_plan': mitigation,
                 'total_tokens': token_info['total_tokens'],
-                'cost': token_info['cost']
+                'cost': token_info['cost'],
+                'prompt_tokens_saved': saved
             }
             
         except Exception as e:
-            return {
-                'success': False,
-                'error': str(e)
-            } 
+            return self._error_result(e) 
+
+    def _stream_events(self, system_prompt: str, user_prompt: str) -> Iterator[Tuple[str, Any]]:
+        """Eventos de _stream_llm; un error se emite como ('error', resultado fallido)"""
+        try:
+            yield from self._stream_llm(system_prompt, user_prompt)
+        except Exception as e:
+            yield 'error', self._error_result(e)
+
+    def generate_description_stream(self, title: str) -> Iterator[Tuple[str, Any]]:
+        """
+        Versión streaming de generate_description
+        
+        Args:
+            title: Título de la tarea
+            
+        Yields:
+            Tuple[str, Any]: ('delta', texto), ('done', estadísticas) o ('error', resultado)
+        """
+        return self._stream_events(
+            DESCRIPTION_SYSTEM_PROMPT,
+            f"Genera una descripción para la tarea: {title}"
+        )
+
+    def generate_mitigation_stream(self, title: str, description: str = '', category: str = '',
+                                   risk_analysis: str = '') -> Iterator[Tuple[str, Any]]:
+        """
+        Versión streaming de generate_mitigation
+        
+        Args:
+            title: Título de la tarea
+            description: Descripción de la tarea (opcional)
+            category: Categoría de la tarea (opcional)
+            risk_analysis: Análisis de riesgos (opcional)
+            
+        Yields:
+            Tuple[str, Any]: ('delta', texto), ('done', estadísticas) o ('error', resultado)
+        """
+        user_prompt, _ = self._mitigation_prompt(title, description, category, risk_analysis)
+        return self._stream_events(MITIGATION_SYSTEM_PROMPT, user_prompt)
 
     def generate_user_story(self, prompt: str) -> dict:
         """Genera una historia de usuario en español usando Azure OpenAI y devuelve un dict."""
-        system_prompt = (
-            "Eres un experto en gestión ágil de proyectos. Genera una historia de usuario en formato JSON con los campos: project, role, goal, reason, description, priority (baja, media, alta, bloqueante), story_points (1-8), effort_hours (decimal). Responde solo el JSON, sin explicaciones."
-        )
-        response_text, _ = self._call_llm(system_prompt, prompt)
-        import json
-        try:
-            return json.loads(response_text)
-        except Exception:
-            # Si la respuesta no es JSON válido, intentar extraer el bloque JSON
-            import re
-            match = re.search(r'\{[\s\S]*\}', response_text)
-            if match:
-                return json.loads(match.group(0))
-            raise ValueError(f"Respuesta de IA no es JSON válido: {response_text}")
+        response_text, _ = self._call_llm(USER_STORY_SYSTEM_PROMPT, prompt)
+        return parse_user_story_response(response_text)
 
     def generate_tasks(self, prompt: str) -> list:
         """Genera una lista de tareas en español usando Azure OpenAI y devuelve una lista de dicts."""
-        system_prompt = (
-            "Eres un experto en gestión de un laboratorio de control de calidad para la industria farmacéutica. "
-            "Genera exactamente 5 tareas en formato JSON para una historia de usuario. "
-            "Cada tarea debe tener un título concreto de máximo 30 palabras y una descripción de máximo 100 palabras. "
-            "El formato debe ser: [{\"title\": \"Título de la tarea\", \"description\": \"Descripción de la tarea\"}, ...]. "
-            "Responde solo el JSON, sin explicaciones."
-        )
-        response_text, _ = self._call_llm(system_prompt, prompt)
-        import json
-        try:
-            tasks = json.loads(response_text)
-            # Asegurar que devolvemos una lista
-            if isinstance(tasks, list):
-                return tasks
-            else:
-                # Si no es una lista, intentar convertir
-                return [tasks] if isinstance(tasks, dict) else []
-        except Exception as e:
-            print(f"Error parsing JSON response: {e}")
-            print(f"Response text: {response_text}")
-            # Si la respuesta no es JSON válido, intentar extraer el bloque JSON
-            import re
-            match = re.search(r'\[[\s\S]*\]', response_text)
-            if match:
-                try:
-                    return json.loads(match.group(0))
-                except:
-                    pass
-            # Fallback: crear tareas básicas
-            return [
-                {"title": "Tarea 1", "description": "Descripción de la tarea 1"},
-                {"title": "Tarea 2", "description": "Descripción de la tarea 2"},
-                {"title": "Tarea 3", "description": "Descripción de la tarea 3"},
-                {"title": "Tarea 4", "description": "Descripción de la tarea 4"},
-                {"title": "Tarea 5", "description": "Descripción de la tarea 5"}
-            ] 
\ No newline at end of file
+        response_text, _ = self._call_llm(TASKS_SYSTEM_PROMPT, prompt)
+        return parse_tasks_response(response_text)
+
+
+_shared_service = None
+_shared_service_lock = threading.Lock()
+
+
+def get_ai_service() -> AIService:
+    """
+    Instancia de AIService compartida por el proceso
+    
+    Evita recargar el entorno en cada petición; si la
+    inicialización falla se vuelve a intentar en la siguiente llamada.
+    """
+    global _shared_service
+    with _shared_service_lock:
+        if _shared_service is None:
+            _shared_service = AIService()
+        return _shared_service
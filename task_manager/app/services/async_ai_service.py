@@ -0,0 +1,320 @@
+"""
+Variante asíncrona de AIService sobre ``AsyncAzureOpenAI``.
+
+Con AIService cada llamada al LLM ocupa un hilo del servidor WSGI durante
+segundos. Aquí las llamadas son corrutinas: mientras una completion está en
+curso el bucle de eventos atiende otras, de modo que un solo proceso puede
+enriquecer muchas tareas a la vez. En el modo 'parallel' de process_task las
+etapas independientes se lanzan con ``asyncio.gather``.
+
+La caché, el limitador, los reintentos y el circuit breaker son los mismos
+objetos compartidos por el proceso que usa AIService, así que los
+presupuestos de Azure se respetan entre ambas variantes.
+
+Uso:
+    async with AsyncAIService() as service:
+        task = await service.process_task({'title': '...'}, mode='parallel')
+
+El cliente HTTP asíncrono queda ligado al bucle de eventos en que se usa por
+primera vez: conviene una instancia por bucle y cerrarla con ``aclose()``.
+"""
+import asyncio
+import json
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from app.services.ai_service import (
+    AIService,
+    CATEGORY_SYSTEM_PROMPT,
+    DESCRIPTION_SYSTEM_PROMPT,
+    EFFORT_SYSTEM_PROMPT,
+    ENRICH_DESCRIPTION_SYSTEM_PROMPT,
+    ENRICH_MITIGATION_SYSTEM_PROMPT,
+    ENRICH_MITIGATION_USER_PROMPT,
+    MITIGATION_SYSTEM_PROMPT,
+    ONE_SHOT_SYSTEM_PROMPT,
+    RISKS_SYSTEM_PROMPT,
+    TASKS_SYSTEM_PROMPT,
+    parse_tasks_response,
+    validate_enrichment,
+)
+from app.services.circuit_breaker import CircuitOpenError
+from app.services.llm_retry import is_retryable
+from app.services.openai_client import create_async_openai_client
+from app.services.rate_limiter import RateLimitExceeded
+
+
+class AsyncAIService(AIService):
+    """
+    AIService con los métodos públicos como corrutinas
+
+    generate_description, categorize_task, estimate_effort, analyze_risks,
+    generate_mitigation, process_task y generate_tasks devuelven lo mismo que
+    en AIService. El resto de métodos heredados siguen siendo síncronos.
+    """
+
+    def __init__(self):
+        super().__init__()
+        # Cliente asíncrono propio (se crea en la primera llamada)
+        self.async_client = None
+
+    async def __aenter__(self) -> 'AsyncAIService':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Cierra el pool de conexiones del cliente asíncrono"""
+        if self.async_client is not None:
+            await self.async_client.close()
+            self.async_client = None
+
+    def _async_client(self):
+        """Cliente asíncrono de Azure OpenAI de esta instancia"""
+        if self.async_client is None:
+            self.async_client = create_async_openai_client()
+        return self.async_client
+
+    async def _call_llm_async(self, system_prompt: str, user_prompt: str,
+                              json_mode: bool = False) -> Tuple[str, Dict[str, Any]]:
+        """
+        Versión asíncrona de _call_llm: misma caché, breaker, limitador y reintentos
+
+        Args:
+            system_prompt: Prompt de sistema
+            user_prompt: Prompt de usuario
+            json_mode: Solicitar un objeto JSON (response_format json_object)
+        """
+        if self.is_testing:
+            return self._mock_llm_response(system_prompt, user_prompt)
+
+        prompt_tokens, max_tokens = self._output_budget(system_prompt, user_prompt)
+        key = self._cache_key(system_prompt, user_prompt, json_mode, max_tokens)
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return self._cached_result(*cached)
+
+        self.circuit_breaker.before_call()
+        estimated_tokens = prompt_tokens + max_tokens
+        try:
+            content, stats = await self.retry_policy.call_async(
+                lambda timeout: self._limited_completion_async(
+                    system_prompt, user_prompt, json_mode, estimated_tokens, timeout, max_tokens
+                )
+            )
+        except RateLimitExceeded:
+            # Rechazo local: no se llegó a probar la dependencia
+            self.circuit_breaker.release()
+            raise
+        except asyncio.CancelledError:
+            # Llamada cancelada por quien espera: no dice nada de la dependencia
+            self.circuit_breaker.release()
+            raise
+        except Exception as e:
+            self.circuit_breaker.record(not is_retryable(e))
+            raise self._api_error(e) from e
+        self.circuit_breaker.record(True)
+        if key is not None:
+            self.cache.set(key, content, stats)
+        return content, stats
+
+    async def _limited_completion_async(self, system_prompt: str, user_prompt: str, json_mode: bool,
+                                        estimated_tokens: int, timeout: float,
+                                        max_tokens: Optional[int] = None) -> Tuple[str, Dict[str, Any]]:
+        """Un intento de llamada: reserva presupuesto sin bloquear el bucle y envía la petición"""
+        started = time.monotonic()
+        async with self.rate_limiter.acquire_async(estimated_tokens, timeout) as record_usage:
+            # La espera en cola consume parte del plazo de la llamada
+            timeout = max(0.0, timeout - (time.monotonic() - started))
+            response = await self._async_client().chat.completions.create(
+                model=self.deployment_name,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                temperature=self.temperature,
+                max_tokens=max_tokens or self.max_tokens,
+                top_p=self.top_p,
+                frequency_penalty=self.frequency_penalty,
+                presence_penalty=self.presence_penalty,
+                stop=None,
+                timeout=timeout,
+                **({'response_format': {'type': 'json_object'}} if json_mode else {})
+            )
+            content, stats = self._completion_result(response)
+            record_usage(stats['total_tokens'])
+        return content, stats
+
+    async def _run_stages_async(self, stages: Dict[str, Tuple[str, str]],
+                                mode: str) -> Dict[str, Tuple[str, Dict[str, Any]]]:
+        """Ejecuta etapas independientes, en orden o a la vez con asyncio.gather"""
+        if mode == 'sequential':
+            return {name: await self._call_llm_async(*prompts) for name, prompts in stages.items()}
+
+        # gather propaga la primera excepción de cualquier etapa
+        results = await asyncio.gather(*(self._call_llm_async(*prompts) for prompts in stages.values()))
+        return dict(zip(stages, results))
+
+    async def _one_shot_enrichment_async(self, title: str) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+        """Versión asíncrona de _one_shot_enrichment"""
+        response_text, info = await self._call_llm_async(ONE_SHOT_SYSTEM_PROMPT, f"Tarea: {title}", json_mode=True)
+        try:
+            return validate_enrichment(json.loads(response_text)), info
+        except (ValueError, TypeError) as e:
+            print(f"⚠️ Respuesta JSON de enriquecimiento no válida, se usa el modo por etapas: {e}")
+            return None, info
+
+    async def process_task(self, task_data: Dict[str, Any], mode: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Procesa una tarea completa con todas las funcionalidades de IA
+
+        Mismas etapas y modos que AIService.process_task; en modo 'parallel'
+        categoría, esfuerzo y riesgos se esperan a la vez sin ocupar hilos.
+
+        Args:
+            task_data: Diccionario con los datos de la tarea
+            mode: 'sequential', 'parallel' o 'one_shot' (por defecto AI_ENRICHMENT_MODE)
+
+        Returns:
+            Dict[str, Any]: Datos de la tarea procesados
+        """
+        mode = self._enrichment_mode(mode)
+
+        try:
+            title = task_data.get('title', '')
+            ai_processing = {}
+
+            if mode == 'one_shot':
+                fields, one_shot_info = await self._one_shot_enrichment_async(title)
+                ai_processing['one_shot'] = one_shot_info
+                if fields is not None:
+                    task_data.update({
+                        'description': fields['description'],
+                        'category': self._map_category(fields['category']),
+                        'effort': fields['effort'],
+                        'risk_analysis': fields['risk_analysis'],
+                        'risk_mitigation': fields['mitigation']
+                    })
+                    return self._with_accounting(task_data, ai_processing)
+                mode = 'parallel'
+
+            description, ai_processing['description'] = await self._call_llm_async(
+                ENRICH_DESCRIPTION_SYSTEM_PROMPT,
+                f"Genera una descripción para la tarea: {title}"
+            )
+
+            stages, saved = self._enrichment_stages(title, description)
+            results = await self._run_stages_async(stages, mode)
+            category, ai_processing['categorization'] = results['categorization']
+            effort, ai_processing['effort_estimation'] = results['effort_estimation']
+            risks, ai_processing['risk_analysis'] = results['risk_analysis']
+
+            mitigation_prompt, saved['mitigation'] = self._fit_prompt(
+                'mitigation', ENRICH_MITIGATION_USER_PROMPT, ('description', 'risks'),
+                title=title, description=description, risks=risks
+            )
+            mitigation, ai_processing['mitigation'] = await self._call_llm_async(
+                ENRICH_MITIGATION_SYSTEM_PROMPT, mitigation_prompt
+            )
+            self._record_savings(ai_processing, saved)
+
+            task_data.update({
+                'description': description,
+                'category': self._map_category(category),
+                'effort': int(effort) if effort.isdigit() else 0,
+                'risk_analysis': risks,
+                'risk_mitigation': mitigation
+            })
+            return self._with_accounting(task_data, ai_processing)
+
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            raise Exception(f"Error al procesar la tarea: {str(e)}")
+
+    async def generate_description(self, title: str) -> Dict[str, Any]:
+        """Versión asíncrona de AIService.generate_description"""
+        try:
+            description, token_info = await self._call_llm_async(
+                DESCRIPTION_SYSTEM_PROMPT,
+                f"Genera una descripción para la tarea: {title}"
+            )
+            return {
+                'success': True,
+                'description': description,
+                'total_tokens': token_info['total_tokens'],
+                'cost': token_info['cost']
+            }
+        except Exception as e:
+            return self._error_result(e)
+
+    async def categorize_task(self, title: str, description: str = '') -> Dict[str, Any]:
+        """Versión asíncrona de AIService.categorize_task"""
+        try:
+            category, token_info = await self._call_llm_async(
+                CATEGORY_SYSTEM_PROMPT,
+                f"Categoriza la tarea: {title} - {description}"
+            )
+            return {
+                'success': True,
+                'category': self._category_from_display_name(category),
+                'total_tokens': token_info['total_tokens'],
+                'cost': token_info['cost']
+            }
+        except Exception as e:
+            return self._error_result(e)
+
+    async def estimate_effort(self, title: str, description: str = '', category: str = '') -> Dict[str, Any]:
+        """Versión asíncrona de AIService.estimate_effort"""
+        try:
+            effort, token_info = await self._call_llm_async(
+                EFFORT_SYSTEM_PROMPT,
+                f"Estima las horas para: {title} - {description} - {category}"
+            )
+            return {
+                'success': True,
+                'effort': self._parse_effort(effort),
+                'total_tokens': token_info['total_tokens'],
+                'cost': token_info['cost']
+            }
+        except Exception as e:
+            return self._error_result(e)
+
+    async def analyze_risks(self, title: str, description: str = '', category: str = '') -> Dict[str, Any]:
+        """Versión asíncrona de AIService.analyze_risks"""
+        try:
+            risks, token_info = await self._call_llm_async(
+                RISKS_SYSTEM_PROMPT,
+                f"Analiza los riesgos de: {title} - {description} - {category}"
+            )
+            return {
+                'success': True,
+                'risk_analysis': risks,
+                'total_tokens': token_info['total_tokens'],
+                'cost': token_info['cost']
+            }
+        except Exception as e:
+            return self._error_result(e)
+
+    async def generate_mitigation(self, title: str, description: str = '', category: str = '',
+                                  risk_analysis: str = '') -> Dict[str, Any]:
+        """Versión asíncrona de AIService.generate_mitigation"""
+        try:
+            user_prompt, saved = self._mitigation_prompt(title, description, category, risk_analysis)
+            mitigation, token_info = await self._call_llm_async(MITIGATION_SYSTEM_PROMPT, user_prompt)
+            return {
+                'success': True,
+                'mitigation_plan': mitigation,
+                'total_tokens': token_info['total_tokens'],
+                'cost': token_info['cost'],
+                'prompt_tokens_saved': saved
+            }
+        except Exception as e:
+            return self._error_result(e)
+
+    async def generate_tasks(self, prompt: str) -> list:
+        """Versión asíncrona de AIService.generate_tasks"""
+        response_text, _ = await self._call_llm_async(TASKS_SYSTEM_PROMPT, prompt)
+        return parse_tasks_response(response_text)
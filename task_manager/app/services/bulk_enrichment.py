@@ -0,0 +1,305 @@
+"""
+Enriquecimiento masivo de las tareas pendientes.
+
+Para cientos de tareas importadas, una petición ``POST /tasks/<id>/enrich``
+por tarea es inviable. Este pipeline recorre las tareas sin enriquecer (ver
+TaskManager.get_tasks_pending_enrichment) en tres etapas conectadas por colas
+acotadas:
+
+    lectura      Páginas de tareas pendientes por orden de ID
+    IA           ``concurrency`` corrutinas de AsyncAIService.process_task
+    escritura    Lotes de ``batch_size`` tareas en una sola transacción
+
+El progreso se guarda en un checkpoint JSON tras cada lote. Las tareas ya
+escritas dejan de estar pendientes, así que al reanudar solo se procesan las
+que faltan; las que fallaron se saltan salvo que se empiece de cero. Si el
+circuito de Azure OpenAI se abre la ejecución se interrumpe y se puede
+reanudar más tarde.
+
+    BULK_ENRICHMENT_CONCURRENCY     Tareas en proceso a la vez
+    BULK_ENRICHMENT_BATCH_SIZE      Tareas por escritura en base de datos
+    BULK_ENRICHMENT_CHECKPOINT      Archivo del checkpoint
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from app.services.ai_service import ENRICHMENT_MODES
+from app.services.async_ai_service import AsyncAIService
+from app.services.circuit_breaker import CircuitOpenError
+from app.services.enrichment_jobs import enriched_task_fields
+from app.utils.task_manager import TaskManager
+
+CONCURRENCY = int(os.getenv('BULK_ENRICHMENT_CONCURRENCY', '8'))
+BATCH_SIZE = int(os.getenv('BULK_ENRICHMENT_BATCH_SIZE', '20'))
+CHECKPOINT_PATH = os.getenv(
+    'BULK_ENRICHMENT_CHECKPOINT',
+    str(Path(__file__).parent.parent.parent / 'data' / 'bulk_enrichment_checkpoint.json')
+)
+
+# Tareas leídas por consulta
+FETCH_PAGE_SIZE = 100
+
+RUNNING = 'running'
+COMPLETED = 'completed'
+INTERRUPTED = 'interrupted'
+
+
+class BulkEnrichment:
+    """Una ejecución del pipeline de enriquecimiento masivo"""
+
+    def __init__(self, concurrency: int = CONCURRENCY, batch_size: int = BATCH_SIZE,
+                 limit: Optional[int] = None, mode: Optional[str] = None,
+                 checkpoint_path: str = CHECKPOINT_PATH, task_manager: Optional[TaskManager] = None,
+                 on_progress: Optional[Callable[[Dict[str, Any]], None]] = None):
+        """
+        Args:
+            concurrency: Tareas en proceso a la vez
+            batch_size: Tareas por escritura en base de datos
+            limit: Máximo de tareas de esta ejecución (None = todas)
+            mode: Modo de process_task (por defecto AI_ENRICHMENT_MODE)
+            checkpoint_path: Archivo del checkpoint
+            task_manager: Gestor de tareas (por defecto uno nuevo)
+            on_progress: Función llamada con progress() tras cada lote
+
+        Raises:
+            ValueError: Si el modo no es uno de ENRICHMENT_MODES
+        """
+        # Un modo inválido haría fallar cada tarea y las dejaría marcadas en el checkpoint
+        if mode is not None and mode.lower() not in ENRICHMENT_MODES:
+            raise ValueError(f"Modo de enriquecimiento no válido: {mode}")
+        self.concurrency = max(1, concurrency)
+        self.batch_size = max(1, batch_size)
+        self.limit = limit
+        self.mode = mode
+        self.checkpoint_path = Path(checkpoint_path)
+        self.task_manager = task_manager or TaskManager()
+        self.on_progress = on_progress
+        self._lock = threading.Lock()
+        self._batch: Dict[int, Dict[str, Any]] = {}
+        self._reset_state()
+
+    def _reset_state(self) -> None:
+        self.status = RUNNING
+        self.error = None
+        self.succeeded = 0
+        self.failed: Dict[str, str] = {}
+        self.total_tokens = 0
+        self.cost = 0.0
+        # Segundos de ejecuciones anteriores (al reanudar) y comienzo de la actual
+        self._previous_seconds = 0.0
+        self._started = time.monotonic()
+
+    def _load_checkpoint(self, reset: bool) -> None:
+        self._reset_state()
+        if reset or not self.checkpoint_path.exists():
+            return
+        try:
+            data = json.loads(self.checkpoint_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Checkpoint de enriquecimiento ilegible, se empieza de cero: {e}")
+            return
+        if data.get('status') == COMPLETED:
+            return
+        self.succeeded = data.get('succeeded', 0)
+        self.failed = data.get('failed', {})
+        self.total_tokens = data.get('total_tokens', 0)
+        self.cost = data.get('cost', 0.0)
+        self._previous_seconds = data.get('elapsed_seconds', 0.0)
+
+    def _save_checkpoint(self) -> None:
+        self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.checkpoint_path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(self.progress(), ensure_ascii=False, indent=2), encoding='utf-8')
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def progress(self) -> Dict[str, Any]:
+        """Estado de la ejecución con el rendimiento acumulado (tareas y tokens por minuto)"""
+        with self._lock:
+            elapsed = self._previous_seconds + (time.monotonic() - self._started)
+            minutes = elapsed / 60 if elapsed > 0 else 0
+            return {
+                'status': self.status,
+                'error': self.error,
+                'succeeded': self.succeeded,
+                'failed': dict(self.failed),
+                'pending_write': len(self._batch),
+                'total_tokens': self.total_tokens,
+                'cost': round(self.cost, 6),
+                'elapsed_seconds': round(elapsed, 2),
+                'tasks_per_minute': round(self.succeeded / minutes, 2) if minutes else 0.0,
+                'tokens_per_minute': round(self.total_tokens / minutes, 2) if minutes else 0.0,
+                'concurrency': self.concurrency,
+                'batch_size': self.batch_size
+            }
+
+    def run(self, reset: bool = False) -> Dict[str, Any]:
+        """
+        Ejecuta el pipeline hasta agotar las tareas pendientes
+
+        Args:
+            reset: Ignorar el checkpoint anterior (también reintenta las tareas fallidas)
+
+        Returns:
+            Dict[str, Any]: progress() final
+        """
+        return asyncio.run(self.run_async(reset))
+
+    async def run_async(self, reset: bool = False) -> Dict[str, Any]:
+        """Versión corrutina de run()"""
+        self._load_checkpoint(reset)
+        pending = asyncio.Queue(maxsize=self.concurrency * 2)
+        results = asyncio.Queue(maxsize=self.batch_size * 2)
+        async with AsyncAIService() as service:
+            stages = [asyncio.ensure_future(self._fetch(pending)), asyncio.ensure_future(self._write(results))]
+            stages.extend(asyncio.ensure_future(self._enrich(service, pending, results))
+                          for _ in range(self.concurrency))
+            try:
+                # gather propaga el primer error de cualquier etapa
+                await asyncio.gather(*stages)
+                self.status = COMPLETED
+            except CircuitOpenError as e:
+                self.status = INTERRUPTED
+                self.error = str(e)
+                print(f"⚠️ Enriquecimiento masivo interrumpido: {e}")
+            finally:
+                for stage in stages:
+                    stage.cancel()
+                await asyncio.gather(*stages, return_exceptions=True)
+                # Lo que ya respondió la IA no se pierde al interrumpir
+                while not results.empty():
+                    self._collect(results.get_nowait())
+                await self._flush()
+        return self.progress()
+
+    async def _fetch(self, pending: asyncio.Queue) -> None:
+        """Etapa de lectura: encola las tareas pendientes por páginas de ID y un centinela por worker"""
+        after_id = 0
+        queued = 0
+        while self.limit is None or queued < self.limit:
+            page = await asyncio.to_thread(
+                self.task_manager.get_tasks_pending_enrichment, after_id, FETCH_PAGE_SIZE
+            )
+            if not page:
+                break
+            ids = [task.get('id') for task in page if task.get('id') is not None]
+            if not ids:
+                break
+            for task in page:
+                if self.limit is not None and queued >= self.limit:
+                    break
+                if task.get('id') is None or str(task['id']) in self.failed:
+                    continue
+                await pending.put(task)
+                queued += 1
+            after_id = max(ids)
+        for _ in range(self.concurrency):
+            await pending.put(None)
+
+    async def _enrich(self, service: AsyncAIService, pending: asyncio.Queue, results: asyncio.Queue) -> None:
+        """Etapa de IA: enriquece tareas hasta recibir el centinela None, que reenvía a la escritura"""
+        while True:
+            task = await pending.get()
+            if task is None:
+                await results.put(None)
+                return
+            try:
+                enriched = await service.process_task(
+                    {'title': task['title'], 'description': task['description']}, mode=self.mode
+                )
+            except CircuitOpenError:
+                raise
+            except Exception as e:
+                await results.put((task.get('id'), None, str(e)))
+            else:
+                await results.put((task.get('id'), enriched, None))
+
+    async def _write(self, results: asyncio.Queue) -> None:
+        """Etapa de escritura: agrupa los resultados y los guarda por lotes hasta que terminan los workers"""
+        finished_workers = 0
+        while finished_workers < self.concurrency:
+            item = await results.get()
+            if item is None:
+                finished_workers += 1
+                continue
+            if self._collect(item) >= self.batch_size:
+                await self._flush()
+
+    def _collect(self, item: Optional[tuple]) -> int:
+        """Añade un resultado al lote (o a los fallos) y devuelve el tamaño del lote"""
+        with self._lock:
+            if item is not None:
+                task_id, enriched, error = item
+                if error is not None:
+                    self.failed[str(task_id)] = error
+                else:
+                    self._batch[task_id] = enriched
+            return len(self._batch)
+
+    async def _flush(self) -> None:
+        """Escribe el lote acumulado en una transacción y guarda el checkpoint"""
+        with self._lock:
+            batch = dict(self._batch)
+        if batch:
+            updates = {task_id: enriched_task_fields(enriched) for task_id, enriched in batch.items()}
+            await asyncio.to_thread(self.task_manager.update_tasks_bulk, updates)
+            # El lote sale de memoria solo cuando está escrito (la escritura es idempotente)
+            with self._lock:
+                for task_id in batch:
+                    del self._batch[task_id]
+                self.succeeded += len(batch)
+                self.total_tokens += sum(enriched.get('tokens_gastados', 0) for enriched in batch.values())
+                self.cost += sum(enriched.get('costos', 0.0) for enriched in batch.values())
+        self._save_checkpoint()
+        if self.on_progress is not None:
+            self.on_progress(self.progress())
+
+
+_current_run: Optional[BulkEnrichment] = None
+_run_lock = threading.Lock()
+
+
+def start_bulk_enrichment(**options: Any) -> Optional[Dict[str, Any]]:
+    """
+    Lanza una ejecución en un hilo de fondo
+
+    Args:
+        **options: reset y los argumentos de BulkEnrichment
+
+    Returns:
+        Optional[Dict[str, Any]]: progress() inicial o None si ya hay una ejecución en curso
+    """
+    global _current_run
+    reset = options.pop('reset', False)
+    with _run_lock:
+        if _current_run is not None and _current_run.status == RUNNING:
+            return None
+        _current_run = BulkEnrichment(**options)
+        run = _current_run
+
+    def target():
+        try:
+            run.run(reset=reset)
+        except Exception as e:
+            run.status = INTERRUPTED
+            run.error = str(e)
+            print(f"❌ Error en el enriquecimiento masivo: {e}")
+
+    threading.Thread(target=target, name='bulk-enrichment', daemon=True).start()
+    return run.progress()
+
+
+def bulk_enrichment_status() -> Optional[Dict[str, Any]]:
+    """progress() de la ejecución de este proceso o, si no hay, el último checkpoint"""
+    with _run_lock:
+        run = _current_run
+    if run is not None:
+        return run.progress()
+    path = Path(CHECKPOINT_PATH)
+    if path.exists():
+        return json.loads(path.read_text(encoding='utf-8'))
+    return None
@@ -0,0 +1,159 @@
+"""
+Circuit breaker para la dependencia de Azure OpenAI.
+
+Cuando el deployment está degradado, cada petición de IA esperaría el plazo
+completo y ocuparía un worker que necesitan las rutas CRUD. El breaker lleva
+la cuenta de los resultados recientes y deja de llamar mientras la tasa de
+fallos es alta:
+
+    closed     Las llamadas pasan; se registran en una ventana deslizante
+    open       Las llamadas fallan al instante con CircuitOpenError (HTTP 503)
+    half_open  Pasado el tiempo de apertura se deja pasar una llamada de
+               prueba: si va bien se cierra, si falla se vuelve a abrir
+
+    AI_BREAKER_WINDOW_SECONDS   Ventana de resultados considerada
+    AI_BREAKER_MIN_CALLS        Llamadas mínimas en la ventana para evaluar
+    AI_BREAKER_FAILURE_RATE     Tasa de fallos (0-1) que abre el circuito
+    AI_BREAKER_OPEN_SECONDS     Tiempo abierto antes de la llamada de prueba
+
+Solo cuentan como fallos los errores transitorios de la dependencia
+(timeouts, conexión, 429, 5xx), no los errores de la propia petición.
+"""
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict
+
+WINDOW_SECONDS = float(os.getenv('AI_BREAKER_WINDOW_SECONDS', '60'))
+MIN_CALLS = int(os.getenv('AI_BREAKER_MIN_CALLS', '5'))
+FAILURE_RATE = float(os.getenv('AI_BREAKER_FAILURE_RATE', '0.5'))
+OPEN_SECONDS = float(os.getenv('AI_BREAKER_OPEN_SECONDS', '30'))
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """El circuito está abierto: la llamada se rechaza sin contactar con Azure"""
+
+
+class CircuitBreaker:
+    """Breaker con ventana de tasa de fallos y estado semiabierto de prueba"""
+
+    def __init__(self, window_seconds: float = WINDOW_SECONDS, min_calls: int = MIN_CALLS,
+                 failure_rate: float = FAILURE_RATE, open_seconds: float = OPEN_SECONDS):
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.open_seconds = open_seconds
+        self._lock = threading.Lock()
+        # Resultados recientes: (instante, éxito)
+        self._results = deque()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.rejected = 0
+        self.times_opened = 0
+
+    def _trim(self, now: float) -> None:
+        while self._results and now - self._results[0][0] > self.window_seconds:
+            self._results.popleft()
+
+    def _open(self, now: float) -> None:
+        self._state = OPEN
+        self._opened_at = now
+        self._probe_in_flight = False
+        self.times_opened += 1
+        print(f"⚠️ Circuito de Azure OpenAI abierto durante {self.open_seconds:.0f}s")
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                self._state = HALF_OPEN
+            return self._state
+
+    def before_call(self) -> None:
+        """
+        Autoriza una llamada o la rechaza de inmediato
+
+        Raises:
+            CircuitOpenError: Si el circuito está abierto o ya hay una llamada de prueba en curso
+        """
+        state = self.state
+        with self._lock:
+            if state == CLOSED:
+                return
+            if state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            self.rejected += 1
+            retry_in = max(0.0, self.open_seconds - (time.monotonic() - self._opened_at))
+        raise CircuitOpenError(
+            f"Servicio de IA no disponible temporalmente. Intente nuevamente en {retry_in:.0f} segundos."
+        )
+
+    def record(self, success: bool) -> None:
+        """Registra el resultado de una llamada autorizada"""
+        with self._lock:
+            now = time.monotonic()
+            if self._state == HALF_OPEN:
+                self._probe_in_flight = False
+                if success:
+                    self._state = CLOSED
+                    self._results.clear()
+                    print("✅ Circuito de Azure OpenAI cerrado")
+                else:
+                    self._open(now)
+                return
+            if self._state == OPEN:
+                return
+            self._results.append((now, success))
+            self._trim(now)
+            failures = sum(1 for _, ok in self._results if not ok)
+            if len(self._results) >= self.min_calls and failures / len(self._results) >= self.failure_rate:
+                self._open(now)
+
+    def release(self) -> None:
+        """
+        Libera una llamada autorizada sin registrar resultado
+
+        Para las llamadas que no llegaron a probar la dependencia (rechazo del
+        limitador local, cliente desconectado, cancelación): en semiabierto
+        deja libre el hueco de prueba sin cerrar ni reabrir el circuito.
+        """
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probe_in_flight = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Estado del breaker para el endpoint de salud"""
+        state = self.state
+        with self._lock:
+            self._trim(time.monotonic())
+            calls = len(self._results)
+            failures = sum(1 for _, ok in self._results if not ok)
+            return {
+                'state': state,
+                'window_calls': calls,
+                'window_failures': failures,
+                'failure_rate': round(failures / calls, 4) if calls else 0.0,
+                'failure_rate_threshold': self.failure_rate,
+                'times_opened': self.times_opened,
+                'rejected': self.rejected
+            }
+
+
+_breaker = None
+_breaker_lock = threading.Lock()
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    """Breaker compartido por todas las instancias de AIService del proceso"""
+    global _breaker
+    with _breaker_lock:
+        if _breaker is None:
+            _breaker = CircuitBreaker()
+        return _breaker
@@ -0,0 +1,380 @@
+"""
+Cola de trabajos de enriquecimiento con IA.
+
+``POST /tasks/<id>/enrich`` ya no ejecuta las cinco llamadas de process_task
+dentro de la petición HTTP: encola un trabajo y responde 202 con su id. Un
+pool de hilos del proceso toma los trabajos de la cola, enriquece la tarea y
+guarda el resultado; el cliente consulta el estado en
+``GET /tasks/enrich-jobs/<job_id>``.
+
+La cola es una tabla SQLite, de modo que sobrevive a reinicios y la comparten
+los workers de gunicorn: cada trabajo lo reclama un solo hilo con una
+transacción ``BEGIN IMMEDIATE``. Las sesiones de base de datos solo se abren
+para leer la tarea y para escribir el resultado, nunca durante las llamadas
+al LLM.
+
+    ENRICHMENT_JOBS_PATH        Archivo SQLite de la cola
+    ENRICHMENT_WORKERS          Hilos que procesan trabajos en cada proceso
+    ENRICHMENT_MAX_ATTEMPTS     Intentos de un trabajo si el circuito de IA está abierto
+    ENRICHMENT_JOB_TIMEOUT      Segundos tras los que un trabajo en curso se da por perdido
+
+Estados de un trabajo: queued -> running -> done | failed.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from app.services.ai_service import get_ai_service
+from app.services.circuit_breaker import CircuitOpenError, get_circuit_breaker
+from app.utils.task_manager import TaskManager
+
+JOBS_PATH = os.getenv(
+    'ENRICHMENT_JOBS_PATH',
+    str(Path(__file__).parent.parent.parent / 'data' / 'enrichment_jobs.sqlite3')
+)
+WORKERS = int(os.getenv('ENRICHMENT_WORKERS', '2'))
+MAX_ATTEMPTS = int(os.getenv('ENRICHMENT_MAX_ATTEMPTS', '3'))
+JOB_TIMEOUT = float(os.getenv('ENRICHMENT_JOB_TIMEOUT', '600'))
+
+# Segundos entre consultas a la cola cuando está vacía
+POLL_INTERVAL = 2.0
+
+# Segundos entre revisiones de trabajos en curso perdidos
+REQUEUE_INTERVAL = 60.0
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+JOB_COLUMNS = ('id', 'task_id', 'status', 'attempts', 'result', 'error',
+               'created_at', 'available_at', 'started_at', 'finished_at')
+
+
+class JobQueue:
+    """Cola persistente de trabajos de enriquecimiento en un archivo SQLite"""
+
+    def __init__(self, path: str = JOBS_PATH):
+        self.path = str(path)
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS enrichment_jobs ('
+                'id TEXT PRIMARY KEY, task_id INTEGER NOT NULL, status TEXT NOT NULL, '
+                'attempts INTEGER NOT NULL DEFAULT 0, result TEXT, error TEXT, '
+                'created_at REAL NOT NULL, available_at REAL NOT NULL, '
+                'started_at REAL, finished_at REAL)'
+            )
+            conn.execute(
+                'CREATE INDEX IF NOT EXISTS ix_enrichment_jobs_status '
+                'ON enrichment_jobs (status, available_at)'
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Conexión de una operación: confirma o revierte la transacción y se cierra al salir"""
+        # Una conexión por operación: sqlite3 no comparte conexiones entre hilos
+        with closing(sqlite3.connect(self.path, timeout=10)) as conn, conn:
+            yield conn
+
+    def _row_to_job(self, row: Optional[tuple]) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        job = dict(zip(JOB_COLUMNS, row))
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+
+    def enqueue(self, task_id: int) -> Dict[str, Any]:
+        """
+        Encola el enriquecimiento de una tarea
+
+        Si la tarea ya tiene un trabajo pendiente o en curso se devuelve ese
+        trabajo en lugar de crear otro.
+
+        Args:
+            task_id: ID de la tarea
+
+        Returns:
+            Dict[str, Any]: El trabajo
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute(
+                f'SELECT {", ".join(JOB_COLUMNS)} FROM enrichment_jobs '
+                'WHERE task_id = ? AND status IN (?, ?) ORDER BY created_at LIMIT 1',
+                (task_id, QUEUED, RUNNING)
+            ).fetchone()
+            if row is not None:
+                return self._row_to_job(row)
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                'INSERT INTO enrichment_jobs (id, task_id, status, created_at, available_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (job_id, task_id, QUEUED, now, now)
+            )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Trabajo por su id o None si no existe"""
+        with self._connect() as conn:
+            row = conn.execute(
+                f'SELECT {", ".join(JOB_COLUMNS)} FROM enrichment_jobs WHERE id = ?', (job_id,)
+            ).fetchone()
+        return self._row_to_job(row)
+
+    def claim(self) -> Optional[Dict[str, Any]]:
+        """Reclama el trabajo pendiente más antiguo y lo marca en curso (None si no hay)"""
+        now = time.time()
+        with self._connect() as conn:
+            # Bloqueo de escritura: dos workers no pueden reclamar el mismo trabajo
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute(
+                'SELECT id FROM enrichment_jobs WHERE status = ? AND available_at <= ? '
+                'ORDER BY created_at LIMIT 1',
+                (QUEUED, now)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                'UPDATE enrichment_jobs SET status = ?, started_at = ?, attempts = attempts + 1 WHERE id = ?',
+                (RUNNING, now, row[0])
+            )
+        return self.get(row[0])
+
+    def complete(self, job_id: str, result: Dict[str, Any]) -> None:
+        """Marca el trabajo como terminado con su resultado"""
+        with self._connect() as conn:
+            conn.execute(
+                'UPDATE enrichment_jobs SET status = ?, result = ?, error = NULL, finished_at = ? WHERE id = ?',
+                (DONE, json.dumps(result, default=str), time.time(), job_id)
+            )
+
+    def fail(self, job_id: str, error: str, retry_in: Optional[float] = None) -> None:
+        """
+        Registra el fallo de un trabajo
+
+        Args:
+            job_id: ID del trabajo
+            error: Mensaje de error
+            retry_in: Segundos tras los que se vuelve a intentar (None = fallo definitivo)
+        """
+        now = time.time()
+        with self._connect() as conn:
+            if retry_in is None:
+                conn.execute(
+                    'UPDATE enrichment_jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?',
+                    (FAILED, error, now, job_id)
+                )
+            else:
+                conn.execute(
+                    'UPDATE enrichment_jobs SET status = ?, error = ?, available_at = ?, started_at = NULL '
+                    'WHERE id = ?',
+                    (QUEUED, error, now + retry_in, job_id)
+                )
+
+    def requeue_stale(self, timeout: float = JOB_TIMEOUT) -> int:
+        """Devuelve a la cola los trabajos en curso de un proceso que murió; retorna cuántos"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                'UPDATE enrichment_jobs SET status = ?, started_at = NULL WHERE status = ? AND started_at < ?',
+                (QUEUED, RUNNING, time.time() - timeout)
+            )
+            return cursor.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        """Número de trabajos por estado"""
+        with self._connect() as conn:
+            rows = conn.execute('SELECT status, COUNT(*) FROM enrichment_jobs GROUP BY status').fetchall()
+        counts = {status: 0 for status in (QUEUED, RUNNING, DONE, FAILED)}
+        counts.update(dict(rows))
+        return counts
+
+
+def enriched_task_fields(enriched: Dict[str, Any]) -> Dict[str, Any]:
+    """Columnas de la tarea a partir del resultado de AIService.process_task"""
+    fields = {
+        'description': enriched.get('description'),
+        'category': enriched.get('category'),
+        'effort': enriched.get('effort'),
+        'risk_analysis': enriched.get('risk_analysis'),
+        'mitigation_plan': enriched.get('risk_mitigation'),
+        'tokens_gastados': enriched.get('tokens_gastados'),
+        'costos': enriched.get('costos')
+    }
+    return {key: value for key, value in fields.items() if value is not None}
+
+
+def enrich_task_by_id(task_id: int) -> Dict[str, Any]:
+    """
+    Enriquece una tarea con IA y guarda el resultado
+
+    La tarea se lee y se actualiza con sesiones cortas de TaskManager; entre
+    medias no se mantiene ninguna conexión abierta.
+
+    Args:
+        task_id: ID de la tarea
+
+    Returns:
+        Dict[str, Any]: Campos de la tarea enriquecida
+
+    Raises:
+        LookupError: Si la tarea no existe
+    """
+    task_manager = TaskManager()
+    task = task_manager.get_task(task_id)
+    if task is None:
+        raise LookupError('Tarea no encontrada')
+
+    enriched = get_ai_service().process_task({
+        'title': task.title,
+        'description': task.description or ''
+    })
+
+    updated = task_manager.update_task(task_id, enriched_task_fields(enriched))
+    if updated is None:
+        raise LookupError('Tarea no encontrada')
+
+    return {
+        'id': updated.id,
+        'title': updated.title,
+        'description': updated.description,
+        'category': updated.category,
+        'effort': updated.effort,
+        'risk_analysis': updated.risk_analysis,
+        'mitigation_plan': updated.mitigation_plan,
+        'tokens_gastados': updated.tokens_gastados,
+        'costos': updated.costos
+    }
+
+
+class EnrichmentWorkerPool:
+    """Hilos que consumen la cola y ejecutan los trabajos"""
+
+    def __init__(self, queue: JobQueue, workers: int = WORKERS,
+                 run_job: Callable[[int], Dict[str, Any]] = enrich_task_by_id,
+                 max_attempts: int = MAX_ATTEMPTS, poll_interval: float = POLL_INTERVAL,
+                 job_timeout: float = JOB_TIMEOUT, requeue_interval: float = REQUEUE_INTERVAL):
+        self.queue = queue
+        self.workers = max(1, workers)
+        self.run_job = run_job
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.job_timeout = job_timeout
+        self.requeue_interval = requeue_interval
+        self._next_requeue = 0.0
+        self._requeue_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> None:
+        """Arranca los hilos (sin efecto si ya están en marcha)"""
+        if self._threads:
+            return
+        self._requeue_stale()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f'enrichment-worker-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Detiene los hilos al terminar el trabajo en curso"""
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self._stopping.clear()
+
+    def notify(self) -> None:
+        """Despierta a los hilos en espera tras encolar un trabajo"""
+        self._wakeup.set()
+
+    def _requeue_stale(self) -> None:
+        """
+        Devuelve a la cola los trabajos en curso perdidos, como mucho una vez por intervalo
+
+        Se llama al arrancar y cada vez que la cola está vacía: si el proceso
+        se reinicia antes de JOB_TIMEOUT, sus trabajos interrumpidos se
+        recuperan en cuanto vencen en lugar de quedarse en curso para siempre.
+        """
+        with self._requeue_lock:
+            now = time.monotonic()
+            if now < self._next_requeue:
+                return
+            self._next_requeue = now + self.requeue_interval
+        try:
+            requeued = self.queue.requeue_stale(self.job_timeout)
+        except sqlite3.Error as e:
+            print(f"⚠️ Error revisando la cola de enriquecimiento: {e}")
+            return
+        if requeued:
+            print(f"⚠️ {requeued} trabajos de enriquecimiento interrumpidos vuelven a la cola")
+
+    def _work(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                job = self.queue.claim()
+            except sqlite3.Error as e:
+                print(f"⚠️ Error leyendo la cola de enriquecimiento: {e}")
+                job = None
+            if job is None:
+                self._requeue_stale()
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+            self._run(job)
+
+    def _run(self, job: Dict[str, Any]) -> None:
+        try:
+            result = self.run_job(job['task_id'])
+        except CircuitOpenError as e:
+            # Azure está degradado: reintentar cuando el circuito pase a semiabierto
+            if job['attempts'] < self.max_attempts:
+                self.queue.fail(job['id'], str(e), retry_in=get_circuit_breaker().open_seconds)
+            else:
+                self.queue.fail(job['id'], str(e))
+        except Exception as e:
+            print(f"❌ Error en el trabajo de enriquecimiento {job['id']}: {e}")
+            self.queue.fail(job['id'], str(e))
+        else:
+            self.queue.complete(job['id'], result)
+
+
+_queue = None
+_pool = None
+_jobs_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Cola de trabajos del proceso"""
+    global _queue
+    with _jobs_lock:
+        if _queue is None:
+            _queue = JobQueue()
+        return _queue
+
+
+def get_worker_pool() -> EnrichmentWorkerPool:
+    """Pool de workers del proceso, arrancado la primera vez que se pide"""
+    global _pool
+    queue = get_job_queue()
+    with _jobs_lock:
+        if _pool is None:
+            _pool = EnrichmentWorkerPool(queue)
+            _pool.start()
+        return _pool
+
+
+def enqueue_enrichment(task_id: int) -> Dict[str, Any]:
+    """Encola el enriquecimiento de una tarea y despierta a los workers"""
+    job = get_job_queue().enqueue(task_id)
+    get_worker_pool().notify()
+    return job
@@ -0,0 +1,237 @@
+"""
+Caché de respuestas del LLM direccionada por contenido.
+
+La clave es un hash SHA-256 de todo lo que determina la respuesta: deployment,
+prompt de sistema, prompt de usuario, temperature, top_p, penalizaciones y
+max_tokens. Dos llamadas idénticas comparten entrada aunque vengan de tareas,
+formularios o workers distintos.
+
+Backends disponibles (variable LLM_CACHE_BACKEND):
+    off     Sin caché (por defecto)
+    memory  LRU en memoria del proceso con caducidad (TTL)
+    sqlite  Archivo SQLite compartido entre procesos (LLM_CACHE_PATH)
+
+Cada backend lleva contadores de aciertos y fallos. En un acierto la llamada
+no consume tokens; AIService registra coste cero y guarda en las estadísticas
+los tokens y el coste originales para que la contabilidad siga siendo fiel.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+# Backend de caché: off, memory o sqlite
+CACHE_BACKEND = os.getenv('LLM_CACHE_BACKEND', 'off')
+
+# Segundos de validez de una respuesta (0 = sin caducidad)
+CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', '86400'))
+
+# Entradas máximas del backend en memoria
+CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '1024'))
+
+# Archivo del backend SQLite
+CACHE_PATH = os.getenv(
+    'LLM_CACHE_PATH',
+    str(Path(__file__).parent.parent.parent / 'data' / 'llm_cache.sqlite3')
+)
+
+CachedResponse = Tuple[str, Dict[str, Any]]
+
+
+def cache_key(**params: Any) -> str:
+    """
+    Clave de caché estable para los parámetros de una llamada al LLM
+
+    Args:
+        **params: deployment, prompts y parámetros de muestreo
+
+    Returns:
+        str: Hash SHA-256 en hexadecimal
+    """
+    payload = json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class BaseLLMCache(ABC):
+    """Contadores de aciertos/fallos comunes a todos los backends"""
+
+    backend = 'base'
+
+    def __init__(self, ttl: int = CACHE_TTL):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._counter_lock = threading.Lock()
+
+    def _expired(self, created_at: float) -> bool:
+        return bool(self.ttl) and time.time() - created_at > self.ttl
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Devuelve (contenido, estadísticas originales) o None, y actualiza los contadores"""
+        entry = self._get(key)
+        with self._counter_lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return entry
+
+    def set(self, key: str, content: str, stats: Dict[str, Any]) -> None:
+        """Guarda una respuesta con sus estadísticas originales"""
+        self._set(key, content, stats)
+
+    def stats(self) -> Dict[str, Any]:
+        """Estado de la caché para diagnóstico"""
+        lookups = self.hits + self.misses
+        return {
+            'backend': self.backend,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'entries': self.size()
+        }
+
+    @abstractmethod
+    def _get(self, key: str) -> Optional[CachedResponse]:
+        """Entrada vigente de la clave o None, sin tocar los contadores"""
+
+    @abstractmethod
+    def _set(self, key: str, content: str, stats: Dict[str, Any]) -> None:
+        """Guarda la entrada en el backend"""
+
+    @abstractmethod
+    def size(self) -> int:
+        """Número de entradas almacenadas"""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Elimina todas las entradas"""
+
+
+class MemoryLLMCache(BaseLLMCache):
+    """LRU en memoria con caducidad, seguro entre hilos"""
+
+    backend = 'memory'
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl: int = CACHE_TTL):
+        super().__init__(ttl)
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            created_at, content, stats = entry
+            if self._expired(created_at):
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return content, dict(stats)
+
+    def _set(self, key: str, content: str, stats: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = (time.time(), content, dict(stats))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def size(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteLLMCache(BaseLLMCache):
+    """Caché persistente en un archivo SQLite, compartida por los workers"""
+
+    backend = 'sqlite'
+
+    def __init__(self, path: str = CACHE_PATH, ttl: int = CACHE_TTL):
+        super().__init__(ttl)
+        self.path = str(path)
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS llm_cache ('
+                'key TEXT PRIMARY KEY, content TEXT NOT NULL, '
+                'stats TEXT NOT NULL, created_at REAL NOT NULL)'
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Conexión de una operación: confirma o revierte la transacción y se cierra al salir"""
+        # Una conexión por operación: sqlite3 no comparte conexiones entre hilos
+        with closing(sqlite3.connect(self.path, timeout=5)) as conn, conn:
+            yield conn
+
+    def _get(self, key: str) -> Optional[CachedResponse]:
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT content, stats, created_at FROM llm_cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if self._expired(row[2]):
+                conn.execute('DELETE FROM llm_cache WHERE key = ?', (key,))
+                return None
+            return row[0], json.loads(row[1])
+
+    def _set(self, key: str, content: str, stats: Dict[str, Any]) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO llm_cache (key, content, stats, created_at) VALUES (?, ?, ?, ?)',
+                (key, content, json.dumps(stats), time.time())
+            )
+
+    def size(self) -> int:
+        with self._connect() as conn:
+            return conn.execute('SELECT COUNT(*) FROM llm_cache').fetchone()[0]
+
+    def clear(self) -> None:
+        with self._connect() as conn:
+            conn.execute('DELETE FROM llm_cache')
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def create_llm_cache(backend: str = CACHE_BACKEND) -> Optional[BaseLLMCache]:
+    """
+    Crea el backend de caché indicado
+
+    Args:
+        backend: off, memory o sqlite
+
+    Returns:
+        Optional[BaseLLMCache]: La caché o None si está desactivada
+    """
+    backend = (backend or 'off').lower()
+    if backend in ('off', 'none', 'false', ''):
+        return None
+    if backend == 'memory':
+        return MemoryLLMCache()
+    if backend == 'sqlite':
+        return SQLiteLLMCache()
+    raise ValueError(f"Backend de caché LLM no válido: {backend}")
+
+
+def get_llm_cache() -> Optional[BaseLLMCache]:
+    """Caché compartida por todas las instancias de AIService del proceso"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = create_llm_cache()
+        return _cache
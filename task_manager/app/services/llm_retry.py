@@ -0,0 +1,173 @@
+"""
+Política de reintentos para las llamadas a Azure OpenAI.
+
+Solo se reintentan los fallos transitorios: 429, 408, 409, 5xx, timeouts y
+errores de conexión. La espera entre intentos es un backoff exponencial con
+jitter completo (``uniform(0, base * 2^intento)`` acotado a ``max_delay``);
+si la respuesta incluye ``retry-after-ms`` o ``Retry-After`` se respeta ese
+valor. Ningún reintento empieza después del plazo total de la llamada.
+
+Una chat completion no tiene efectos en el servidor, así que repetir la misma
+petición es idempotente.
+
+    AI_RETRY_MAX_ATTEMPTS   Intentos totales por llamada (1 = sin reintentos)
+    AI_RETRY_BASE_DELAY     Segundos de la primera espera
+    AI_RETRY_MAX_DELAY      Espera máxima entre intentos
+    AI_CALL_DEADLINE        Plazo total de una llamada, reintentos incluidos
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from openai import APIConnectionError, APIStatusError, APITimeoutError
+
+MAX_ATTEMPTS = int(os.getenv('AI_RETRY_MAX_ATTEMPTS', '4'))
+BASE_DELAY = float(os.getenv('AI_RETRY_BASE_DELAY', '0.5'))
+MAX_DELAY = float(os.getenv('AI_RETRY_MAX_DELAY', '20'))
+CALL_DEADLINE = float(os.getenv('AI_CALL_DEADLINE', '60'))
+
+# Códigos HTTP transitorios además de los 5xx
+RETRYABLE_STATUS = (408, 409, 429)
+
+
+def is_retryable(error: Exception) -> bool:
+    """Indica si el error de la API es transitorio"""
+    if isinstance(error, (APITimeoutError, APIConnectionError)):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code in RETRYABLE_STATUS or error.status_code >= 500
+    return False
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Segundos indicados por ``retry-after-ms`` o ``Retry-After`` en la respuesta, si los hay"""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if not headers:
+        return None
+    try:
+        if headers.get('retry-after-ms'):
+            return float(headers['retry-after-ms']) / 1000
+        value = headers.get('retry-after')
+        if not value:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            # Formato fecha HTTP
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """Reintentos con backoff exponencial y jitter, con métricas acumuladas"""
+
+    def __init__(self, max_attempts: int = MAX_ATTEMPTS, base_delay: float = BASE_DELAY,
+                 max_delay: float = MAX_DELAY, deadline: float = CALL_DEADLINE,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+        self.backoff_seconds = 0.0
+        self.exhausted = 0
+
+    def backoff(self, attempt: int, error: Exception) -> float:
+        """Espera antes del intento ``attempt + 1`` (``attempt`` empieza en 0)"""
+        retry_after = retry_after_seconds(error)
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def call(self, fn: Callable[[float], Any], deadline: Optional[float] = None) -> Any:
+        """
+        Ejecuta ``fn`` reintentando los errores transitorios.
+
+        Args:
+            fn: Función que recibe los segundos restantes del plazo (para usarlos como timeout)
+            deadline: Segundos del plazo total (por defecto ``self.deadline``)
+
+        Returns:
+            Any: El resultado de ``fn``
+
+        Raises:
+            Exception: El último error si no es transitorio, se agotan los
+            intentos o la siguiente espera superaría el plazo
+        """
+        deadline = time.monotonic() + (self.deadline if deadline is None else deadline)
+        with self._lock:
+            self.calls += 1
+        attempt = 0
+        while True:
+            try:
+                return fn(max(0.0, deadline - time.monotonic()))
+            except Exception as e:
+                self._sleep(self._next_delay(attempt, e, deadline))
+                attempt += 1
+
+    async def call_async(self, fn: Callable[[float], Awaitable[Any]]) -> Any:
+        """Versión de ``call`` para corrutinas: espera con asyncio.sleep"""
+        deadline = time.monotonic() + self.deadline
+        with self._lock:
+            self.calls += 1
+        attempt = 0
+        while True:
+            try:
+                return await fn(max(0.0, deadline - time.monotonic()))
+            except Exception as e:
+                await asyncio.sleep(self._next_delay(attempt, e, deadline))
+                attempt += 1
+
+    def _next_delay(self, attempt: int, error: Exception, deadline: float) -> float:
+        """
+        Espera antes de reintentar tras ``error``; relanza el error si no se reintenta.
+
+        Debe llamarse desde el bloque ``except`` que capturó ``error``.
+        """
+        if not is_retryable(error) or attempt + 1 >= self.max_attempts:
+            if is_retryable(error):
+                with self._lock:
+                    self.exhausted += 1
+            raise error
+        delay = self.backoff(attempt, error)
+        if time.monotonic() + delay >= deadline:
+            with self._lock:
+                self.exhausted += 1
+            raise error
+        print(f"⚠️ Error transitorio de Azure OpenAI ({error.__class__.__name__}), reintento en {delay:.2f}s")
+        with self._lock:
+            self.retries += 1
+            self.backoff_seconds += delay
+        return delay
+
+    def metrics(self) -> Dict[str, Any]:
+        """Reintentos realizados y tiempo total de espera"""
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'retries': self.retries,
+                'backoff_seconds': round(self.backoff_seconds, 3),
+                'exhausted': self.exhausted
+            }
+
+
+_policy = None
+_policy_lock = threading.Lock()
+
+
+def get_retry_policy() -> RetryPolicy:
+    """Política de reintentos compartida por el proceso"""
+    global _policy
+    with _policy_lock:
+        if _policy is None:
+            _policy = RetryPolicy()
+        return _policy
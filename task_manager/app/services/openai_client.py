@@ -0,0 +1,97 @@
+"""
+Cliente de Azure OpenAI compartido por el proceso.
+
+En lugar de configurar los atributos globales del módulo ``openai`` en cada
+``AIService()``, se crea una sola instancia de ``AzureOpenAI`` la primera vez
+que se necesita. Su cliente HTTP mantiene un pool de conexiones con
+keep-alive, de modo que el handshake TLS se hace una vez y las conexiones se
+reutilizan entre peticiones e hilos (el cliente es seguro entre hilos).
+
+    AZURE_OPENAI_POOL_MAX_CONNECTIONS   Conexiones simultáneas del pool
+    AZURE_OPENAI_POOL_MAX_KEEPALIVE     Conexiones ociosas que se conservan
+    AZURE_OPENAI_KEEPALIVE_EXPIRY       Segundos que se conserva una conexión ociosa
+
+Los reintentos del SDK están desactivados: los gestiona ``app.services.llm_retry``.
+
+El cliente asíncrono (``AsyncAzureOpenAI``) no se comparte: su pool queda ligado
+al bucle de eventos donde se usa, así que cada ``AsyncAIService`` crea el suyo.
+"""
+import os
+import threading
+from typing import Dict
+
+from openai import AsyncAzureOpenAI, AzureOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient
+
+from app.services.llm_retry import CALL_DEADLINE
+
+POOL_MAX_CONNECTIONS = int(os.getenv('AZURE_OPENAI_POOL_MAX_CONNECTIONS', '20'))
+POOL_MAX_KEEPALIVE = int(os.getenv('AZURE_OPENAI_POOL_MAX_KEEPALIVE', '10'))
+KEEPALIVE_EXPIRY = float(os.getenv('AZURE_OPENAI_KEEPALIVE_EXPIRY', '30'))
+
+# Segundos para establecer la conexión (el plazo total lo fija cada llamada)
+CONNECT_TIMEOUT = 5.0
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def azure_openai_settings() -> Dict[str, str]:
+    """
+    Credenciales de Azure OpenAI del entorno
+
+    Raises:
+        ValueError: Si falta alguna credencial
+    """
+    settings = {
+        'api_key': os.getenv("AZURE_OPENAI_API_KEY"),
+        'api_version': os.getenv("AZURE_OPENAI_API_VERSION"),
+        'azure_endpoint': os.getenv("AZURE_OPENAI_ENDPOINT")
+    }
+    if not all(settings.values()):
+        raise ValueError("Faltan credenciales de Azure OpenAI en el archivo .env")
+    return settings
+
+
+def _pool_options() -> Dict[str, object]:
+    """Límites del pool y timeouts del cliente HTTP"""
+    # httpx es dependencia del SDK de openai
+    import httpx
+    return {
+        'limits': httpx.Limits(
+            max_connections=POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=POOL_MAX_KEEPALIVE,
+            keepalive_expiry=KEEPALIVE_EXPIRY
+        ),
+        'timeout': httpx.Timeout(CALL_DEADLINE, connect=CONNECT_TIMEOUT)
+    }
+
+
+def get_openai_client() -> AzureOpenAI:
+    """Cliente de Azure OpenAI del proceso, creado la primera vez que se pide"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = AzureOpenAI(
+                **azure_openai_settings(),
+                max_retries=0,
+                http_client=DefaultHttpxClient(**_pool_options())
+            )
+        return _client
+
+
+def close_openai_client() -> None:
+    """Cierra el pool de conexiones (al apagar el proceso o en tests)"""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+def create_async_openai_client() -> AsyncAzureOpenAI:
+    """Cliente asíncrono de Azure OpenAI con los mismos límites de pool que el síncrono"""
+    return AsyncAzureOpenAI(
+        **azure_openai_settings(),
+        max_retries=0,
+        http_client=DefaultAsyncHttpxClient(**_pool_options())
+    )
@@ -0,0 +1,185 @@
+"""
+Presupuesto de tokens de los prompts.
+
+Los prompts de enriquecimiento concatenan título, descripción y análisis de
+riesgos sin límite: una descripción larga hace las llamadas lentas y caras y
+puede desbordar el contexto del modelo. Antes de cada llamada:
+
+- ``fit`` recorta las secciones del prompt de usuario hasta el tope de su
+  etapa: primero la sección más antigua (la descripción antes que los
+  riesgos), cortando por frases y eliminándola si apenas quedaría nada.
+- ``max_output_tokens`` ajusta max_tokens a lo que queda de la ventana de
+  contexto tras el prompt.
+
+Los tokens ahorrados se acumulan en ``metrics()``.
+
+    AI_CONTEXT_WINDOW       Ventana de contexto del modelo (por defecto 4096)
+    AI_MAX_PROMPT_TOKENS    Tope del prompt de usuario de las etapas más grandes
+    AI_MIN_OUTPUT_TOKENS    Salida mínima reservada en cada llamada
+"""
+import os
+import re
+import threading
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from app.services.token_counter import count_tokens, count_tokens_batch, get_encoding
+
+CONTEXT_WINDOW = int(os.getenv('AI_CONTEXT_WINDOW', '4096'))
+MAX_PROMPT_TOKENS = int(os.getenv('AI_MAX_PROMPT_TOKENS', '1500'))
+MIN_OUTPUT_TOKENS = int(os.getenv('AI_MIN_OUTPUT_TOKENS', '256'))
+
+# Tope del prompt de usuario por etapa: categoría y esfuerzo solo necesitan lo esencial
+STAGE_PROMPT_TOKENS = {
+    'categorization': 600,
+    'effort_estimation': 600,
+    'risk_analysis': 1000,
+    'mitigation': MAX_PROMPT_TOKENS,
+}
+
+# Por debajo de este tamaño una sección recortada se elimina en lugar de truncarse
+MIN_SECTION_TOKENS = 24
+
+# Fin de frase seguido de espacio
+_SENTENCE_END = re.compile(r'(?<=[.!?…;])\s+')
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Recorta un texto a ``max_tokens`` tokens por frases completas
+
+    Si ni la primera frase cabe, se corta por tokens en el último espacio.
+
+    Args:
+        text: Texto a recortar
+        max_tokens: Tokens máximos del resultado
+
+    Returns:
+        str: Texto recortado (el original si ya cabe)
+    """
+    if max_tokens <= 0:
+        return ''
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    sentences = _SENTENCE_END.split(text.strip())
+    kept = []
+    used = 0
+    for sentence, tokens in zip(sentences, count_tokens_batch(sentences)):
+        # +1 por el espacio que une las frases
+        if used + tokens + 1 > max_tokens:
+            break
+        kept.append(sentence)
+        used += tokens + 1
+    if kept:
+        return ' '.join(kept)
+
+    encoding = get_encoding()
+    if encoding is None:
+        return ' '.join(text.split()[:int(max_tokens / 1.3)])
+    head = encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+    # Sin la palabra que haya quedado cortada
+    return head.rsplit(' ', 1)[0] if ' ' in head else head
+
+
+class PromptBudget:
+    """Límites de tokens por llamada y contadores del ahorro conseguido"""
+
+    def __init__(self, context_window: int = CONTEXT_WINDOW, max_prompt_tokens: int = MAX_PROMPT_TOKENS,
+                 min_output_tokens: int = MIN_OUTPUT_TOKENS):
+        """
+        Args:
+            context_window: Ventana de contexto del modelo
+            max_prompt_tokens: Tope por defecto del prompt de usuario
+            min_output_tokens: Salida mínima reservada en cada llamada
+        """
+        self.context_window = context_window
+        self.max_prompt_tokens = max_prompt_tokens
+        self.min_output_tokens = min_output_tokens
+        self._lock = threading.Lock()
+        self.prompts = 0
+        self.trimmed_prompts = 0
+        self.tokens_saved = 0
+
+    def stage_limit(self, stage: str) -> int:
+        """Tope del prompt de usuario de una etapa (max_prompt_tokens si no tiene uno propio)"""
+        return min(STAGE_PROMPT_TOKENS.get(stage, self.max_prompt_tokens), self.max_prompt_tokens)
+
+    def fit(self, template: str, sections: Dict[str, str], trimmable: Sequence[str],
+            max_tokens: Optional[int] = None) -> Tuple[str, int]:
+        """
+        Construye el prompt de usuario dentro del presupuesto
+
+        Args:
+            template: Plantilla con un campo por sección (``str.format``)
+            sections: Sección -> texto
+            trimmable: Secciones que se pueden recortar, de la más antigua a la más reciente
+            max_tokens: Tope del prompt (por defecto max_prompt_tokens)
+
+        Returns:
+            Tuple[str, int]: Prompt resultante y tokens ahorrados
+        """
+        limit = max_tokens or self.max_prompt_tokens
+        prompt = template.format(**sections)
+        total = count_tokens(prompt)
+        if total <= limit:
+            with self._lock:
+                self.prompts += 1
+            return prompt, 0
+
+        sections = dict(sections)
+        counts = dict(zip(trimmable, count_tokens_batch([sections[name] for name in trimmable])))
+        excess = total - limit
+        for name in trimmable:
+            if excess <= 0:
+                break
+            keep = counts[name] - excess
+            sections[name] = truncate_to_tokens(sections[name], keep) if keep >= MIN_SECTION_TOKENS else ''
+            excess -= counts[name] - count_tokens(sections[name])
+
+        prompt = template.format(**sections)
+        saved = max(0, total - count_tokens(prompt))
+        if excess > 0:
+            print(f"⚠️ El prompt supera el presupuesto de {limit} tokens sin secciones recortables")
+        with self._lock:
+            self.prompts += 1
+            self.trimmed_prompts += 1
+            self.tokens_saved += saved
+        return prompt, saved
+
+    def max_output_tokens(self, prompt_tokens: int, requested: int) -> int:
+        """
+        max_tokens de la llamada: el pedido, sin pasar de lo que queda de la ventana de contexto
+
+        Args:
+            prompt_tokens: Tokens de los prompts de sistema y de usuario
+            requested: max_tokens configurado en el servicio
+
+        Returns:
+            int: max_tokens a enviar (al menos min_output_tokens)
+        """
+        remaining = self.context_window - prompt_tokens
+        return max(min(self.min_output_tokens, requested), min(requested, remaining))
+
+    def metrics(self) -> Dict[str, Any]:
+        """Prompts construidos, cuántos se recortaron y tokens ahorrados"""
+        with self._lock:
+            return {
+                'prompts': self.prompts,
+                'trimmed_prompts': self.trimmed_prompts,
+                'tokens_saved': self.tokens_saved,
+                'context_window': self.context_window,
+                'max_prompt_tokens': self.max_prompt_tokens
+            }
+
+
+_budget = None
+_budget_lock = threading.Lock()
+
+
+def get_prompt_budget() -> PromptBudget:
+    """Presupuesto de prompts compartido por el proceso"""
+    global _budget
+    with _budget_lock:
+        if _budget is None:
+            _budget = PromptBudget()
+        return _budget
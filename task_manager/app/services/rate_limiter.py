@@ -0,0 +1,296 @@
+"""
+Limitador de peticiones a Azure OpenAI del lado del cliente.
+
+Aplica en el proceso los presupuestos del deployment antes de enviar la
+petición, en lugar de descubrirlos con errores 429:
+
+    AZURE_OPENAI_RPM            Peticiones por minuto (0 = sin límite)
+    AZURE_OPENAI_TPM            Tokens por minuto (0 = sin límite)
+    AI_MAX_CONCURRENT_CALLS     Llamadas simultáneas como máximo
+    AI_RATE_LIMIT_MAX_WAIT      Segundos máximos en cola antes de rechazar
+
+Cada presupuesto es un token bucket que se rellena de forma continua. Como
+Azure, los tokens de una petición se estiman con el prompt más max_tokens y
+se ajustan con el uso real al terminar. Las peticiones que no caben esperan
+en cola como mucho AI_RATE_LIMIT_MAX_WAIT segundos; después se rechazan con
+RateLimitExceeded.
+
+Los límites son por proceso: con varios workers de gunicorn conviene repartir
+el presupuesto del deployment entre ellos.
+"""
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Dict, Optional
+
+# Presupuestos del deployment (0 = sin límite)
+REQUESTS_PER_MINUTE = int(os.getenv('AZURE_OPENAI_RPM', '0'))
+TOKENS_PER_MINUTE = int(os.getenv('AZURE_OPENAI_TPM', '0'))
+
+# Llamadas en curso como máximo
+MAX_CONCURRENT_CALLS = int(os.getenv('AI_MAX_CONCURRENT_CALLS', '8'))
+
+# Espera máxima en cola antes de rechazar la petición
+MAX_WAIT_SECONDS = float(os.getenv('AI_RATE_LIMIT_MAX_WAIT', '30'))
+
+# Cortes de quien consume la respuesta con la petición ya enviada (cliente
+# desconectado, llamada cancelada): el modelo ya ha generado tokens
+INTERRUPTIONS = (GeneratorExit, asyncio.CancelledError)
+
+
+class RateLimitExceeded(Exception):
+    """La petición no obtuvo presupuesto dentro del tiempo máximo de espera"""
+
+
+class TokenBucket:
+    """Token bucket con relleno continuo; ``per_minute`` = 0 desactiva el límite"""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.available = float(per_minute)
+        self.rate = per_minute / 60.0
+        self._updated = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.capacity <= 0
+
+    def _refill(self, now: float) -> None:
+        self.available = min(self.capacity, self.available + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Segundos hasta que haya ``amount`` disponibles (0 si ya los hay)"""
+        if self.unlimited:
+            return 0.0
+        self._refill(now)
+        # Una petición mayor que la capacidad solo necesita el bucket lleno
+        amount = min(amount, self.capacity)
+        if self.available >= amount:
+            return 0.0
+        return (amount - self.available) / self.rate
+
+    def consume(self, amount: float) -> None:
+        if not self.unlimited:
+            self.available -= amount
+
+    def refund(self, amount: float) -> None:
+        if not self.unlimited:
+            self.available = min(self.capacity, self.available + amount)
+
+
+class RateLimiter:
+    """Presupuestos RPM/TPM y límite de concurrencia compartidos por el proceso"""
+
+    def __init__(self, requests_per_minute: int = REQUESTS_PER_MINUTE,
+                 tokens_per_minute: int = TOKENS_PER_MINUTE,
+                 max_concurrent: int = MAX_CONCURRENT_CALLS,
+                 max_wait: float = MAX_WAIT_SECONDS):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_concurrent = max_concurrent
+        self.max_wait = max_wait
+        self._slots = threading.BoundedSemaphore(max_concurrent) if max_concurrent > 0 else None
+        self._lock = threading.Lock()
+        # Ventana del último minuto: (instante, tokens)
+        self._window = deque()
+        self.in_flight = 0
+        self.queued = 0
+        self.rejected = 0
+
+    def _trim_window(self, now: float) -> None:
+        while self._window and now - self._window[0][0] > 60:
+            self._window.popleft()
+
+    def _try_reserve(self, estimated_tokens: int, deadline: float) -> float:
+        """
+        Consume una petición y ``estimated_tokens`` si caben en los buckets
+
+        Returns:
+            float: 0 si se reservó; si no, los segundos que hay que esperar
+
+        Raises:
+            RateLimitExceeded: Si la espera necesaria supera el plazo
+        """
+        with self._lock:
+            now = time.monotonic()
+            wait = max(self.requests.wait_time(1, now), self.tokens.wait_time(estimated_tokens, now))
+            if wait == 0:
+                self.requests.consume(1)
+                self.tokens.consume(estimated_tokens)
+                return 0.0
+        if now + wait > deadline:
+            raise RateLimitExceeded(
+                f"Límite de velocidad del cliente excedido: se necesitaban {wait:.1f} segundos de espera"
+            )
+        return min(wait, 1.0)
+
+    def _reject(self) -> None:
+        with self._lock:
+            self.queued -= 1
+            self.rejected += 1
+
+    def _admit(self) -> None:
+        with self._lock:
+            self.queued -= 1
+            self.in_flight += 1
+
+    def _release(self, estimated_tokens: int, used_tokens: int) -> None:
+        with self._lock:
+            # Devolver al bucket lo que se estimó de más
+            self.tokens.refund(estimated_tokens - used_tokens)
+            now = time.monotonic()
+            self._window.append((now, used_tokens))
+            self._trim_window(now)
+            self.in_flight -= 1
+        if self._slots is not None:
+            self._slots.release()
+
+    def _wait_deadline(self, timeout: Optional[float]) -> float:
+        """Instante límite de la espera en cola: max_wait, acotado por el plazo de la llamada"""
+        max_wait = self.max_wait if timeout is None else min(self.max_wait, timeout)
+        return time.monotonic() + max_wait
+
+    @contextmanager
+    def acquire(self, estimated_tokens: int, timeout: Optional[float] = None):
+        """
+        Reserva presupuesto para una llamada al LLM.
+
+        Si la llamada falla sin registrar uso se devuelve toda la estimación;
+        si se interrumpe con la petición ya enviada (INTERRUPTIONS) se
+        mantiene, porque el modelo ya ha consumido tokens.
+
+        Args:
+            estimated_tokens: Tokens estimados (prompt + max_tokens)
+            timeout: Segundos que le quedan a la llamada; la espera en cola no los supera
+
+        Yields:
+            Callable[[int], None]: Función para registrar los tokens reales usados
+
+        Raises:
+            RateLimitExceeded: Si no hay presupuesto dentro de la espera permitida
+        """
+        deadline = self._wait_deadline(timeout)
+        with self._lock:
+            self.queued += 1
+        try:
+            if self._slots is not None and not self._slots.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                raise RateLimitExceeded("Límite de velocidad del cliente excedido: demasiadas llamadas en curso")
+            try:
+                while True:
+                    wait = self._try_reserve(estimated_tokens, deadline)
+                    if not wait:
+                        break
+                    time.sleep(wait)
+            except RateLimitExceeded:
+                if self._slots is not None:
+                    self._slots.release()
+                raise
+        except RateLimitExceeded:
+            self._reject()
+            raise
+
+        self._admit()
+        used = {'tokens': None}
+
+        def record_usage(actual_tokens: int) -> None:
+            used['tokens'] = actual_tokens
+
+        try:
+            yield record_usage
+        except INTERRUPTIONS:
+            raise
+        except BaseException:
+            # Llamada fallida sin uso registrado: se devuelve toda la estimación
+            if used['tokens'] is None:
+                used['tokens'] = 0
+            raise
+        finally:
+            self._release(estimated_tokens, estimated_tokens if used['tokens'] is None else used['tokens'])
+
+    @asynccontextmanager
+    async def acquire_async(self, estimated_tokens: int, timeout: Optional[float] = None):
+        """
+        Versión de ``acquire`` para corrutinas: espera con asyncio.sleep sin bloquear el bucle.
+
+        Comparte presupuesto y contadores con las llamadas síncronas del proceso.
+        """
+        deadline = self._wait_deadline(timeout)
+        with self._lock:
+            self.queued += 1
+        try:
+            if self._slots is not None:
+                while not self._slots.acquire(blocking=False):
+                    if time.monotonic() >= deadline:
+                        raise RateLimitExceeded("Límite de velocidad del cliente excedido: demasiadas llamadas en curso")
+                    await asyncio.sleep(0.01)
+            try:
+                while True:
+                    wait = self._try_reserve(estimated_tokens, deadline)
+                    if not wait:
+                        break
+                    await asyncio.sleep(wait)
+            except RateLimitExceeded:
+                if self._slots is not None:
+                    self._slots.release()
+                raise
+        except RateLimitExceeded:
+            self._reject()
+            raise
+
+        self._admit()
+        used = {'tokens': None}
+
+        def record_usage(actual_tokens: int) -> None:
+            used['tokens'] = actual_tokens
+
+        try:
+            yield record_usage
+        except INTERRUPTIONS:
+            raise
+        except BaseException:
+            # Llamada fallida sin uso registrado: se devuelve toda la estimación
+            if used['tokens'] is None:
+                used['tokens'] = 0
+            raise
+        finally:
+            self._release(estimated_tokens, estimated_tokens if used['tokens'] is None else used['tokens'])
+
+    def utilization(self) -> Dict[str, Any]:
+        """Uso del presupuesto en el último minuto, para dimensionar el deployment"""
+        with self._lock:
+            self._trim_window(time.monotonic())
+            requests_last_minute = len(self._window)
+            tokens_last_minute = sum(tokens for _, tokens in self._window)
+            return {
+                'requests_per_minute_limit': int(self.requests.capacity),
+                'tokens_per_minute_limit': int(self.tokens.capacity),
+                'requests_last_minute': requests_last_minute,
+                'tokens_last_minute': tokens_last_minute,
+                'requests_utilization': _ratio(requests_last_minute, self.requests.capacity),
+                'tokens_utilization': _ratio(tokens_last_minute, self.tokens.capacity),
+                'max_concurrent': self.max_concurrent,
+                'in_flight': self.in_flight,
+                'queued': self.queued,
+                'rejected': self.rejected
+            }
+
+
+def _ratio(used: float, limit: float) -> Optional[float]:
+    return round(used / limit, 4) if limit > 0 else None
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Limitador compartido por todas las instancias de AIService del proceso"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter()
+        return _limiter
@@ -0,0 +1,145 @@
+"""
+Conteo de tokens con un encoder de tiktoken compartido por el proceso.
+
+Cargar el encoder (``tiktoken.encoding_for_model``) lee y decodifica un
+vocabulario de ~100k tokens y, si no está en la caché de tiktoken, lo
+descarga. Aquí se carga una sola vez y lo reutilizan todas las instancias de
+AIService; el objeto ``Encoding`` es seguro entre hilos.
+
+    TOKEN_ENCODING_MODEL    Modelo cuyo encoder se usa (por defecto gpt-3.5-turbo)
+    TIKTOKEN_BPE_FILE       Archivo local cl100k_base.tiktoken: el encoder se
+                            construye desde él sin acceder a la red
+    TOKEN_COUNT_THREADS     Hilos de count_tokens_batch
+
+Si no hay encoder disponible (sin red ni archivo local) se usa la
+aproximación de 1,3 tokens por palabra y se vuelve a intentar la carga
+pasados unos minutos.
+"""
+import os
+import threading
+import time
+from typing import List, Optional, Sequence
+
+import tiktoken
+from tiktoken.load import load_tiktoken_bpe
+
+ENCODING_MODEL = os.getenv('TOKEN_ENCODING_MODEL', 'gpt-3.5-turbo')
+BPE_FILE = os.getenv('TIKTOKEN_BPE_FILE', '')
+COUNT_THREADS = int(os.getenv('TOKEN_COUNT_THREADS', '4'))
+
+# Segundos antes de reintentar la carga tras un fallo
+RETRY_SECONDS = 300
+
+# Definición pública de cl100k_base (tiktoken_ext.openai_public), el encoding
+# de gpt-3.5-turbo y gpt-4, para construirlo desde el archivo local
+CL100K_PATTERN = (
+    r"""'(?i:[sdmt]|ll|ve|re)|[^\r\n\p{L}\p{N}]?+\p{L}++|\p{N}{1,3}+| ?[^\s\p{L}\p{N}]++[\r\n]*+|\s++$|\s*[\r\n]|\s+(?!\S)|\s"""
+)
+CL100K_SPECIAL_TOKENS = {
+    '<|endoftext|>': 100257,
+    '<|fim_prefix|>': 100258,
+    '<|fim_middle|>': 100259,
+    '<|fim_suffix|>': 100260,
+    '<|endofprompt|>': 100276,
+}
+
+_encoding = None
+_failed_at = None
+_encoding_lock = threading.Lock()
+
+
+def _load_encoding(bpe_file: Optional[str] = None) -> tiktoken.Encoding:
+    """Construye el encoder desde el archivo local o, si no hay, desde tiktoken"""
+    bpe_file = BPE_FILE if bpe_file is None else bpe_file
+    if bpe_file:
+        return tiktoken.Encoding(
+            name='cl100k_base',
+            pat_str=CL100K_PATTERN,
+            mergeable_ranks=load_tiktoken_bpe(bpe_file),
+            special_tokens=CL100K_SPECIAL_TOKENS
+        )
+    return tiktoken.encoding_for_model(ENCODING_MODEL)
+
+
+def get_encoding() -> Optional[tiktoken.Encoding]:
+    """Encoder del proceso, cargado la primera vez; None si no se pudo cargar"""
+    global _encoding, _failed_at
+    with _encoding_lock:
+        if _encoding is None and (_failed_at is None or time.monotonic() - _failed_at >= RETRY_SECONDS):
+            try:
+                _encoding = _load_encoding()
+                _failed_at = None
+            except Exception as e:
+                _failed_at = time.monotonic()
+                print(f"⚠️ No se pudo cargar el encoder de tiktoken, se aproximan los tokens: {e}")
+        return _encoding
+
+
+def prewarm_encoding(bpe_file: Optional[str] = None) -> bool:
+    """
+    Carga el encoder al arrancar para que la primera petición no pague la carga
+
+    Args:
+        bpe_file: Archivo local cl100k_base.tiktoken (por defecto TIKTOKEN_BPE_FILE)
+
+    Returns:
+        bool: True si el encoder quedó cargado
+    """
+    global _encoding, _failed_at
+    with _encoding_lock:
+        if _encoding is not None:
+            return True
+        try:
+            start = time.perf_counter()
+            _encoding = _load_encoding(bpe_file)
+            _failed_at = None
+            print(f"✅ Encoder de tokens cargado en {time.perf_counter() - start:.2f}s")
+            return True
+        except Exception as e:
+            _failed_at = time.monotonic()
+            print(f"⚠️ No se pudo precargar el encoder de tiktoken: {e}")
+            return False
+
+
+def approximate_tokens(text: str) -> int:
+    """Aproximación sin encoder: 1,3 tokens por palabra"""
+    return int(len(text.split()) * 1.3)
+
+
+def count_tokens(text: str, encoding: Optional[tiktoken.Encoding] = None) -> int:
+    """Tokens de un texto con el encoder del proceso (o el indicado)"""
+    encoding = encoding or get_encoding()
+    if encoding is None:
+        return approximate_tokens(text)
+    try:
+        # Los marcadores especiales que aparezcan en el texto cuentan como texto normal
+        return len(encoding.encode(text, disallowed_special=()))
+    except Exception:
+        return approximate_tokens(text)
+
+
+def count_tokens_batch(texts: Sequence[str], encoding: Optional[tiktoken.Encoding] = None,
+                       num_threads: int = COUNT_THREADS) -> List[int]:
+    """
+    Tokens de varios textos con una sola llamada a ``encode_batch``
+
+    tiktoken reparte los textos entre ``num_threads`` hilos y libera el GIL
+    mientras codifica, así que es bastante más rápido que contar uno a uno.
+
+    Args:
+        texts: Textos a contar
+        encoding: Encoder a usar (por defecto el del proceso)
+        num_threads: Hilos de codificación
+
+    Returns:
+        List[int]: Tokens de cada texto, en el mismo orden
+    """
+    texts = list(texts)
+    encoding = encoding or get_encoding()
+    if encoding is None:
+        return [approximate_tokens(text) for text in texts]
+    try:
+        encoded = encoding.encode_batch(texts, num_threads=max(1, num_threads), disallowed_special=())
+        return [len(tokens) for tokens in encoded]
+    except Exception:
+        return [count_tokens(text, encoding) for text in texts]
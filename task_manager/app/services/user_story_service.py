@@ -3,20 +3,25 @@ from app.models.task_db import TaskDB, StatusEnum
 from app.models.enums import TaskCategory, PriorityEnum
 from app.schemas.user_story_schema import UserStorySchema
 from app.database.azure_connection import get_db_session
+from app.utils.task_manager import truncate_text
+from app.utils.file_lock import atomic_write_json, file_lock, read_json
 from sqlalchemy.orm import Session
-from typing import List, Optional
-import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
 import os
 from pathlib import Path
 
+# Historias de usuario (y categorizaciones sueltas) procesadas a la vez
+TASK_GENERATION_WORKERS = int(os.getenv('USER_STORY_TASK_WORKERS', '4'))
+
 class UserStoryService:
     def __init__(self, db: Optional[Session] = None):
         self.db = db or get_db_session()
         
         # Inicializar el servicio de IA de forma segura
         try:
-            from app.services.ai_service import AIService
-            self.ai_service = AIService()
+            from app.services.ai_service import get_ai_service
+            self.ai_service = get_ai_service()
             print("✅ Servicio de IA inicializado en UserStoryService")
         except Exception as e:
             print(f"⚠️ Error al inicializar el servicio de IA en UserStoryService: {str(e)}")
@@ -30,11 +35,8 @@ class UserStoryService:
     def _load_user_stories_from_json(self) -> List[dict]:
         """Carga user stories desde archivo JSON"""
         json_file = self._get_json_file_path()
-        if not json_file.exists():
-            return []
         try:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return read_json(json_file, default=[])
         except Exception as e:
             print(f"Error cargando user stories desde JSON: {e}")
             return []
@@ -42,10 +44,9 @@ class UserStoryService:
     def _save_user_stories_to_json(self, user_stories: List[dict]):
         """Guarda user stories en archivo JSON"""
         json_file = self._get_json_file_path()
-        json_file.parent.mkdir(exist_ok=True)
         try:
-            with open(json_file, 'w', encoding='utf-8') as f:
-                json.dump(user_stories, f, indent=2, ensure_ascii=False, default=str)
+            with file_lock(json_file):
+                atomic_write_json(json_file, user_stories, indent=2, ensure_ascii=False, default=str)
         except Exception as e:
             print(f"Error guardando user stories en JSON: {e}")
 
@@ -70,25 +71,29 @@ class UserStoryService:
         if self.db is None:
             # Modo JSON fallback
             print("⚠️ Guardando user story en modo JSON")
-            json_data = self._load_user_stories_from_json()
-            
-            # Generar ID único
-            max_id = max([item.get('id', 0) for item in json_data]) if json_data else 0
-            user_story_data['id'] = max_id + 1
-            
-            # Agregar timestamps
-            from datetime import datetime
-            now = datetime.now()
-            user_story_data['created_at'] = now
-            user_story_data['updated_at'] = now
-            
-            json_data.append(user_story_data)
-            self._save_user_stories_to_json(json_data)
+            # Leer-modificar-escribir bajo el bloqueo del archivo (el id es único entre workers)
+            with file_lock(self._get_json_file_path()):
+                json_data = self._load_user_stories_from_json()
+                
+                # Generar ID único
+                max_id = max([item.get('id', 0) for item in json_data]) if json_data else 0
+                user_story_data['id'] = max_id + 1
+                
+                # Agregar timestamps
+                from datetime import datetime
+                now = datetime.now()
+                user_story_data['created_at'] = now
+                user_story_data['updated_at'] = now
+                user_story_data['description_truncated'] = truncate_text(user_story_data.get('description', ''), 30)
+                
+                json_data.append(user_story_data)
+                self._save_user_stories_to_json(json_data)
             
             return UserStory(**user_story_data)
         else:
             # Modo base de datos
             user_story = UserStory(**user_story_data)
+            user_story.description_truncated = truncate_text(user_story.description, 30)
             self.db.add(user_story)
             self.db.commit()
             self.db.refresh(user_story)
@@ -116,6 +121,105 @@ class UserStoryService:
         user_story_data = result  # Se espera que sea un dict válido
         return self.create_user_story(user_story_data)
 
+    def _categorize_items(self, items: List[dict]) -> List[str]:
+        """
+        Categoriza las tareas generadas con una sola llamada al LLM
+        
+        Si la llamada por lotes falla se categorizan las tareas por separado, en
+        paralelo, y en último caso se usa 'otro'.
+        """
+        batch_result = self.ai_service.categorize_tasks_batch(items)
+        if batch_result.get('success'):
+            return batch_result['categories']
+        
+        print(f"⚠️ Categorización por lotes fallida, se categoriza cada tarea: {batch_result.get('error')}")
+        
+        def categorize(item: dict) -> str:
+            try:
+                category_result = self.ai_service.categorize_task(item['title'], item['description'])
+                return category_result['category'] if category_result.get('success') else 'otro'
+            except Exception:
+                return 'otro'
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(len(items), TASK_GENERATION_WORKERS)),
+                                thread_name_prefix='categorize') as executor:
+            return list(executor.map(categorize, items))
+
+    def _generate_task_items(self, user_story) -> List[dict]:
+        """
+        Genera y categoriza las tareas de una historia de usuario (solo llamadas al LLM)
+        
+        Returns:
+            List[dict]: Tareas con title, description y category, listas para insertar
+        """
+        prompt_ia = (
+            f"Genera una lista de tareas en formato JSON para la siguiente historia de usuario: "
+            f"Proyecto: {user_story.project}, Rol: {user_story.role}, Objetivo: {user_story.goal}, Razón: {user_story.reason}, Descripción: {user_story.description}. "
+        )
+        
+        print(f"Generando tareas para user story {user_story.id}")
+        print(f"Prompt: {prompt_ia}")
+        
+        tasks_data = self.ai_service.generate_tasks(prompt_ia)
+        print(f"Tareas generadas por IA: {tasks_data}")
+        
+        # Normalizar títulos y descripciones antes de categorizar
+        items = []
+        for i, task_data in enumerate(tasks_data):
+            # Si el modelo devuelve solo strings, conviértelo a dict
+            if isinstance(task_data, str):
+                task_data = {"title": task_data, "description": ""}
+            
+            # Asegurar que tenemos al menos un título
+            items.append({
+                'title': task_data.get("title", f"Tarea {i+1}"),
+                'description': task_data.get("description", "")
+            })
+        
+        # Generar las categorías de todas las tareas en una sola llamada
+        categories = self._categorize_items(items)
+        return [dict(item, category=category) for item, category in zip(items, categories)]
+
+    def _insert_tasks(self, items_by_story: Dict[int, List[dict]]) -> Dict[int, List[TaskDB]]:
+        """
+        Guarda las tareas generadas de una o varias historias con una sola inserción
+        
+        Args:
+            items_by_story: ID de la historia de usuario -> tareas de _generate_task_items
+            
+        Returns:
+            Dict[int, List[TaskDB]]: Tareas creadas por historia de usuario
+        """
+        if self.db is None:
+            # Modo JSON fallback para tareas: todavía no se guardan
+            print("⚠️ Guardando tareas en modo JSON")
+            return {user_story_id: [] for user_story_id in items_by_story}
+        
+        created = {}
+        for user_story_id, items in items_by_story.items():
+            created[user_story_id] = []
+            for item in items:
+                # Convertir string a enum TaskCategory
+                try:
+                    category_enum = TaskCategory(item['category'])
+                except ValueError:
+                    category_enum = TaskCategory.OTRO
+                created[user_story_id].append(TaskDB(
+                    title=item['title'],
+                    description=item['description'],
+                    description_truncated=truncate_text(item['description'], 30),
+                    user_story_id=user_story_id,
+                    status=StatusEnum.PENDIENTE,
+                    priority=PriorityEnum.MEDIA,
+                    category=category_enum
+                ))
+        
+        tasks = [task for story_tasks in created.values() for task in story_tasks]
+        self.db.add_all(tasks)
+        self.db.commit()
+        print(f"Se guardaron {len(tasks)} tareas en la base de datos")
+        return created
+
     def generate_tasks_for_user_story(self, user_story_id: int) -> list:
         try:
             if not self.ai_service:
@@ -127,71 +231,8 @@ class UserStoryService:
                 print(f"User story {user_story_id} no encontrada")
                 return []
             
-            prompt_ia = (
-                f"Genera una lista de tareas en formato JSON para la siguiente historia de usuario: "
-                f"Proyecto: {user_story.project}, Rol: {user_story.role}, Objetivo: {user_story.goal}, Razón: {user_story.reason}, Descripción: {user_story.description}. "
-            )
-            
-            print(f"Generando tareas para user story {user_story_id}")
-            print(f"Prompt: {prompt_ia}")
-            
-            tasks_data = self.ai_service.generate_tasks(prompt_ia)
-            print(f"Tareas generadas por IA: {tasks_data}")
-            
-            tasks = []
-            for i, task_data in enumerate(tasks_data):
-                # Si el modelo devuelve solo strings, conviértelo a dict
-                if isinstance(task_data, str):
-                    task_data = {"title": task_data, "description": ""}
-                
-                # Asegurar que tenemos al menos un título
-                title = task_data.get("title", f"Tarea {i+1}")
-                description = task_data.get("description", "")
-                
-                print(f"Creando tarea {i+1}: {title}")
-                
-                # Generar categoría usando IA
-                try:
-                    if self.ai_service:
-                        category_result = self.ai_service.categorize_task(title, description)
-                        if category_result.get('success'):
-                            category_value = category_result['category']
-                        else:
-                            category_value = 'otro'
-                    else:
-                        category_value = 'otro'
-                except:
-                    category_value = 'otro'
-                
-                # Convertir string a enum TaskCategory
-                try:
-                    category_enum = TaskCategory(category_value)
-                except ValueError:
-                    category_enum = TaskCategory.OTRO
-                
-                if self.db is None:
-                    # Modo JSON fallback para tareas
-                    print("⚠️ Guardando tarea en modo JSON")
-                    # Aquí podrías implementar la lógica para guardar tareas en JSON
-                    # Por ahora, solo retornamos una lista vacía
-                    pass
-                else:
-                    # Modo base de datos
-                    task = TaskDB(
-                        title=title,
-                        description=description,
-                        user_story_id=user_story_id,
-                        status=StatusEnum.PENDIENTE,
-                        priority=PriorityEnum.MEDIA,
-                        category=category_enum
-                    )
-                    self.db.add(task)
-                    tasks.append(task)
-            
-            if self.db is not None:
-                self.db.commit()
-                print(f"Se guardaron {len(tasks)} tareas en la base de datos")
-            return tasks
+            items = self._generate_task_items(user_story)
+            return self._insert_tasks({user_story_id: items})[user_story_id]
             
         except Exception as e:
             print(f"Error generando tareas: {str(e)}")
@@ -199,6 +240,56 @@ class UserStoryService:
                 self.db.rollback()
             return []
 
+    def generate_tasks_for_user_stories(self, user_story_ids: List[int],
+                                        workers: Optional[int] = None) -> Dict[int, List[TaskDB]]:
+        """
+        Genera las tareas de varias historias de usuario a la vez
+        
+        Las llamadas al LLM de cada historia (generación y categorización) se
+        reparten entre un pool de hilos; la sesión de base de datos solo se usa
+        al final, en una única inserción de todas las tareas.
+        
+        Args:
+            user_story_ids: IDs de las historias de usuario
+            workers: Historias procesadas a la vez (por defecto USER_STORY_TASK_WORKERS)
+            
+        Returns:
+            Dict[int, List[TaskDB]]: Tareas creadas por historia; las historias
+            inexistentes o cuya generación falló no aparecen
+        """
+        if not self.ai_service:
+            print("⚠️ Servicio de IA no disponible para generar tareas")
+            return {}
+        
+        user_stories = []
+        for user_story_id in dict.fromkeys(user_story_ids):
+            user_story = self.get_user_story(user_story_id)
+            if user_story is None:
+                print(f"User story {user_story_id} no encontrada")
+            else:
+                user_stories.append(user_story)
+        if not user_stories:
+            return {}
+        
+        items_by_story = {}
+        workers = max(1, min(workers or TASK_GENERATION_WORKERS, len(user_stories)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='user-story-tasks') as executor:
+            futures = {user_story.id: executor.submit(self._generate_task_items, user_story)
+                       for user_story in user_stories}
+            for user_story_id, future in futures.items():
+                try:
+                    items_by_story[user_story_id] = future.result()
+                except Exception as e:
+                    print(f"Error generando tareas para user story {user_story_id}: {str(e)}")
+        
+        try:
+            return self._insert_tasks(items_by_story)
+        except Exception as e:
+            print(f"Error guardando tareas: {str(e)}")
+            if self.db is not None:
+                self.db.rollback()
+            return {}
+
     def get_tasks_for_user_story(self, user_story_id: int) -> List[TaskDB]:
         if self.db is None:
             # Modo JSON fallback - retornar lista vacía por ahora
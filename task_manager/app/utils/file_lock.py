@@ -0,0 +1,189 @@
+"""
+Coordinación entre procesos para los archivos JSON de ``data/``.
+
+``file_lock`` toma un bloqueo consultivo (``fcntl.flock``) sobre un archivo
+auxiliar ``<archivo>.lock``: exclusivo para escribir, compartido para leer. Así
+varios workers de gunicorn pueden hacer leer-modificar-escribir sobre el mismo
+archivo sin perder actualizaciones. El bloqueo es reentrante dentro de un
+mismo hilo (una sección anidada reutiliza el descriptor ya bloqueado).
+
+``atomic_write_json`` escribe en un temporal del mismo directorio y lo publica
+con ``os.replace``: los lectores ven el archivo anterior o el nuevo completo.
+
+En plataformas sin ``fcntl`` (Windows) el bloqueo se limita a los hilos del
+proceso actual.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+_held = threading.local()
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+
+
+def lock_path_for(path: Path) -> Path:
+    """Archivo auxiliar usado como cerrojo de ``path``"""
+    path = Path(path)
+    return path.with_name(path.name + '.lock')
+
+
+def _held_locks() -> dict:
+    if not hasattr(_held, 'locks'):
+        _held.locks = {}
+    return _held.locks
+
+
+def _thread_lock(key: str) -> threading.RLock:
+    with _thread_locks_guard:
+        lock = _thread_locks.get(key)
+        if lock is None:
+            lock = threading.RLock()
+            _thread_locks[key] = lock
+        return lock
+
+
+def _flock(fd: int, exclusive: bool, timeout: Optional[float]) -> None:
+    """Bloquea ``fd``; con timeout reintenta en modo no bloqueante"""
+    operation = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+    if timeout is None:
+        fcntl.flock(fd, operation)
+        return
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fcntl.flock(fd, operation | fcntl.LOCK_NB)
+            return
+        except BlockingIOError:
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"No se pudo bloquear el archivo en {timeout} segundos")
+            time.sleep(0.01)
+
+
+@contextmanager
+def file_lock(path: Path, exclusive: bool = True, timeout: Optional[float] = None):
+    """
+    Bloqueo consultivo entre procesos asociado a un archivo.
+
+    Args:
+        path: Archivo protegido (el cerrojo se toma sobre ``<path>.lock``)
+        exclusive: True para escritura, False para lectura compartida
+        timeout: Segundos máximos de espera (None espera indefinidamente)
+
+    Raises:
+        TimeoutError: Si no se obtiene el bloqueo a tiempo
+    """
+    lock_file = lock_path_for(path)
+    key = str(lock_file.resolve())
+    held = _held_locks()
+
+    if key in held:
+        # Sección anidada en el mismo hilo: reutilizar el bloqueo
+        entry = held[key]
+        if exclusive and not entry['exclusive']:
+            if fcntl is not None:
+                _flock(entry['fd'], True, timeout)
+            entry['exclusive'] = True
+        entry['depth'] += 1
+        try:
+            yield
+        finally:
+            entry['depth'] -= 1
+        return
+
+    if fcntl is None:
+        # Sin fcntl solo se coordinan los hilos del proceso
+        thread_lock = _thread_lock(key)
+        if not thread_lock.acquire(timeout=-1 if timeout is None else timeout):
+            raise TimeoutError(f"No se pudo bloquear el archivo en {timeout} segundos")
+        held[key] = {'fd': None, 'exclusive': exclusive, 'depth': 1}
+        try:
+            yield
+        finally:
+            del held[key]
+            thread_lock.release()
+        return
+
+    # Cada hilo abre su propio descriptor: flock también los coordina entre sí
+    lock_file.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(str(lock_file), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        _flock(fd, exclusive, timeout)
+        held[key] = {'fd': fd, 'exclusive': exclusive, 'depth': 1}
+        try:
+            yield
+        finally:
+            del held[key]
+    finally:
+        # Cerrar el descriptor libera el flock
+        os.close(fd)
+
+
+def atomic_write_json(path: Path, data: Any, **dump_kwargs) -> None:
+    """
+    Escribe un JSON en un temporal del mismo directorio y lo publica con os.replace.
+
+    Args:
+        path: Archivo destino
+        data: Datos serializables
+        **dump_kwargs: Argumentos para json.dump (indent, ensure_ascii, default...)
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=f'.{path.name}.', suffix='.tmp', dir=str(path.parent))
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, **dump_kwargs)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+def read_json(path: Path, default: Any = None) -> Any:
+    """Lee un JSON con bloqueo compartido; devuelve ``default`` si no existe"""
+    path = Path(path)
+    with file_lock(path, exclusive=False):
+        if not path.exists():
+            return default
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+
+def update_json(path: Path, mutate: Callable[[Any], Any], default: Any = None, **dump_kwargs) -> Any:
+    """
+    Leer-modificar-escribir de un JSON bajo bloqueo exclusivo.
+
+    Args:
+        path: Archivo JSON
+        mutate: Recibe los datos actuales y devuelve los nuevos
+        default: Valor inicial si el archivo no existe
+        **dump_kwargs: Argumentos para json.dump
+
+    Returns:
+        Any: Los datos escritos
+    """
+    path = Path(path)
+    with file_lock(path):
+        data = default
+        if path.exists():
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        data = mutate(data)
+        atomic_write_json(path, data, **dump_kwargs)
+        return data
@@ -0,0 +1,361 @@
+"""
+Almacén en memoria del archivo JSON de tareas (modo sin base de datos).
+
+El archivo se parsea una sola vez por proceso y se mantiene un diccionario
+id -> registro, índices secundarios por status, priority y user_story_id y los
+contadores de estadísticas.
+
+Las escrituras no reescriben ``tasks.json``: cada mutación se añade como una
+línea a un diario ``tasks.json.wal`` (JSON lines, operaciones idempotentes
+``put``/``delete``), con coste O(registro). Cada ``JSON_STORE_COMPACT_EVERY``
+operaciones el diario se compacta en una nueva instantánea ``tasks.json``
+escrita en un archivo temporal y publicada con ``os.replace``, de modo que un
+fallo nunca deja el archivo truncado. Al cargar se lee la instantánea y se
+reaplica el diario; si otro proceso solo ha añadido líneas, se aplican
+únicamente las nuevas.
+
+Las escrituras y la compactación se hacen bajo el bloqueo exclusivo entre
+procesos de ``app.utils.file_lock`` tras ponerse al día con el diario, por lo
+que varios workers pueden compartir el archivo sin perder actualizaciones ni
+repetir ids. Las recargas toman el bloqueo compartido.
+
+Compactar manualmente (por ejemplo antes de copiar ``tasks.json``):
+    python -m app.utils.json_store --compact
+"""
+import argparse
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.utils.file_lock import atomic_write_json, file_lock
+from app.utils.task_stats import TaskStatsCounters
+
+# Operaciones del diario tras las que se compacta en una instantánea
+COMPACT_EVERY = int(os.getenv('JSON_STORE_COMPACT_EVERY', '200'))
+
+# fsync tras cada línea del diario (durabilidad frente a cortes de corriente)
+FSYNC = (os.getenv('JSON_STORE_FSYNC', 'true') or 'true').lower() == 'true'
+
+
+def file_signature(path: Path) -> Optional[Tuple[int, int]]:
+    """Firma (mtime_ns, tamaño) de un archivo o None si no existe"""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _index_key(field: str, value: Any) -> Any:
+    """Normaliza el valor indexado igual que los filtros del listado"""
+    if field == 'priority':
+        return str(value or '').lower()
+    return value
+
+
+class JSONTaskStore:
+    """
+    Registros del archivo JSON de tareas con índices en memoria y diario de escrituras.
+
+    Los registros devueltos por ``all``, ``get`` y ``find`` son los internos del
+    almacén y no deben modificarse; los cambios se hacen con ``insert``,
+    ``update`` y ``delete``, que actualizan índices, contadores y diario.
+    """
+
+    INDEXED_FIELDS = ('status', 'priority', 'user_story_id')
+
+    def __init__(self, path: Path, compact_every: Optional[int] = None):
+        self.path = Path(path)
+        self.wal_path = self.path.with_name(self.path.name + '.wal')
+        self.compact_every = compact_every if compact_every is not None else COMPACT_EVERY
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._snapshot_signature = None
+        self._wal_signature = None
+        self._wal_offset = 0
+        self._wal_ops = 0
+        self._records = []
+        self._by_id = {}
+        self._indexes = {field: {} for field in self.INDEXED_FIELDS}
+        self._counters = TaskStatsCounters()
+        self._max_id = 0
+
+    # -- Carga -------------------------------------------------------------
+
+    def _ensure_loaded(self) -> None:
+        """Recarga la instantánea y el diario si otro proceso los ha cambiado"""
+        if self._loaded and file_signature(self.path) == self._snapshot_signature \
+                and file_signature(self.wal_path) == self._wal_signature:
+            return
+        with file_lock(self.path, exclusive=False):
+            self._load()
+
+    def _load(self) -> None:
+        """Carga completa o de la cola del diario (con el bloqueo ya tomado)"""
+        snapshot_signature = file_signature(self.path)
+        wal_signature = file_signature(self.wal_path)
+        if self._loaded and snapshot_signature == self._snapshot_signature:
+            if wal_signature == self._wal_signature:
+                return
+            if wal_signature is not None and wal_signature[1] >= self._wal_offset:
+                # Solo se han añadido líneas: aplicar la cola del diario
+                self._replay_wal(self._wal_offset)
+                self._wal_signature = wal_signature
+                return
+        records = []
+        if snapshot_signature is not None:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                records = json.load(f)
+        self._rebuild(records)
+        self._snapshot_signature = snapshot_signature
+        self._wal_offset = 0
+        self._wal_ops = 0
+        self._replay_wal(0)
+        self._wal_signature = file_signature(self.wal_path)
+        self._loaded = True
+
+    def _rebuild(self, records: List[Dict[str, Any]]) -> None:
+        self._records = records
+        self._by_id = {}
+        self._indexes = {field: {} for field in self.INDEXED_FIELDS}
+        self._max_id = 0
+        for record in records:
+            self._add_to_indexes(record)
+        self._counters = TaskStatsCounters.from_records(records)
+
+    def _replay_wal(self, offset: int) -> None:
+        """Aplica las operaciones del diario a partir de ``offset``"""
+        try:
+            with open(self.wal_path, 'rb') as f:
+                f.seek(offset)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        position = offset
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b'\n'):
+                # Línea incompleta (escritura interrumpida): se ignora
+                break
+            position += len(line)
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line.decode('utf-8'))
+            except ValueError:
+                continue
+            self._apply_entry(entry)
+            self._wal_ops += 1
+        self._wal_offset = position
+
+    def _apply_entry(self, entry: Dict[str, Any]) -> None:
+        """Aplica una operación del diario (idempotente)"""
+        if entry.get('op') == 'put':
+            record = entry['record']
+            current = self._by_id.get(record.get('id'))
+            if current is None:
+                self._records.append(record)
+                self._add_to_indexes(record)
+                self._counters.apply(None, record)
+            else:
+                previous = dict(current)
+                current.clear()
+                current.update(record)
+                self._reindex(current, previous)
+        elif entry.get('op') == 'delete':
+            record = self._by_id.pop(entry.get('id'), None)
+            if record is not None:
+                self._records = [item for item in self._records if item is not record]
+                self._remove_from_indexes(record)
+                self._counters.apply(record, None)
+
+    def _add_to_indexes(self, record: Dict[str, Any]) -> None:
+        task_id = record.get('id')
+        if task_id is not None:
+            self._by_id[task_id] = record
+            if isinstance(task_id, int) and task_id > self._max_id:
+                self._max_id = task_id
+        for field in self.INDEXED_FIELDS:
+            key = _index_key(field, record.get(field))
+            self._indexes[field].setdefault(key, {})[id(record)] = record
+
+    def _remove_from_indexes(self, record: Dict[str, Any], values: Optional[Dict[str, Any]] = None) -> None:
+        """Quita el registro de los índices usando ``values`` como valores indexados"""
+        values = values or record
+        for field in self.INDEXED_FIELDS:
+            key = _index_key(field, values.get(field))
+            bucket = self._indexes[field].get(key)
+            if bucket is not None:
+                bucket.pop(id(record), None)
+                if not bucket:
+                    del self._indexes[field][key]
+
+    def _reindex(self, record: Dict[str, Any], previous: Dict[str, Any]) -> None:
+        """Actualiza índices y contadores de un registro modificado en el sitio"""
+        self._remove_from_indexes(record, previous)
+        self._by_id.pop(previous.get('id'), None)
+        self._add_to_indexes(record)
+        self._counters.apply(previous, record)
+
+    # -- Diario y compactación ---------------------------------------------
+
+    def _append(self, entry: Dict[str, Any]) -> None:
+        """Añade una operación al diario con una sola escritura O_APPEND"""
+        line = (json.dumps(entry, ensure_ascii=False, default=str) + '\n').encode('utf-8')
+        self.path.parent.mkdir(exist_ok=True)
+        try:
+            fd = os.open(str(self.wal_path), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line)
+                if FSYNC:
+                    os.fsync(fd)
+            finally:
+                os.close(fd)
+        except Exception:
+            # El contenido en memoria ya no coincide con el disco
+            self._loaded = False
+            raise
+        self._wal_offset += len(line)
+        self._wal_ops += 1
+        self._wal_signature = file_signature(self.wal_path)
+        if self.compact_every and self._wal_ops >= self.compact_every:
+            self._compact()
+
+    def _compact(self) -> None:
+        """Publica una instantánea con todos los registros y vacía el diario"""
+        atomic_write_json(self.path, self._records, indent=2, ensure_ascii=False, default=str)
+        self._snapshot_signature = file_signature(self.path)
+        # Si el proceso cae antes de vaciar el diario, reaplicarlo es idempotente
+        with open(self.wal_path, 'wb'):
+            pass
+        self._wal_offset = 0
+        self._wal_ops = 0
+        self._wal_signature = file_signature(self.wal_path)
+
+    def compact(self) -> None:
+        """Compacta el diario en la instantánea ``tasks.json``"""
+        with self._lock, file_lock(self.path):
+            self._load()
+            self._compact()
+
+    # -- Lectura -----------------------------------------------------------
+
+    def all(self) -> List[Dict[str, Any]]:
+        """Todos los registros, en el orden del archivo"""
+        with self._lock:
+            self._ensure_loaded()
+            return list(self._records)
+
+    def get(self, task_id: Any) -> Optional[Dict[str, Any]]:
+        """Registro por id en O(1)"""
+        with self._lock:
+            self._ensure_loaded()
+            return self._by_id.get(task_id)
+
+    def find(self, field: str, value: Any) -> List[Dict[str, Any]]:
+        """Registros cuyo campo indexado vale ``value``"""
+        if field not in self.INDEXED_FIELDS:
+            raise ValueError(f"Campo no indexado: '{field}'")
+        with self._lock:
+            self._ensure_loaded()
+            return list(self._indexes[field].get(_index_key(field, value), {}).values())
+
+    def stats(self) -> Dict[str, Any]:
+        """Estadísticas a partir de los contadores en memoria"""
+        with self._lock:
+            self._ensure_loaded()
+            return self._counters.to_stats()
+
+    def next_id(self) -> int:
+        """Siguiente id disponible"""
+        with self._lock:
+            self._ensure_loaded()
+            return self._max_id + 1
+
+    # -- Escritura ---------------------------------------------------------
+
+    def insert(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Añade un registro y lo registra en el diario.
+
+        Si el registro no trae id se le asigna el siguiente disponible.
+        """
+        with self._lock, file_lock(self.path):
+            self._load()
+            if record.get('id') is None:
+                record['id'] = self._max_id + 1
+            self._records.append(record)
+            self._add_to_indexes(record)
+            self._counters.apply(None, record)
+            self._append({'op': 'put', 'record': record})
+            return record
+
+    def update(self, task_id: Any, mutate: Callable[[Dict[str, Any]], None]) -> Optional[Dict[str, Any]]:
+        """
+        Modifica un registro en el sitio y lo registra en el diario.
+
+        Args:
+            task_id: Id del registro
+            mutate: Función que recibe el registro y lo modifica
+
+        Returns:
+            Optional[Dict[str, Any]]: El registro actualizado o None si no existe
+        """
+        with self._lock, file_lock(self.path):
+            self._load()
+            record = self._by_id.get(task_id)
+            if record is None:
+                return None
+            previous = dict(record)
+            mutate(record)
+            self._reindex(record, previous)
+            self._append({'op': 'put', 'record': record})
+            return record
+
+    def delete(self, task_id: Any) -> Optional[Dict[str, Any]]:
+        """Elimina un registro y lo registra en el diario; devuelve el eliminado o None"""
+        with self._lock, file_lock(self.path):
+            self._load()
+            record = self._by_id.pop(task_id, None)
+            if record is None:
+                return None
+            self._records = [item for item in self._records if item is not record]
+            self._remove_from_indexes(record)
+            self._counters.apply(record, None)
+            self._append({'op': 'delete', 'id': task_id})
+            return record
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_json_store(path: Path) -> JSONTaskStore:
+    """Devuelve el almacén del proceso asociado al archivo indicado"""
+    key = str(Path(path).resolve())
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = JSONTaskStore(path)
+            _stores[key] = store
+        return store
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Comando de mantenimiento del almacén JSON"""
+    default_path = Path(__file__).parent.parent.parent / 'data' / 'tasks.json'
+    parser = argparse.ArgumentParser(description='Mantenimiento del almacén JSON de tareas')
+    parser.add_argument('--compact', action='store_true', help='Compacta el diario en tasks.json')
+    parser.add_argument('--path', default=str(default_path), help='Ruta del archivo de tareas')
+    args = parser.parse_args(argv)
+
+    if args.compact:
+        store = get_json_store(Path(args.path))
+        store.compact()
+        print(f"✅ Diario compactado en {args.path} ({len(store.all())} registros).")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -1,10 +1,15 @@
 import logging
 from typing import List, Dict, Any, Optional
-from app.models.task_db import TaskDB
+from app.models.task_db import TaskDB, StatusEnum
 from app.models.task import Task
+from app.models.enums import TaskCategory, PriorityEnum
+from app.models.user_story_db import UserStory
 from app.database.azure_connection import get_db_session
-from sqlalchemy.orm import joinedload
-from sqlalchemy import func
+from app.utils.task_stats import build_stats, read_task_stats
+from app.utils.json_store import get_json_store
+from sqlalchemy.orm import joinedload, load_only
+from sqlalchemy import func, and_, or_, case
+import base64
 import json
 from pathlib import Path
 from datetime import datetime
@@ -29,12 +34,215 @@ def truncate_text(text: str, max_words: int = 30) -> str:
     
     return " ".join(words[:max_words]) + "..."
 
+def truncate_prefix(prefix: Optional[str], max_words: int = 30, max_chars: int = None) -> str:
+    """
+    Trunca un prefijo de descripción leído con SUBSTR.
+    
+    Si el prefijo ocupa max_chars + 1 caracteres el texto original era más
+    largo: se descarta la última palabra (puede estar cortada) y se añaden
+    puntos suspensivos.
+    
+    Args:
+        prefix: Prefijo de hasta max_chars + 1 caracteres
+        max_words: Número máximo de palabras
+        max_chars: Longitud del prefijo (por defecto DESCRIPTION_PREFIX_CHARS)
+        
+    Returns:
+        str: Texto truncado
+    """
+    if max_chars is None:
+        max_chars = DESCRIPTION_PREFIX_CHARS
+    if not prefix or len(prefix) <= max_chars:
+        return truncate_text(prefix, max_words)
+    
+    words = prefix[:max_chars].split()
+    if not prefix[max_chars].isspace() and not prefix[max_chars - 1].isspace():
+        words = words[:-1]
+    return " ".join(words[:max_words]) + "..."
+
+# Caracteres de la descripción que se leen en la vista resumida (holgado para 30 palabras)
+DESCRIPTION_PREFIX_CHARS = 500
+
+# Vistas del listado: 'full' con todas las columnas, 'summary' solo las del listado
+TASK_LIST_VIEWS = ('full', 'summary')
+
+# Columnas de TaskDB que carga la vista resumida
+SUMMARY_COLUMNS = (
+    'id', 'title', 'priority', 'status', 'effort', 'assigned_to', 'assigned_role',
+    'category', 'tokens_gastados', 'costos', 'created_at', 'updated_at', 'user_story_id',
+    'description_truncated'
+)
+
+# Campos pesados que la vista resumida omite
+SUMMARY_EXCLUDED_FIELDS = ('description', 'risk_analysis', 'mitigation_plan', 'user_story_description')
+
+def parse_view(view: Optional[str]) -> str:
+    """
+    Valida la vista del listado.
+    
+    Raises:
+        ValueError: Si la vista no es válida
+    """
+    view = (view or 'full').strip().lower()
+    if view not in TASK_LIST_VIEWS:
+        raise ValueError(f"Vista no válida: '{view}'. Valores permitidos: {', '.join(TASK_LIST_VIEWS)}")
+    return view
+
+# Filtros admitidos por el listado de tareas
+TASK_FILTER_KEYS = ('status', 'priority', 'category', 'assigned_to', 'user_story_id', 'created_from', 'created_to')
+
+# Claves de ordenación admitidas (un '-' delante indica orden descendente)
+TASK_SORT_KEYS = ('created_at', 'updated_at', 'effort', 'title', 'id')
+DEFAULT_SORT = '-created_at'
+
+def parse_sort(sort: Optional[str]) -> tuple:
+    """
+    Interpreta una clave de ordenación del listado de tareas.
+    
+    Args:
+        sort: Clave de ordenación, por ejemplo 'effort' o '-created_at'
+        
+    Returns:
+        tuple: (campo, descendente)
+        
+    Raises:
+        ValueError: Si la clave no está soportada
+    """
+    sort = (sort or DEFAULT_SORT).strip()
+    descending = sort.startswith('-')
+    field = sort.lstrip('-+')
+    if field not in TASK_SORT_KEYS:
+        raise ValueError(f"Orden inválido. Valores permitidos: {', '.join(TASK_SORT_KEYS)}")
+    return field, descending
+
+def _parse_filter_list(value: Any) -> List[str]:
+    """Convierte un valor simple, separado por comas o lista en una lista de strings"""
+    if isinstance(value, (list, tuple, set)):
+        items = value
+    else:
+        items = str(value).split(',')
+    return [str(item).strip() for item in items if str(item).strip()]
+
+def _parse_filter_date(value: Any, end_of_day: bool = False) -> datetime:
+    """Convierte una fecha ISO en datetime; las fechas sin hora cubren el día completo"""
+    if isinstance(value, datetime):
+        return value
+    text = str(value).strip()
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        raise ValueError(f"Fecha inválida: {text}. Use el formato ISO (YYYY-MM-DD)")
+    if end_of_day and len(text) == 10:
+        parsed = parsed.replace(hour=23, minute=59, second=59, microsecond=999999)
+    return parsed
+
+def normalize_task_filters(filters: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Valida y normaliza los filtros del listado de tareas.
+    
+    status, priority y category aceptan un valor, una lista o valores separados
+    por comas; created_from y created_to son inclusivos.
+    
+    Args:
+        filters: Filtros recibidos (por ejemplo, los parámetros de la petición)
+        
+    Returns:
+        Dict[str, Any]: Filtros normalizados, sin las claves vacías
+        
+    Raises:
+        ValueError: Si algún filtro no es válido
+    """
+    normalized = {}
+    if not filters:
+        return normalized
+    
+    for key, value in filters.items():
+        if key not in TASK_FILTER_KEYS:
+            raise ValueError(f"Filtro no soportado: {key}")
+        if value is None or value == '' or value == []:
+            continue
+        
+        if key == 'status':
+            values = _parse_filter_list(value)
+            invalid = [v for v in values if v not in Task.VALID_STATUSES]
+            if invalid:
+                raise ValueError(f'Estado inválido. Valores permitidos: {", ".join(Task.VALID_STATUSES)}')
+            normalized[key] = values
+        elif key == 'priority':
+            values = [v.lower() for v in _parse_filter_list(value)]
+            invalid = [v for v in values if v not in Task.VALID_PRIORITIES]
+            if invalid:
+                raise ValueError(f'Prioridad inválida. Valores permitidos: {", ".join(Task.VALID_PRIORITIES)}')
+            normalized[key] = values
+        elif key == 'category':
+            values = _parse_filter_list(value)
+            invalid = [v for v in values if v not in TaskCategory.get_values()]
+            if invalid:
+                raise ValueError(f'Categoría inválida. Valores permitidos: {", ".join(TaskCategory.get_values())}')
+            normalized[key] = values
+        elif key == 'user_story_id':
+            try:
+                normalized[key] = int(value)
+            except (TypeError, ValueError):
+                raise ValueError("El filtro user_story_id debe ser un número entero")
+        elif key == 'created_from':
+            normalized[key] = _parse_filter_date(value)
+        elif key == 'created_to':
+            normalized[key] = _parse_filter_date(value, end_of_day=True)
+        else:
+            normalized[key] = str(value)
+    
+    return normalized
+
+def encode_cursor(value: Any, task_id: int, sort: str = DEFAULT_SORT) -> str:
+    """
+    Codifica la posición de una tarea como cursor opaco de paginación.
+    
+    Args:
+        value: Valor del campo de ordenación de la tarea (fecha en formato ISO, número o texto)
+        task_id: ID de la tarea
+        sort: Clave de ordenación con la que se generó la página
+        
+    Returns:
+        str: Cursor en base64 seguro para URLs
+    """
+    raw = json.dumps([value if value is not None else '', task_id, sort]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def decode_cursor(cursor: str, sort: str = DEFAULT_SORT) -> tuple:
+    """
+    Decodifica un cursor generado por encode_cursor.
+    
+    Args:
+        cursor: Cursor opaco recibido del cliente
+        sort: Clave de ordenación de la petición actual
+        
+    Returns:
+        tuple: (valor del campo de ordenación, id de la tarea)
+        
+    Raises:
+        ValueError: Si el cursor no es válido o se generó con otro orden
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        value, task_id = payload[0], int(payload[1])
+        cursor_sort = payload[2] if len(payload) > 2 else DEFAULT_SORT
+    except Exception:
+        raise ValueError("Cursor de paginación inválido")
+    if cursor_sort != sort:
+        raise ValueError("El cursor de paginación no corresponde al orden solicitado")
+    return value, task_id
+
 class TaskManager:
     """
     Clase para gestionar las tareas usando Azure MySQL con SQLAlchemy.
     Mantiene compatibilidad con el modelo Task existente.
     """
     
+    # Tamaños de página para el listado paginado por cursor
+    DEFAULT_PAGE_SIZE = 50
+    MAX_PAGE_SIZE = 200
+    
     def __init__(self, use_database: bool = True):
         """
         Inicializa el gestor de tareas.
@@ -64,108 +272,391 @@ class TaskManager:
             # Modo JSON (fallback)
             return 1
     
-    def get_all_tasks(self) -> List[Dict[str, Any]]:
+    def get_all_tasks(self, filters: Optional[Dict[str, Any]] = None, sort: Optional[str] = None,
+                      view: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Obtiene todas las tareas con datos del user story asociado y fecha formateada.
+        
+        Args:
+            filters: Filtros opcionales (ver TASK_FILTER_KEYS), aplicados en SQL
+            sort: Clave de ordenación opcional (ver TASK_SORT_KEYS), por defecto '-created_at'
+            view: 'full' (por defecto) o 'summary'; la vista resumida solo lee las
+                columnas del listado y un prefijo de las descripciones, sin los
+                campos de texto pesados (ver SUMMARY_EXCLUDED_FIELDS)
+            
+        Raises:
+            ValueError: Si algún filtro, la clave de ordenación o la vista no son válidos
         """
+        filters = normalize_task_filters(filters)
+        sort_field, descending = parse_sort(sort)
+        view = parse_view(view)
+        
         if self.use_database:
             session = get_db_session()
             if session is None:
                 # No hay conexión a base de datos, usar modo JSON
                 print("⚠️ No hay conexión a base de datos - usando modo JSON")
-                return self._get_tasks_from_json()
+                return self._apply_view(self._query_tasks_from_json(filters, sort_field, descending), view)
             try:
-                db_tasks = (
-                    session.query(TaskDB)
-                    .options(joinedload(TaskDB.user_story))
-                    .order_by(TaskDB.created_at.desc())
+                rows = (
+                    self._apply_filters(self._list_query(session, view), filters)
+                    .order_by(*self._order_by(sort_field, descending))
                     .all()
                 )
-                tasks = []
-                for task in db_tasks:
-                    task_dict = task.to_dict()
-                    # Formatear fecha de creación
-                    if task.created_at:
-                        task_dict['created_at'] = task.created_at.isoformat()
-                    else:
-                        task_dict['created_at'] = ''
-                    
-                    # Truncar descripción de la tarea
-                    task_dict['description_truncated'] = truncate_text(task_dict.get('description', ''), 30)
-                    
-                    # Añadir datos del user story asociado
-                    user_story = getattr(task, 'user_story', None)
-                    if user_story:
-                        task_dict['user_story_project'] = user_story.project
-                        task_dict['user_story_role'] = user_story.role
-                        task_dict['user_story_goal'] = user_story.goal
-                        task_dict['user_story_reason'] = user_story.reason
-                        task_dict['user_story_priority'] = user_story.priority.value if user_story.priority else ''
-                        task_dict['user_story_description'] = user_story.description
-                        task_dict['user_story_description_truncated'] = truncate_text(user_story.description, 30)
-                    else:
-                        task_dict['user_story_project'] = ''
-                        task_dict['user_story_role'] = ''
-                        task_dict['user_story_goal'] = ''
-                        task_dict['user_story_reason'] = ''
-                        task_dict['user_story_priority'] = ''
-                        task_dict['user_story_description'] = ''
-                        task_dict['user_story_description_truncated'] = ''
-                    tasks.append(task_dict)
-                return tasks
+                return [self._list_row_to_dict(row, view) for row in rows]
             finally:
                 if session is not None:
                     session.close()
         else:
             # Modo JSON (fallback)
-            return self._get_tasks_from_json()
+            return self._apply_view(self._query_tasks_from_json(filters, sort_field, descending), view)
+
+    def _list_query(self, session, view: str = 'full'):
+        """Consulta base del listado según la vista"""
+        if view != 'summary':
+            return session.query(TaskDB).options(joinedload(TaskDB.user_story))
+        # Proyección ligera: columnas del listado, descripciones truncadas y los
+        # campos cortos del user story, sin columnas TEXT completas. Solo las
+        # filas sin description_truncated (anteriores al backfill) leen un
+        # prefijo de la descripción
+        return (
+            session.query(
+                TaskDB,
+                self._legacy_description_prefix(TaskDB),
+                UserStory.project,
+                UserStory.role,
+                UserStory.goal,
+                UserStory.reason,
+                UserStory.priority,
+                UserStory.description_truncated,
+                self._legacy_description_prefix(UserStory)
+            )
+            .outerjoin(UserStory, TaskDB.user_story_id == UserStory.id)
+            .options(load_only(*[getattr(TaskDB, column) for column in SUMMARY_COLUMNS]))
+        )
+
+    def _legacy_description_prefix(self, model):
+        """Prefijo SUBSTR de la descripción solo cuando falta description_truncated"""
+        return case(
+            (model.description_truncated.is_(None), func.substr(model.description, 1, DESCRIPTION_PREFIX_CHARS + 1)),
+            else_=None
+        )
+
+    def _list_row_to_dict(self, row, view: str = 'full') -> Dict[str, Any]:
+        """Convierte una fila del listado al diccionario de la vista indicada"""
+        if view != 'summary':
+            return self._task_row_to_dict(row)
+        (task, description_prefix, project, role, goal, reason, story_priority,
+         story_description_truncated, story_description_prefix) = row
+        if story_description_truncated is None and story_description_prefix is not None:
+            story_description_truncated = truncate_prefix(story_description_prefix)
+        return {
+            'id': task.id,
+            'title': task.title,
+            'description_truncated': (
+                task.description_truncated if task.description_truncated is not None
+                else truncate_prefix(description_prefix)
+            ),
+            'priority': task.priority.value.lower() if task.priority else 'media',
+            'effort': task.effort,
+            'status': task.status.value if task.status else 'pendiente',
+            'assigned_to': task.assigned_to,
+            'assigned_role': task.assigned_role,
+            'created_at': task.created_at.isoformat() if task.created_at else '',
+            'updated_at': task.updated_at.isoformat() if task.updated_at else None,
+            'category': task.category.value if task.category else TaskCategory.OTRO.value,
+            'tokens_gastados': task.tokens_gastados,
+            'costos': task.costos,
+            'user_story_id': task.user_story_id,
+            'user_story_project': project or '',
+            'user_story_role': role or '',
+            'user_story_goal': goal or '',
+            'user_story_reason': reason or '',
+            'user_story_priority': story_priority.value if story_priority else '',
+            'user_story_description_truncated': story_description_truncated or ''
+        }
+
+    def _apply_view(self, tasks: List[Dict[str, Any]], view: str) -> List[Dict[str, Any]]:
+        """Quita los campos pesados de las tareas del archivo JSON en la vista resumida"""
+        if view != 'summary':
+            return tasks
+        for task in tasks:
+            for field in SUMMARY_EXCLUDED_FIELDS:
+                task.pop(field, None)
+        return tasks
+
+    def _apply_filters(self, query, filters: Dict[str, Any]):
+        """Traduce los filtros normalizados a cláusulas WHERE de SQLAlchemy"""
+        if not filters:
+            return query
+        if 'status' in filters:
+            query = query.filter(TaskDB.status.in_([StatusEnum(v) for v in filters['status']]))
+        if 'priority' in filters:
+            query = query.filter(TaskDB.priority.in_([PriorityEnum(v.upper()) for v in filters['priority']]))
+        if 'category' in filters:
+            query = query.filter(TaskDB.category.in_([TaskCategory(v) for v in filters['category']]))
+        if 'assigned_to' in filters:
+            query = query.filter(TaskDB.assigned_to == filters['assigned_to'])
+        if 'user_story_id' in filters:
+            query = query.filter(TaskDB.user_story_id == filters['user_story_id'])
+        if 'created_from' in filters:
+            query = query.filter(TaskDB.created_at >= filters['created_from'])
+        if 'created_to' in filters:
+            query = query.filter(TaskDB.created_at <= filters['created_to'])
+        return query
+
+    def _order_by(self, sort_field: str, descending: bool) -> list:
+        """Devuelve las cláusulas ORDER BY, usando el id como desempate"""
+        column = getattr(TaskDB, sort_field)
+        if descending:
+            return [column.desc(), TaskDB.id.desc()]
+        return [column.asc(), TaskDB.id.asc()]
+
+    def _task_row_to_dict(self, task: TaskDB) -> Dict[str, Any]:
+        """Convierte una fila TaskDB al formato de listado con datos del user story"""
+        task_dict = task.to_dict()
+        # Formatear fecha de creación
+        if task.created_at:
+            task_dict['created_at'] = task.created_at.isoformat()
+        else:
+            task_dict['created_at'] = ''
+        
+        # Descripción truncada guardada al escribir (se calcula si la fila es anterior al backfill)
+        task_dict['description_truncated'] = (
+            task.description_truncated if task.description_truncated is not None
+            else truncate_text(task_dict.get('description', ''), 30)
+        )
+        
+        # Añadir datos del user story asociado
+        user_story = getattr(task, 'user_story', None)
+        if user_story:
+            task_dict['user_story_project'] = user_story.project
+            task_dict['user_story_role'] = user_story.role
+            task_dict['user_story_goal'] = user_story.goal
+            task_dict['user_story_reason'] = user_story.reason
+            task_dict['user_story_priority'] = user_story.priority.value if user_story.priority else ''
+            task_dict['user_story_description'] = user_story.description
+            task_dict['user_story_description_truncated'] = (
+                user_story.description_truncated if user_story.description_truncated is not None
+                else truncate_text(user_story.description, 30)
+            )
+        else:
+            task_dict['user_story_project'] = ''
+            task_dict['user_story_role'] = ''
+            task_dict['user_story_goal'] = ''
+            task_dict['user_story_reason'] = ''
+            task_dict['user_story_priority'] = ''
+            task_dict['user_story_description'] = ''
+            task_dict['user_story_description_truncated'] = ''
+        return task_dict
+
+    def _json_task_to_dict(self, task_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Convierte un registro del archivo JSON al formato de listado"""
+        return {
+            'id': task_data.get('id'),
+            'title': task_data.get('title', ''),
+            'description': task_data.get('description', ''),
+            'description_truncated': (
+                task_data['description_truncated'] if task_data.get('description_truncated') is not None
+                else truncate_text(task_data.get('description', ''), 30)
+            ),
+            'priority': task_data.get('priority', 'media'),
+            'status': task_data.get('status', 'pendiente'),
+            'effort': task_data.get('effort', 0),
+            'assigned_to': task_data.get('assigned_to', ''),
+            'assigned_role': task_data.get('assigned_role', ''),
+            'category': task_data.get('category', 'OTRO'),
+            'risk_analysis': task_data.get('risk_analysis', ''),
+            'mitigation_plan': task_data.get('mitigation_plan', ''),
+            'tokens_gastados': task_data.get('tokens_gastados', 0),
+            'costos': task_data.get('costos', 0.0),
+            'created_at': task_data.get('created_at', ''),
+            'updated_at': task_data.get('updated_at', ''),
+            'user_story_id': task_data.get('user_story_id'),
+            'user_story_project': '',
+            'user_story_role': '',
+            'user_story_goal': '',
+            'user_story_reason': '',
+            'user_story_priority': '',
+            'user_story_description': '',
+            'user_story_description_truncated': ''
+        }
+
+    def _json_file(self) -> Path:
+        """Ruta del archivo JSON de tareas"""
+        return Path(__file__).parent.parent.parent / 'data' / 'tasks.json'
+
+    def _json_store(self):
+        """Almacén en memoria del archivo JSON (compartido por el proceso)"""
+        return get_json_store(self._json_file())
 
     def _get_tasks_from_json(self) -> List[Dict[str, Any]]:
         """Obtiene tareas desde archivo JSON"""
         try:
-            json_file = Path(__file__).parent.parent.parent / 'data' / 'tasks.json'
-            if not json_file.exists():
-                return []
-            
-            with open(json_file, 'r', encoding='utf-8') as f:
-                tasks_data = json.load(f)
-            
             # Convertir a formato esperado
-            tasks = []
-            for task_data in tasks_data:
-                task_dict = {
-                    'id': task_data.get('id'),
-                    'title': task_data.get('title', ''),
-                    'description': task_data.get('description', ''),
-                    'description_truncated': truncate_text(task_data.get('description', ''), 30),
-                    'priority': task_data.get('priority', 'media'),
-                    'status': task_data.get('status', 'pendiente'),
-                    'effort': task_data.get('effort', 0),
-                    'assigned_to': task_data.get('assigned_to', ''),
-                    'assigned_role': task_data.get('assigned_role', ''),
-                    'category': task_data.get('category', 'OTRO'),
-                    'risk_analysis': task_data.get('risk_analysis', ''),
-                    'mitigation_plan': task_data.get('mitigation_plan', ''),
-                    'tokens_gastados': task_data.get('tokens_gastados', 0),
-                    'costos': task_data.get('costos', 0.0),
-                    'created_at': task_data.get('created_at', ''),
-                    'updated_at': task_data.get('updated_at', ''),
-                    'user_story_id': task_data.get('user_story_id'),
-                    'user_story_project': '',
-                    'user_story_role': '',
-                    'user_story_goal': '',
-                    'user_story_reason': '',
-                    'user_story_priority': '',
-                    'user_story_description': '',
-                    'user_story_description_truncated': ''
-                }
-                tasks.append(task_dict)
-            
-            return tasks
+            return [self._json_task_to_dict(task_data) for task_data in self._json_store().all()]
+        except Exception as e:
+            print(f"Error cargando tareas desde JSON: {e}")
+            return []
+
+    def _candidate_tasks_from_json(self, filters: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Tareas candidatas usando el índice más selectivo de los filtros indexados"""
+        try:
+            store = self._json_store()
+            candidates = None
+            if 'user_story_id' in filters:
+                candidates = store.find('user_story_id', filters['user_story_id'])
+            for field in ('status', 'priority'):
+                if field in filters:
+                    records = [record for value in filters[field] for record in store.find(field, value)]
+                    if candidates is None or len(records) < len(candidates):
+                        candidates = records
+            if candidates is None:
+                return self._get_tasks_from_json()
+            return [self._json_task_to_dict(task_data) for task_data in candidates]
         except Exception as e:
             print(f"Error cargando tareas desde JSON: {e}")
             return []
 
+    def _query_tasks_from_json(self, filters: Dict[str, Any], sort_field: str, descending: bool) -> List[Dict[str, Any]]:
+        """Aplica sobre el archivo JSON la misma semántica de filtros y orden que en SQL"""
+        tasks = [task for task in self._candidate_tasks_from_json(filters) if self._matches_filters(task, filters)]
+        tasks.sort(key=lambda task: self._sort_key(task, sort_field), reverse=descending)
+        return tasks
+
+    def _matches_filters(self, task: Dict[str, Any], filters: Dict[str, Any]) -> bool:
+        """Indica si una tarea del archivo JSON cumple los filtros normalizados"""
+        if 'status' in filters and task.get('status') not in filters['status']:
+            return False
+        if 'priority' in filters and str(task.get('priority') or '').lower() not in filters['priority']:
+            return False
+        if 'category' in filters and task.get('category') not in filters['category']:
+            return False
+        if 'assigned_to' in filters and task.get('assigned_to') != filters['assigned_to']:
+            return False
+        if 'user_story_id' in filters and task.get('user_story_id') != filters['user_story_id']:
+            return False
+        if 'created_from' in filters or 'created_to' in filters:
+            try:
+                created_at = datetime.fromisoformat(str(task.get('created_at')))
+            except ValueError:
+                return False
+            if 'created_from' in filters and created_at < filters['created_from']:
+                return False
+            if 'created_to' in filters and created_at > filters['created_to']:
+                return False
+        return True
+
+    def _sort_key(self, task: Dict[str, Any], sort_field: str) -> tuple:
+        """Clave (valor, id) usada para ordenar y paginar tareas del archivo JSON"""
+        value = task.get(sort_field)
+        if sort_field in ('effort', 'id'):
+            value = int(value or 0)
+        else:
+            value = str(value or '')
+        return value, task.get('id') or 0
+
+    def iter_tasks_page(self, limit: Optional[int] = None, after: Optional[str] = None,
+                        filters: Optional[Dict[str, Any]] = None, sort: Optional[str] = None,
+                        view: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Obtiene una página de tareas usando paginación por cursor (keyset).
+        
+        Las tareas se ordenan por la clave indicada y el id como desempate (por
+        defecto created_at descendente, igual que get_all_tasks), pero solo se
+        materializa una página. Para recorrer todas las tareas basta con volver a
+        llamar pasando next_cursor como after, con los mismos filtros y orden.
+        
+        Args:
+            limit: Número máximo de tareas de la página (por defecto DEFAULT_PAGE_SIZE)
+            after: Cursor devuelto por la página anterior (None para la primera)
+            filters: Filtros opcionales (ver TASK_FILTER_KEYS)
+            sort: Clave de ordenación opcional (ver TASK_SORT_KEYS)
+            view: 'full' (por defecto) o 'summary' (ver get_all_tasks)
+            
+        Returns:
+            Dict[str, Any]: Tareas de la página, next_cursor y has_more
+            
+        Raises:
+            ValueError: Si el cursor, el límite, los filtros, el orden o la vista no son válidos
+        """
+        if limit is None:
+            limit = self.DEFAULT_PAGE_SIZE
+        if limit < 1:
+            raise ValueError("El límite de la página debe ser mayor que cero")
+        limit = min(limit, self.MAX_PAGE_SIZE)
+        filters = normalize_task_filters(filters)
+        sort_field, descending = parse_sort(sort)
+        sort = f"{'-' if descending else ''}{sort_field}"
+        cursor = decode_cursor(after, sort) if after else None
+        view = parse_view(view)
+        
+        if self.use_database:
+            session = get_db_session()
+            if session is None:
+                # No hay conexión a base de datos, usar modo JSON
+                return self._get_tasks_page_from_json(limit, cursor, filters, sort, view)
+            try:
+                query = self._apply_filters(self._list_query(session, view), filters)
+                if cursor:
+                    column = getattr(TaskDB, sort_field)
+                    value = cursor[0]
+                    if sort_field in ('created_at', 'updated_at'):
+                        value = datetime.fromisoformat(value)
+                    if descending:
+                        query = query.filter(or_(
+                            column < value,
+                            and_(column == value, TaskDB.id < cursor[1])
+                        ))
+                    else:
+                        query = query.filter(or_(
+                            column > value,
+                            and_(column == value, TaskDB.id > cursor[1])
+                        ))
+                # Se pide un registro extra para saber si hay más páginas
+                rows = (
+                    query.order_by(*self._order_by(sort_field, descending))
+                    .limit(limit + 1)
+                    .all()
+                )
+                tasks = [self._list_row_to_dict(row, view) for row in rows[:limit]]
+                return self._build_page(tasks, len(rows) > limit, limit, sort)
+            finally:
+                if session is not None:
+                    session.close()
+        else:
+            # Modo JSON (fallback)
+            return self._get_tasks_page_from_json(limit, cursor, filters, sort, view)
+
+    def _get_tasks_page_from_json(self, limit: int, cursor: Optional[tuple],
+                                  filters: Dict[str, Any], sort: str, view: str = 'full') -> Dict[str, Any]:
+        """Obtiene una página de tareas desde archivo JSON"""
+        sort_field, descending = parse_sort(sort)
+        tasks = self._query_tasks_from_json(filters, sort_field, descending)
+        if cursor:
+            cursor_key = self._sort_key({sort_field: cursor[0], 'id': cursor[1]}, sort_field)
+            tasks = [
+                t for t in tasks
+                if (self._sort_key(t, sort_field) < cursor_key if descending
+                    else self._sort_key(t, sort_field) > cursor_key)
+            ]
+        return self._build_page(self._apply_view(tasks[:limit], view), len(tasks) > limit, limit, sort)
+
+    def _build_page(self, tasks: List[Dict[str, Any]], has_more: bool, limit: int,
+                    sort: str = DEFAULT_SORT) -> Dict[str, Any]:
+        """Construye la respuesta de una página con el cursor de la siguiente"""
+        next_cursor = None
+        if has_more and tasks:
+            last = tasks[-1]
+            sort_field, _ = parse_sort(sort)
+            next_cursor = encode_cursor(last.get(sort_field), last.get('id') or 0, sort)
+        return {
+            'tasks': tasks,
+            'next_cursor': next_cursor,
+            'has_more': has_more,
+            'limit': limit
+        }
+
     def get_task(self, task_id: int) -> Optional[Task]:
         """
         Obtiene una tarea por su ID.
@@ -197,16 +688,9 @@ class TaskManager:
     def _get_task_from_json(self, task_id: int) -> Optional[Task]:
         """Obtiene una tarea desde archivo JSON"""
         try:
-            json_file = Path(__file__).parent.parent.parent / 'data' / 'tasks.json'
-            if not json_file.exists():
-                return None
-            
-            with open(json_file, 'r', encoding='utf-8') as f:
-                tasks_data = json.load(f)
-            
-            for task_data in tasks_data:
-                if task_data.get('id') == task_id:
-                    return Task.from_dict(task_data)
+            task_data = self._json_store().get(task_id)
+            if task_data is not None:
+                return Task.from_dict(task_data)
             
             return None
         except Exception as e:
@@ -279,41 +763,34 @@ class TaskManager:
     def _get_task_with_user_story_from_json(self, task_id: int) -> Optional[Dict[str, Any]]:
         """Obtiene una tarea con user story desde archivo JSON"""
         try:
-            json_file = Path(__file__).parent.parent.parent / 'data' / 'tasks.json'
-            if not json_file.exists():
-                return None
-            
-            with open(json_file, 'r', encoding='utf-8') as f:
-                tasks_data = json.load(f)
-            
-            for task_data in tasks_data:
-                if task_data.get('id') == task_id:
-                    # Convertir a formato esperado
-                    task_dict = {
-                        'id': task_data.get('id'),
-                        'title': task_data.get('title', ''),
-                        'description': task_data.get('description', ''),
-                        'priority': task_data.get('priority', 'media'),
-                        'status': task_data.get('status', 'pendiente'),
-                        'effort': task_data.get('effort', 0),
-                        'assigned_to': task_data.get('assigned_to', ''),
-                        'assigned_role': task_data.get('assigned_role', ''),
-                        'category': task_data.get('category', 'OTRO'),
-                        'risk_analysis': task_data.get('risk_analysis', ''),
-                        'mitigation_plan': task_data.get('mitigation_plan', ''),
-                        'tokens_gastados': task_data.get('tokens_gastados', 0),
-                        'costos': task_data.get('costos', 0.0),
-                        'created_at': task_data.get('created_at', ''),
-                        'updated_at': task_data.get('updated_at', ''),
-                        'user_story_id': task_data.get('user_story_id'),
-                        'user_story_project': '',
-                        'user_story_role': '',
-                        'user_story_goal': '',
-                        'user_story_reason': '',
-                        'user_story_priority': '',
-                        'user_story_description': ''
-                    }
-                    return task_dict
+            task_data = self._json_store().get(task_id)
+            if task_data is not None:
+                # Convertir a formato esperado
+                task_dict = {
+                    'id': task_data.get('id'),
+                    'title': task_data.get('title', ''),
+                    'description': task_data.get('description', ''),
+                    'priority': task_data.get('priority', 'media'),
+                    'status': task_data.get('status', 'pendiente'),
+                    'effort': task_data.get('effort', 0),
+                    'assigned_to': task_data.get('assigned_to', ''),
+                    'assigned_role': task_data.get('assigned_role', ''),
+                    'category': task_data.get('category', 'OTRO'),
+                    'risk_analysis': task_data.get('risk_analysis', ''),
+                    'mitigation_plan': task_data.get('mitigation_plan', ''),
+                    'tokens_gastados': task_data.get('tokens_gastados', 0),
+                    'costos': task_data.get('costos', 0.0),
+                    'created_at': task_data.get('created_at', ''),
+                    'updated_at': task_data.get('updated_at', ''),
+                    'user_story_id': task_data.get('user_story_id'),
+                    'user_story_project': '',
+                    'user_story_role': '',
+                    'user_story_goal': '',
+                    'user_story_reason': '',
+                    'user_story_priority': '',
+                    'user_story_description': ''
+                }
+                return task_dict
             
             return None
         except Exception as e:
@@ -339,6 +816,7 @@ class TaskManager:
             try:
                 # Crear instancia del modelo SQLAlchemy
                 task_db = TaskDB.from_dict(task_data)
+                task_db.description_truncated = truncate_text(task_data.get('description', ''), 30)
                 session.add(task_db)
                 session.commit()
                 session.refresh(task_db)
@@ -359,29 +837,23 @@ class TaskManager:
     def _create_task_in_json(self, task_data: dict) -> Task:
         """Crea una tarea en archivo JSON"""
         try:
-            json_file = Path(__file__).parent.parent.parent / 'data' / 'tasks.json'
-            json_file.parent.mkdir(exist_ok=True)
+            store = self._json_store()
             
-            # Cargar tareas existentes
-            if json_file.exists():
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    tasks_data = json.load(f)
-            else:
-                tasks_data = []
+            # Copia: el almacén indexa el registro por referencia y los cambios
+            # posteriores del llamador no deben saltarse el diario
+            task_data = dict(task_data)
             
-            # Generar ID único
-            max_id = max([item.get('id', 0) for item in tasks_data]) if tasks_data else 0
-            task_data['id'] = max_id + 1
+            # El almacén asigna el ID único bajo el bloqueo del archivo
+            task_data['id'] = None
             
             # Agregar timestamps
             now = datetime.now()
             task_data['created_at'] = now.isoformat()
             task_data['updated_at'] = now.isoformat()
+            task_data['description_truncated'] = truncate_text(task_data.get('description', ''), 30)
             
             # Guardar en JSON
-            tasks_data.append(task_data)
-            with open(json_file, 'w', encoding='utf-8') as f:
-                json.dump(tasks_data, f, indent=2, ensure_ascii=False, default=str)
+            store.insert(task_data)
             
             return Task.from_dict(task_data)
         except Exception as e:
@@ -412,8 +884,13 @@ class TaskManager:
                 
                 # Actualizar campos
                 for key, value in task_data.items():
+                    if key == 'category':
+                        # La columna Enum guarda el miembro, no su valor
+                        value = TaskCategory(value)
                     if hasattr(db_task, key):
                         setattr(db_task, key, value)
+                if 'description' in task_data:
+                    db_task.description_truncated = truncate_text(db_task.description, 30)
                 
                 session.commit()
                 session.refresh(db_task)
@@ -431,33 +908,120 @@ class TaskManager:
             # Modo JSON (fallback)
             return self._update_task_in_json(task_id, task_data)
 
+    def get_tasks_pending_enrichment(self, after_id: int = 0, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Obtiene una página de tareas sin enriquecer, en orden de ID.
+        
+        Una tarea está pendiente si no tiene análisis de riesgos o si sigue en la
+        categoría por defecto sin haber gastado tokens de IA.
+        
+        Args:
+            after_id: Devolver solo tareas con ID mayor (paginación por clave)
+            limit: Número máximo de tareas
+            
+        Returns:
+            List[Dict[str, Any]]: Tareas con id, title y description
+        """
+        if self.use_database:
+            session = get_db_session()
+            if session is None:
+                return self._get_tasks_pending_enrichment_from_json(after_id, limit)
+            try:
+                rows = (
+                    session.query(TaskDB.id, TaskDB.title, TaskDB.description)
+                    .filter(TaskDB.id > after_id)
+                    .filter(or_(
+                        TaskDB.risk_analysis.is_(None),
+                        TaskDB.risk_analysis == '',
+                        and_(TaskDB.category == TaskCategory.OTRO, TaskDB.tokens_gastados == 0)
+                    ))
+                    .order_by(TaskDB.id)
+                    .limit(limit)
+                    .all()
+                )
+                return [{'id': row.id, 'title': row.title, 'description': row.description or ''} for row in rows]
+            finally:
+                session.close()
+        else:
+            return self._get_tasks_pending_enrichment_from_json(after_id, limit)
+
+    def _get_tasks_pending_enrichment_from_json(self, after_id: int, limit: int) -> List[Dict[str, Any]]:
+        """Tareas sin enriquecer del archivo JSON, con la misma semántica que en SQL"""
+        # Los registros sin id numérico no se pueden paginar ni actualizar: se omiten
+        pending = [
+            task for task in self._json_store().all()
+            if isinstance(task.get('id'), int) and task['id'] > after_id and (
+                not task.get('risk_analysis') or
+                (task.get('category', TaskCategory.OTRO.value) == TaskCategory.OTRO.value and not task.get('tokens_gastados'))
+            )
+        ]
+        pending.sort(key=lambda task: task['id'])
+        return [
+            {'id': task['id'], 'title': task.get('title', ''), 'description': task.get('description') or ''}
+            for task in pending[:limit]
+        ]
+
+    def update_tasks_bulk(self, updates: Dict[int, Dict[str, Any]]) -> int:
+        """
+        Actualiza varias tareas en una sola transacción.
+        
+        Args:
+            updates: ID de la tarea -> campos a actualizar
+            
+        Returns:
+            int: Número de tareas actualizadas
+        """
+        if not updates:
+            return 0
+        if self.use_database:
+            session = get_db_session()
+            if session is None:
+                return self._update_tasks_bulk_in_json(updates)
+            try:
+                db_tasks = session.query(TaskDB).filter(TaskDB.id.in_(list(updates))).all()
+                for db_task in db_tasks:
+                    task_data = updates[db_task.id]
+                    for key, value in task_data.items():
+                        if key == 'category':
+                            value = TaskCategory(value)
+                        if hasattr(db_task, key):
+                            setattr(db_task, key, value)
+                    if 'description' in task_data:
+                        db_task.description_truncated = truncate_text(db_task.description, 30)
+                session.commit()
+                return len(db_tasks)
+            except Exception as e:
+                session.rollback()
+                logging.error(f"Error al actualizar tareas en DB: {str(e)}")
+                raise
+            finally:
+                session.close()
+        else:
+            return self._update_tasks_bulk_in_json(updates)
+
+    def _update_tasks_bulk_in_json(self, updates: Dict[int, Dict[str, Any]]) -> int:
+        """Actualiza varias tareas en archivo JSON"""
+        return sum(1 for task_id, task_data in updates.items()
+                   if self._update_task_in_json(task_id, task_data) is not None)
+
     def _update_task_in_json(self, task_id: int, task_data: dict) -> Optional[Task]:
         """Actualiza una tarea en archivo JSON"""
         try:
-            json_file = Path(__file__).parent.parent.parent / 'data' / 'tasks.json'
-            if not json_file.exists():
-                return None
+            def apply_changes(task):
+                # Actualizar campos
+                for key, value in task_data.items():
+                    if key in task:
+                        task[key] = value
+                
+                if 'description' in task_data or 'description_truncated' not in task:
+                    task['description_truncated'] = truncate_text(task.get('description', ''), 30)
+                
+                # Actualizar timestamp
+                task['updated_at'] = datetime.now().isoformat()
             
-            # Cargar tareas existentes
-            with open(json_file, 'r', encoding='utf-8') as f:
-                tasks_data = json.load(f)
-            
-            # Buscar y actualizar la tarea
-            for i, task in enumerate(tasks_data):
-                if task.get('id') == task_id:
-                    # Actualizar campos
-                    for key, value in task_data.items():
-                        if key in task:
-                            task[key] = value
-                    
-                    # Actualizar timestamp
-                    task['updated_at'] = datetime.now().isoformat()
-                    
-                    # Guardar en JSON
-                    with open(json_file, 'w', encoding='utf-8') as f:
-                        json.dump(tasks_data, f, indent=2, ensure_ascii=False, default=str)
-                    
-                    return Task.from_dict(task)
+            task = self._json_store().update(task_id, apply_changes)
+            if task is not None:
+                return Task.from_dict(task)
             
             return None
         except Exception as e:
@@ -467,26 +1031,7 @@ class TaskManager:
     def _delete_task_in_json(self, task_id: int) -> bool:
         """Elimina una tarea desde archivo JSON"""
         try:
-            json_file = Path(__file__).parent.parent.parent / 'data' / 'tasks.json'
-            if not json_file.exists():
-                return False
-            
-            # Cargar tareas existentes
-            with open(json_file, 'r', encoding='utf-8') as f:
-                tasks_data = json.load(f)
-            
-            # Buscar y eliminar la tarea
-            for i, task in enumerate(tasks_data):
-                if task.get('id') == task_id:
-                    del tasks_data[i]
-                    
-                    # Guardar en JSON
-                    with open(json_file, 'w', encoding='utf-8') as f:
-                        json.dump(tasks_data, f, indent=2, ensure_ascii=False, default=str)
-                    
-                    return True
-            
-            return False
+            return self._json_store().delete(task_id) is not None
         except Exception as e:
             print(f"Error eliminando tarea en JSON: {e}")
             return False
@@ -526,10 +1071,18 @@ class TaskManager:
             # Modo JSON (fallback)
             return self._delete_task_in_json(task_id)
     
-    def get_stats(self) -> Dict[str, Any]:
+    def get_stats(self, include_per_task: bool = False) -> Dict[str, Any]:
         """
         Obtiene estadísticas de las tareas.
         
+        En modo base de datos se leen los contadores de la tabla ``task_stats``,
+        mantenidos en la misma transacción que cada escritura. Si aún no se han
+        inicializado se usan agregados condicionales sin cargar las tareas.
+        
+        Args:
+            include_per_task: Si es True añade las series de tokens, costos y
+                títulos por tarea (requiere una consulta adicional)
+        
         Returns:
             Dict[str, Any]: Estadísticas de las tareas
         """
@@ -538,87 +1091,103 @@ class TaskManager:
             session = get_db_session()
             if session is None:
                 # No hay conexión a base de datos, usar modo JSON
-                return self._get_stats_from_json()
+                return self._get_stats_from_json(include_per_task)
             try:
-                total_tasks = session.query(TaskDB).count()
-                total_tokens = session.query(TaskDB.tokens_gastados).with_entities(
-                    func.sum(TaskDB.tokens_gastados)
-                ).scalar() or 0
-                total_costos = session.query(TaskDB.costos).with_entities(
-                    func.sum(TaskDB.costos)
-                ).scalar() or 0.0
-                
-                # Estadísticas por estado
-                status_stats = {}
-                for status in ['pendiente', 'en_progreso', 'en_revision', 'completada']:
-                    count = session.query(TaskDB).filter(TaskDB.status == status).count()
-                    status_stats[status] = count
+                # Lectura O(1) desde la tabla de contadores; si aún no se ha
+                # inicializado se agregan las tareas directamente
+                stats = read_task_stats(session)
+                if stats is None:
+                    stats = self._aggregate_stats(session)
                 
-                # Estadísticas por prioridad
-                priority_stats = {}
-                for priority in ['baja', 'media', 'alta', 'bloqueante']:
-                    count = session.query(TaskDB).filter(TaskDB.priority == priority).count()
-                    priority_stats[priority] = count
+                if include_per_task:
+                    # Proyección ligera: solo las columnas de las series
+                    rows = (
+                        session.query(TaskDB.title, TaskDB.tokens_gastados, TaskDB.costos)
+                        .order_by(TaskDB.created_at.desc(), TaskDB.id.desc())
+                        .all()
+                    )
+                    stats['tokens_por_tarea'] = [tokens or 0 for _, tokens, _ in rows]
+                    stats['costos_por_tarea'] = [float(costos or 0.0) for _, _, costos in rows]
+                    stats['titulos_tareas'] = [title for title, _, _ in rows]
                 
-                return {
-                    'total_tasks': total_tasks,
-                    'total_tokens': total_tokens,
-                    'total_costos': float(total_costos),
-                    'status_stats': status_stats,
-                    'priority_stats': priority_stats
-                }
+                return stats
             finally:
                 if session is not None:
                     session.close()
         else:
             # Modo JSON (fallback)
-            return self._get_stats_from_json()
+            return self._get_stats_from_json(include_per_task)
 
-    def _get_stats_from_json(self) -> Dict[str, Any]:
-        """Obtiene estadísticas desde archivo JSON"""
+    def _aggregate_stats(self, session) -> Dict[str, Any]:
+        """Calcula las estadísticas con agregados condicionales sobre la tabla de tareas"""
+        status_columns = [
+            func.sum(case((TaskDB.status == status, 1), else_=0))
+            for status in StatusEnum
+        ]
+        priority_columns = [
+            func.sum(case((TaskDB.priority == priority, 1), else_=0))
+            for priority in PriorityEnum
+        ]
+        row = session.query(
+            func.count(TaskDB.id),
+            func.sum(TaskDB.effort),
+            func.sum(case((TaskDB.status != StatusEnum.COMPLETADA, TaskDB.effort), else_=0)),
+            func.sum(TaskDB.tokens_gastados),
+            func.sum(TaskDB.costos),
+            *status_columns,
+            *priority_columns
+        ).one()
+        
+        statuses = list(StatusEnum)
+        priorities = list(PriorityEnum)
+        status_values = row[5:5 + len(statuses)]
+        priority_values = row[5 + len(statuses):]
+        
+        # Horas por persona asignada
+        assigned_hours = {}
+        assigned_rows = (
+            session.query(TaskDB.assigned_to, func.sum(TaskDB.effort))
+            .group_by(TaskDB.assigned_to)
+            .all()
+        )
+        for person, hours in assigned_rows:
+            person = person or 'Sin asignar'
+            assigned_hours[person] = assigned_hours.get(person, 0) + int(hours or 0)
+        
+        return build_stats(
+            total_tasks=row[0] or 0,
+            total_effort=row[1] or 0,
+            total_hours_incomplete=row[2] or 0,
+            total_tokens=row[3] or 0,
+            total_costos=row[4] or 0.0,
+            status_counts={
+                status.value: int(count or 0)
+                for status, count in zip(statuses, status_values)
+            },
+            priority_counts={
+                priority.value.lower(): int(count or 0)
+                for priority, count in zip(priorities, priority_values)
+            },
+            assigned_hours=assigned_hours
+        )
+
+    def _get_stats_from_json(self, include_per_task: bool = False) -> Dict[str, Any]:
+        """Obtiene estadísticas desde archivo JSON usando los contadores en memoria"""
         try:
-            json_file = Path(__file__).parent.parent.parent / 'data' / 'tasks.json'
-            if not json_file.exists():
-                return {
-                    'total_tasks': 0,
-                    'total_tokens': 0,
-                    'total_costos': 0.0,
-                    'status_stats': {},
-                    'priority_stats': {}
-                }
+            store = self._json_store()
+            stats = store.stats()
             
-            with open(json_file, 'r', encoding='utf-8') as f:
-                tasks_data = json.load(f)
-            
-            total_tasks = len(tasks_data)
-            total_tokens = sum(task.get('tokens_gastados', 0) for task in tasks_data)
-            total_costos = sum(task.get('costos', 0.0) for task in tasks_data)
-            
-            # Estadísticas por estado
-            status_stats = {}
-            for status in ['pendiente', 'en_progreso', 'en_revision', 'completada']:
-                count = sum(1 for task in tasks_data if task.get('status') == status)
-                status_stats[status] = count
-            
-            # Estadísticas por prioridad
-            priority_stats = {}
-            for priority in ['baja', 'media', 'alta', 'bloqueante']:
-                count = sum(1 for task in tasks_data if task.get('priority') == priority)
-                priority_stats[priority] = count
+            if include_per_task:
+                ordered = sorted(
+                    store.all(),
+                    key=lambda task: (task.get('created_at') or '', task.get('id') or 0),
+                    reverse=True
+                )
+                stats['tokens_por_tarea'] = [task.get('tokens_gastados', 0) or 0 for task in ordered]
+                stats['costos_por_tarea'] = [float(task.get('costos', 0.0) or 0.0) for task in ordered]
+                stats['titulos_tareas'] = [task.get('title', '') for task in ordered]
             
-            return {
-                'total_tasks': total_tasks,
-                'total_tokens': total_tokens,
-                'total_costos': float(total_costos),
-                'status_stats': status_stats,
-                'priority_stats': priority_stats
-            }
+            return stats
         except Exception as e:
             print(f"Error obteniendo estadísticas desde JSON: {e}")
-            return {
-                'total_tasks': 0,
-                'total_tokens': 0,
-                'total_costos': 0.0,
-                'status_stats': {},
-                'priority_stats': {}
-            }
\ No newline at end of file
+            return build_stats()
@@ -0,0 +1,367 @@
+"""
+Contadores agregados de tareas mantenidos de forma incremental.
+
+En modo base de datos los contadores viven en la tabla ``task_stats`` y se
+actualizan dentro de la misma transacción que crea, modifica o elimina la
+tarea (hook ``before_flush`` de SQLAlchemy), de modo que las estadísticas son
+una lectura de pocas filas. En modo JSON los contadores los mantiene el
+almacén en memoria (``app.utils.json_store``).
+
+Uso del comando de reconciliación:
+    python -m app.utils.task_stats            # reconstruye y reporta deriva
+    python -m app.utils.task_stats --dry-run  # solo reporta deriva
+"""
+import argparse
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, func, insert, inspect, update
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.database.azure_connection import get_db_session
+from app.models.task import Task
+from app.models.task_db import StatusEnum, TaskDB
+from app.models.task_stats_db import TaskStatsDB
+
+TOTAL_DIMENSION = 'total'
+TOTAL_BUCKET = '*'
+UNASSIGNED = 'Sin asignar'
+
+# Columnas de TaskDB que afectan a los contadores
+TRACKED_FIELDS = ('status', 'priority', 'effort', 'tokens_gastados', 'costos', 'assigned_to')
+COUNTER_FIELDS = ('task_count', 'effort', 'tokens', 'costos')
+
+
+def _enum_value(value: Any, default: str) -> str:
+    """Devuelve el valor en minúsculas de un enum o cadena"""
+    if value is None or value == '':
+        return default
+    if hasattr(value, 'value'):
+        value = value.value
+    return str(value).lower()
+
+
+def _to_int(value: Any) -> int:
+    """Convierte el esfuerzo a entero con la misma tolerancia que Task"""
+    try:
+        return int(value) if value and str(value).strip() else 0
+    except (ValueError, TypeError):
+        return 0
+
+
+def task_contribution(values: Dict[str, Any]) -> Dict[Tuple[str, str], Tuple[int, int, int, float]]:
+    """
+    Calcula la aportación de una tarea a cada grupo de contadores.
+
+    Args:
+        values: Diccionario con status, priority, effort, tokens_gastados,
+            costos y assigned_to de la tarea
+
+    Returns:
+        Dict: (dimension, bucket) -> (task_count, effort, tokens, costos)
+    """
+    row = (1, _to_int(values.get('effort')), int(values.get('tokens_gastados') or 0), float(values.get('costos') or 0.0))
+    return {
+        (TOTAL_DIMENSION, TOTAL_BUCKET): row,
+        ('status', _enum_value(values.get('status'), 'pendiente')): row,
+        ('priority', _enum_value(values.get('priority'), 'media')): row,
+        ('assignee', values.get('assigned_to') or UNASSIGNED): row,
+    }
+
+
+class TaskStatsCounters:
+    """Contadores en memoria indexados por (dimension, bucket)"""
+
+    def __init__(self, rows: Optional[Dict[Tuple[str, str], List]] = None):
+        self.rows = rows or {}
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]]) -> 'TaskStatsCounters':
+        """Construye los contadores recorriendo todas las tareas"""
+        counters = cls()
+        for record in records:
+            counters.apply(None, record)
+        return counters
+
+    def apply(self, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]) -> None:
+        """Resta la aportación de ``old`` y suma la de ``new``"""
+        for values, sign in ((old, -1), (new, 1)):
+            if values is None:
+                continue
+            for key, delta in task_contribution(values).items():
+                current = self.rows.setdefault(key, [0, 0, 0, 0.0])
+                for i, amount in enumerate(delta):
+                    current[i] += sign * amount
+
+    def to_stats(self) -> Dict[str, Any]:
+        """Convierte los contadores al formato de ``TaskManager.get_stats``"""
+        total = self.rows.get((TOTAL_DIMENSION, TOTAL_BUCKET), [0, 0, 0, 0.0])
+        completed = self.rows.get(('status', StatusEnum.COMPLETADA.value), [0, 0, 0, 0.0])
+        by_dimension = {'status': {}, 'priority': {}, 'assignee': {}}
+        for (dimension, bucket), values in self.rows.items():
+            if dimension in by_dimension and values[0] > 0:
+                by_dimension[dimension][bucket] = values
+        return build_stats(
+            total_tasks=total[0],
+            total_effort=total[1],
+            total_hours_incomplete=total[1] - completed[1],
+            total_tokens=total[2],
+            total_costos=total[3],
+            status_counts={k: v[0] for k, v in by_dimension['status'].items()},
+            priority_counts={k: v[0] for k, v in by_dimension['priority'].items()},
+            assigned_hours={k: v[1] for k, v in by_dimension['assignee'].items()}
+        )
+
+
+def build_stats(total_tasks: int = 0, total_effort: int = 0, total_hours_incomplete: int = 0,
+                total_tokens: int = 0, total_costos: float = 0.0, status_counts: Optional[Dict[str, int]] = None,
+                priority_counts: Optional[Dict[str, int]] = None,
+                assigned_hours: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+    """Construye el diccionario de estadísticas con todos los estados y prioridades"""
+    status_counts = {**{status: 0 for status in Task.VALID_STATUSES}, **(status_counts or {})}
+    priority_counts = {**{priority: 0 for priority in Task.VALID_PRIORITIES}, **(priority_counts or {})}
+    return {
+        'total_tasks': int(total_tasks),
+        'total_effort': int(total_effort),
+        'total_hours_incomplete': int(total_hours_incomplete),
+        'total_tokens': int(total_tokens),
+        'total_costos': float(total_costos),
+        'status_counts': status_counts,
+        'priority_counts': priority_counts,
+        'assigned_hours': assigned_hours or {},
+        # Claves anteriores, se mantienen por compatibilidad
+        'status_stats': status_counts,
+        'priority_stats': priority_counts
+    }
+
+
+# ---------------------------------------------------------------------------
+# Modo base de datos
+# ---------------------------------------------------------------------------
+
+def _task_db_values(task: TaskDB, previous: bool = False) -> Dict[str, Any]:
+    """Lee los campos contados de una TaskDB (valores previos si ``previous``)"""
+    values = {}
+    state = inspect(task)
+    for field in TRACKED_FIELDS:
+        value = getattr(task, field)
+        if previous:
+            history = state.attrs[field].history
+            if history.deleted:
+                value = history.deleted[0]
+        values[field] = value
+    return values
+
+
+def _has_tracked_changes(task: TaskDB) -> bool:
+    state = inspect(task)
+    return any(state.attrs[field].history.has_changes() for field in TRACKED_FIELDS)
+
+
+def _track_task_changes(session: Session, flush_context, instances) -> None:
+    """Aplica a ``task_stats`` los deltas de las tareas pendientes de flush"""
+    counters = TaskStatsCounters()
+    for obj in session.new:
+        if isinstance(obj, TaskDB):
+            counters.apply(None, _task_db_values(obj))
+    for obj in session.dirty:
+        if isinstance(obj, TaskDB) and _has_tracked_changes(obj):
+            counters.apply(_task_db_values(obj, previous=True), _task_db_values(obj))
+    for obj in session.deleted:
+        if isinstance(obj, TaskDB):
+            counters.apply(_task_db_values(obj, previous=True), None)
+    if counters.rows:
+        try:
+            apply_counter_deltas(session, counters.rows)
+        except SQLAlchemyError as e:
+            # Sin tabla task_stats (migración pendiente) u otro fallo: la tarea se
+            # guarda igualmente y la próxima reconciliación corrige los contadores
+            logging.warning(f"No se pudieron actualizar los contadores de task_stats: {str(e)}")
+
+
+def apply_counter_deltas(session: Session, deltas: Dict[Tuple[str, str], List]) -> bool:
+    """
+    Suma los deltas a la tabla ``task_stats`` con UPDATE atómicos.
+
+    Si la fila total no existe los contadores no se han inicializado y no se
+    toca nada: la reconciliación los construirá desde cero. Los grupos nuevos
+    se crean con un upsert, de modo que dos transacciones que estrenan el
+    mismo grupo a la vez no chocan por clave primaria.
+
+    Args:
+        session: Sesión de SQLAlchemy en la transacción actual
+        deltas: (dimension, bucket) -> [task_count, effort, tokens, costos]
+
+    Returns:
+        bool: True si los contadores estaban inicializados y se actualizaron
+    """
+    total_key = (TOTAL_DIMENSION, TOTAL_BUCKET)
+    ordered = [total_key] + [key for key in deltas if key != total_key]
+    for key in ordered:
+        delta = deltas.get(key)
+        if delta is None:
+            continue
+        result = session.execute(
+            update(TaskStatsDB)
+            .where(TaskStatsDB.dimension == key[0], TaskStatsDB.bucket == key[1])
+            .values(
+                task_count=TaskStatsDB.task_count + delta[0],
+                effort=TaskStatsDB.effort + delta[1],
+                tokens=TaskStatsDB.tokens + delta[2],
+                costos=TaskStatsDB.costos + delta[3]
+            )
+        )
+        if result.rowcount == 0:
+            if key == total_key:
+                return False
+            session.execute(_upsert_counter(session, key, delta))
+    return True
+
+
+def _upsert_counter(session: Session, key: Tuple[str, str], delta: List):
+    """INSERT de un grupo de contadores que suma el delta si otra transacción ya lo creó"""
+    values = dict(dimension=key[0], bucket=key[1], task_count=delta[0],
+                  effort=delta[1], tokens=delta[2], costos=delta[3])
+    dialect = session.get_bind().dialect.name
+    if dialect == 'mysql':
+        stmt = mysql.insert(TaskStatsDB).values(**values)
+        return stmt.on_duplicate_key_update(
+            {field: getattr(TaskStatsDB, field) + stmt.inserted[field] for field in COUNTER_FIELDS}
+        )
+    if dialect == 'sqlite':
+        stmt = sqlite.insert(TaskStatsDB).values(**values)
+        return stmt.on_conflict_do_update(
+            index_elements=[TaskStatsDB.dimension, TaskStatsDB.bucket],
+            set_={field: getattr(TaskStatsDB, field) + stmt.excluded[field] for field in COUNTER_FIELDS}
+        )
+    return insert(TaskStatsDB).values(**values)
+
+
+event.listen(Session, 'before_flush', _track_task_changes)
+
+
+def read_task_stats(session: Session) -> Optional[Dict[str, Any]]:
+    """
+    Lee las estadísticas desde la tabla de contadores.
+
+    Returns:
+        Optional[Dict[str, Any]]: Estadísticas o None si los contadores no
+            están inicializados
+    """
+    rows = session.query(TaskStatsDB).all()
+    counters = TaskStatsCounters({
+        (row.dimension, row.bucket): [row.task_count or 0, row.effort or 0, row.tokens or 0, row.costos or 0.0]
+        for row in rows
+    })
+    if (TOTAL_DIMENSION, TOTAL_BUCKET) not in counters.rows:
+        return None
+    return counters.to_stats()
+
+
+def compute_counter_rows(session: Session) -> Dict[Tuple[str, str], List]:
+    """Recalcula desde cero todas las filas de contadores con GROUP BY"""
+    sums = (
+        func.count(TaskDB.id),
+        func.sum(TaskDB.effort),
+        func.sum(TaskDB.tokens_gastados),
+        func.sum(TaskDB.costos)
+    )
+    rows = {}
+    total = session.query(*sums).one()
+    rows[(TOTAL_DIMENSION, TOTAL_BUCKET)] = [int(total[0] or 0), int(total[1] or 0), int(total[2] or 0), float(total[3] or 0.0)]
+    groups = (
+        ('status', TaskDB.status, lambda v: _enum_value(v, 'pendiente')),
+        ('priority', TaskDB.priority, lambda v: _enum_value(v, 'media')),
+        ('assignee', TaskDB.assigned_to, lambda v: v or UNASSIGNED),
+    )
+    for dimension, column, to_bucket in groups:
+        for value, count, effort, tokens, costos in session.query(column, *sums).group_by(column).all():
+            current = rows.setdefault((dimension, to_bucket(value)), [0, 0, 0, 0.0])
+            current[0] += int(count or 0)
+            current[1] += int(effort or 0)
+            current[2] += int(tokens or 0)
+            current[3] += float(costos or 0.0)
+    return rows
+
+
+def reconcile_task_stats(session: Session, dry_run: bool = False) -> Dict[str, Any]:
+    """
+    Reconstruye los contadores desde las tareas y reporta la deriva.
+
+    Args:
+        session: Sesión de SQLAlchemy
+        dry_run: Si es True solo reporta, sin modificar la tabla
+
+    Returns:
+        Dict[str, Any]: ``initialized`` (si había contadores), ``drift`` (lista
+            de diferencias por grupo y campo) y ``rows`` (filas esperadas)
+    """
+    expected = compute_counter_rows(session)
+    loaded = {(row.dimension, row.bucket): row for row in session.query(TaskStatsDB).all()}
+    current = {
+        key: [row.task_count or 0, row.effort or 0, row.tokens or 0, row.costos or 0.0]
+        for key, row in loaded.items()
+    }
+    drift = []
+    for key in sorted(set(expected) | set(current)):
+        exp = expected.get(key, [0, 0, 0, 0.0])
+        act = current.get(key, [0, 0, 0, 0.0])
+        for field, e, a in zip(COUNTER_FIELDS, exp, act):
+            if abs(e - a) > 1e-6:
+                drift.append({
+                    'dimension': key[0], 'bucket': key[1], 'field': field,
+                    'expected': e, 'actual': a
+                })
+    if not dry_run:
+        # Las filas cargadas se actualizan en su sitio: reinsertar las mismas
+        # claves primarias chocaría con el identity map de la sesión
+        for key, values in expected.items():
+            row = loaded.get(key)
+            if row is None:
+                row = TaskStatsDB(dimension=key[0], bucket=key[1])
+                session.add(row)
+            row.task_count, row.effort, row.tokens, row.costos = values
+        for key, row in loaded.items():
+            if key not in expected:
+                session.delete(row)
+        session.commit()
+    return {
+        'initialized': (TOTAL_DIMENSION, TOTAL_BUCKET) in current,
+        'drift': drift,
+        'rows': len(expected)
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Comando de reconciliación de la tabla task_stats"""
+    parser = argparse.ArgumentParser(description='Reconstruye los contadores de task_stats y reporta la deriva')
+    parser.add_argument('--dry-run', action='store_true', help='Solo reporta la deriva, sin reescribir la tabla')
+    args = parser.parse_args(argv)
+
+    session = get_db_session()
+    if session is None:
+        print("⚠️ No hay conexión a base de datos; en modo JSON los contadores se reconstruyen en memoria.")
+        return 1
+    try:
+        report = reconcile_task_stats(session, dry_run=args.dry_run)
+    except Exception as e:
+        session.rollback()
+        logging.error(f"Error reconciliando task_stats: {str(e)}")
+        return 1
+    finally:
+        session.close()
+
+    if not report['initialized']:
+        print("ℹ️ La tabla task_stats no estaba inicializada.")
+    for item in report['drift']:
+        print(f"⚠️ Deriva en {item['dimension']}/{item['bucket']} {item['field']}: "
+              f"esperado={item['expected']} actual={item['actual']}")
+    action = "Sin cambios (dry-run)" if args.dry_run else f"{report['rows']} filas reconstruidas"
+    print(f"✅ Reconciliación completada: {len(report['drift'])} diferencias. {action}.")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -1,37 +1,34 @@
-import json
 from pathlib import Path
-from typing import Dict, List
+from typing import Any, Dict
 from app.models.task import Task
+from app.utils.json_store import get_json_store
+
+
+def _add_token_fields(task_data: Dict[str, Any]) -> None:
+    # Si la tarea ya tiene los campos, mantener sus valores
+    task_data.setdefault('tokens_gastados', 0)
+    task_data.setdefault('costos', 0.0)
+    # Pasar por Task para mantener el formato
+    task_data.update(Task.from_dict(task_data).to_dict())
+
 
 def update_tasks_with_tokens(tasks_file: Path) -> None:
     """
     Actualiza el archivo de tareas agregando los campos tokens_gastados y costos.
     Si una tarea ya tiene estos campos, mantiene sus valores.
+
+    Los cambios se escriben a través del almacén JSON (diario y bloqueo
+    compartidos con la aplicación), no reescribiendo la instantánea.
     
     Args:
         tasks_file: Ruta al archivo JSON de tareas
     """
     try:
-        # Leer el archivo JSON actual
-        with open(tasks_file, 'r', encoding='utf-8') as f:
-            tasks_data = json.load(f)
-        
-        # Convertir cada tarea a objeto Task y actualizar
-        updated_tasks = []
-        for task_data in tasks_data:
-            # Si la tarea ya tiene los campos, mantener sus valores
-            if 'tokens_gastados' not in task_data:
-                task_data['tokens_gastados'] = 0
-            if 'costos' not in task_data:
-                task_data['costos'] = 0.0
-            
-            # Convertir a objeto Task y luego a diccionario para mantener el formato
-            task = Task.from_dict(task_data)
-            updated_tasks.append(task.to_dict())
-        
-        # Guardar el archivo actualizado
-        with open(tasks_file, 'w', encoding='utf-8') as f:
-            json.dump(updated_tasks, f, indent=2, ensure_ascii=False)
+        store = get_json_store(tasks_file)
+        pending = [task['id'] for task in store.all()
+                   if 'tokens_gastados' not in task or 'costos' not in task]
+        for task_id in pending:
+            store.update(task_id, _add_token_fields)
             
     except Exception as e:
         raise Exception(f"Error al actualizar el archivo de tareas: {str(e)}")
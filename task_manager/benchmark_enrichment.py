@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Compara los modos de enriquecimiento de AIService.process_task
+
+Ejecuta el mismo conjunto de títulos con cada modo y muestra el tiempo medio,
+los tokens de entrada y totales y el coste por tarea. Usa la configuración de
+Azure OpenAI del archivo .env.
+
+Uso:
+    python benchmark_enrichment.py [--modes sequential,parallel,one_shot] [--repeat 3]
+"""
+
+import argparse
+import time
+from dotenv import load_dotenv
+
+from app.services.ai_service import AIService, ENRICHMENT_MODES
+
+# Cargar variables de entorno
+load_dotenv()
+
+TITLES = [
+    "Validar el método analítico de disolución para tabletas de 500 mg",
+    "Implementar el endpoint de exportación de resultados de laboratorio",
+    "Documentar el procedimiento de calibración de balanzas analíticas",
+    "Migrar la tabla de muestras a un índice por lote y fecha",
+]
+
+
+def benchmark_mode(service: AIService, mode: str, repeat: int) -> dict:
+    """Enriquece TITLES ``repeat`` veces con un modo y acumula las métricas"""
+    elapsed = input_tokens = total_tokens = cost = 0
+    tasks = 0
+    for _ in range(repeat):
+        for title in TITLES:
+            start = time.perf_counter()
+            result = service.process_task({'title': title}, mode=mode)
+            elapsed += time.perf_counter() - start
+            input_tokens += sum(info.get('input_tokens', 0) for info in result['ai_processing'].values())
+            total_tokens += result['tokens_gastados']
+            cost += result['costos']
+            tasks += 1
+    return {
+        'mode': mode,
+        'seconds_per_task': elapsed / tasks,
+        'input_tokens_per_task': input_tokens / tasks,
+        'tokens_per_task': total_tokens / tasks,
+        'cost_per_task': cost / tasks,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de modos de enriquecimiento con IA')
+    parser.add_argument('--modes', default=','.join(ENRICHMENT_MODES),
+                        help='Modos separados por comas')
+    parser.add_argument('--repeat', type=int, default=1, help='Repeticiones del conjunto de títulos')
+    args = parser.parse_args()
+
+    service = AIService()
+    print(f"🧪 Enriqueciendo {len(TITLES) * args.repeat} tareas por modo...")
+    print(f"{'modo':<12}{'s/tarea':>10}{'tokens entrada':>16}{'tokens':>10}{'coste $':>10}")
+    for mode in args.modes.split(','):
+        row = benchmark_mode(service, mode.strip(), args.repeat)
+        print(f"{row['mode']:<12}{row['seconds_per_task']:>10.2f}{row['input_tokens_per_task']:>16.0f}"
+              f"{row['tokens_per_task']:>10.0f}{row['cost_per_task']:>10.4f}")
+
+
+if __name__ == '__main__':
+    main()
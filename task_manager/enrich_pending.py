@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Enriquece con IA todas las tareas pendientes (sin análisis de riesgos o sin categoría)
+
+Procesa las tareas con concurrencia acotada, las guarda por lotes y muestra el
+rendimiento tras cada lote. El progreso queda en un checkpoint: si se
+interrumpe, volver a ejecutar el comando continúa donde se quedó.
+
+Uso:
+    python enrich_pending.py [--concurrency 8] [--batch-size 20] [--limit N] [--mode parallel] [--reset]
+"""
+
+import argparse
+from dotenv import load_dotenv
+
+# Cargar variables de entorno antes de leer la configuración de los servicios
+load_dotenv()
+
+from app.services.ai_service import ENRICHMENT_MODES
+from app.services.bulk_enrichment import BATCH_SIZE, CONCURRENCY, BulkEnrichment
+
+
+def print_progress(progress: dict) -> None:
+    print(f"  ✅ {progress['succeeded']} enriquecidas | ❌ {len(progress['failed'])} fallidas | "
+          f"{progress['tasks_per_minute']:.1f} tareas/min | {progress['tokens_per_minute']:.0f} tokens/min | "
+          f"${progress['cost']:.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Enriquecimiento masivo de tareas pendientes con IA')
+    parser.add_argument('--concurrency', type=int, default=CONCURRENCY, help='Tareas en proceso a la vez')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Tareas por escritura en base de datos')
+    parser.add_argument('--limit', type=int, default=None, help='Máximo de tareas a procesar')
+    parser.add_argument('--mode', default=None, choices=ENRICHMENT_MODES,
+                        help='Modo de process_task: sequential, parallel o one_shot')
+    parser.add_argument('--reset', action='store_true',
+                        help='Ignorar el checkpoint y reintentar también las tareas fallidas')
+    args = parser.parse_args()
+
+    run = BulkEnrichment(concurrency=args.concurrency, batch_size=args.batch_size,
+                         limit=args.limit, mode=args.mode, on_progress=print_progress)
+    print(f"🚀 Enriqueciendo tareas pendientes (concurrencia {run.concurrency}, lotes de {run.batch_size})...")
+    progress = run.run(reset=args.reset)
+
+    print(f"🏁 Estado: {progress['status']} en {progress['elapsed_seconds']:.0f}s")
+    print_progress(progress)
+    for task_id, error in progress['failed'].items():
+        print(f"  ⚠️ Tarea {task_id}: {error}")
+
+
+if __name__ == '__main__':
+    main()
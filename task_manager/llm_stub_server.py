@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Servidor local compatible con la API de chat completions de Azure OpenAI
+
+Sustituye a Azure OpenAI en pruebas de carga y de latencia: las peticiones
+recorren el mismo camino HTTP que en producción (cliente con pool, limitador,
+reintentos, circuit breaker, streaming) sin coste ni red. Las respuestas son
+deterministas: dependen solo de la semilla y del contenido de la petición,
+incluida la latencia simulada y los errores inyectados.
+
+- Latencia hasta el primer token según una distribución (--latency) y
+  generación a --tokens-per-second.
+- Errores 429 (con Retry-After) y 5xx con la probabilidad indicada.
+- Respuestas JSON válidas para generate_tasks, generate_user_story, el modo
+  one_shot y la categorización por lotes; texto para el resto de etapas.
+
+Para usarlo desde AIService basta con apuntar el endpoint al servidor:
+
+    AZURE_OPENAI_ENDPOINT=http://127.0.0.1:8008
+    AZURE_OPENAI_API_KEY=stub
+    AZURE_OPENAI_API_VERSION=2024-02-01
+    AZURE_OPENAI_DEPLOYMENT_NAME=stub
+
+Uso:
+    python llm_stub_server.py [--port 8008] [--latency lognormal:0.8,0.5] [--tokens-per-second 60]
+                              [--error-rate-429 0.05] [--error-rate-5xx 0.01] [--seed 42]
+
+Distribuciones de --latency (segundos): constant:S, uniform:MIN,MAX,
+normal:MEDIA,DESV, lognormal:MEDIANA,SIGMA y exponential:MEDIA.
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from flask import Flask, Response, jsonify, request
+
+# Distribución -> número de parámetros
+LATENCY_DISTRIBUTIONS = {
+    'constant': 1,
+    'uniform': 2,
+    'normal': 2,
+    'lognormal': 2,
+    'exponential': 1,
+}
+
+CATEGORIES = [
+    'Testing y Control de Calidad', 'Desarrollo Frontend', 'Desarrollo Backend', 'Desarrollo General',
+    'Diseño de Sistemas', 'Documentación', 'Base de Datos', 'Seguridad', 'Infraestructura', 'Mantenimiento',
+    'Investigación', 'Supervisión', 'Riesgos Laborales', 'Limpieza', 'Otro',
+]
+
+WORDS = (
+    'validar método analítico muestra lote registro calibración equipo control calidad procedimiento '
+    'especificación resultado desviación auditoría documento revisión análisis riesgo plan trazabilidad '
+    'laboratorio estabilidad protocolo informe responsable verificación criterio aceptación'
+).split()
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    Convierte una especificación como 'lognormal:0.8,0.5' en un muestreador de segundos
+
+    Raises:
+        ValueError: Si la distribución o sus parámetros no son válidos
+    """
+    name, _, raw = spec.partition(':')
+    if name not in LATENCY_DISTRIBUTIONS:
+        raise ValueError(f"Distribución de latencia no válida: {name}")
+    params = [float(value) for value in raw.split(',') if value.strip()]
+    if len(params) != LATENCY_DISTRIBUTIONS[name]:
+        raise ValueError(f"La distribución {name} necesita {LATENCY_DISTRIBUTIONS[name]} parámetro(s)")
+
+    samplers = {
+        'constant': lambda rng: params[0],
+        'uniform': lambda rng: rng.uniform(params[0], params[1]),
+        'normal': lambda rng: rng.gauss(params[0], params[1]),
+        'lognormal': lambda rng: rng.lognormvariate(math.log(params[0]), params[1]),
+        'exponential': lambda rng: rng.expovariate(1 / params[0]) if params[0] > 0 else 0.0,
+    }
+    sampler = samplers[name]
+    return lambda rng: max(0.0, sampler(rng))
+
+
+def count_tokens(text: str) -> int:
+    """Tokens aproximados (1,3 por palabra, como AIService sin encoder)"""
+    return int(len(text.split()) * 1.3)
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    text = ' '.join(rng.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + '.'
+
+
+def _paragraph(rng: random.Random, max_tokens: int) -> str:
+    """Texto de entre 40 y 160 palabras sin pasar de max_tokens"""
+    words = min(rng.randint(40, 160), max(1, int(max_tokens / 1.3)))
+    sentences = []
+    while words > 0:
+        length = min(words, rng.randint(8, 16))
+        sentences.append(_sentence(rng, length))
+        words -= length
+    return ' '.join(sentences)
+
+
+def canned_response(system_prompt: str, user_prompt: str, json_mode: bool,
+                    rng: random.Random, max_tokens: int) -> str:
+    """
+    Respuesta con el formato que espera AIService para cada prompt de sistema
+
+    Args:
+        system_prompt: Prompt de sistema de la petición
+        user_prompt: Prompt de usuario de la petición
+        json_mode: Si se pidió response_format json_object
+        rng: Generador de la petición (respuestas deterministas)
+        max_tokens: max_tokens de la petición
+
+    Returns:
+        str: Contenido del mensaje del asistente
+    """
+    if 'historia de usuario en formato JSON' in system_prompt:
+        return json.dumps({
+            'project': 'Laboratorio de control de calidad',
+            'role': 'analista de laboratorio',
+            'goal': _sentence(rng, 8)[:-1],
+            'reason': _sentence(rng, 10)[:-1],
+            'description': _paragraph(rng, 120),
+            'priority': rng.choice(['baja', 'media', 'alta', 'bloqueante']),
+            'story_points': rng.randint(1, 8),
+            'effort_hours': round(rng.uniform(2, 40), 1)
+        }, ensure_ascii=False)
+    if 'Genera exactamente 5 tareas' in system_prompt:
+        return json.dumps([
+            {'title': _sentence(rng, rng.randint(4, 9))[:-1], 'description': _paragraph(rng, 100)}
+            for _ in range(5)
+        ], ensure_ascii=False)
+    if json_mode and 'campo categories' in system_prompt:
+        match = re.search(r'siguientes (\d+) tareas', user_prompt)
+        count = int(match.group(1)) if match else 1
+        return json.dumps({'categories': [rng.choice(CATEGORIES) for _ in range(count)]}, ensure_ascii=False)
+    if json_mode:
+        return json.dumps({
+            'description': _paragraph(rng, 300),
+            'category': rng.choice(CATEGORIES),
+            'effort': rng.randint(2, 48),
+            'risk_analysis': _paragraph(rng, 200),
+            'mitigation': _paragraph(rng, 300)
+        }, ensure_ascii=False)
+    if 'ÚNICAMENTE una categoría' in system_prompt:
+        return rng.choice(CATEGORIES)
+    if 'ÚNICAMENTE un número de horas' in system_prompt:
+        return str(rng.randint(2, 48))
+    return _paragraph(rng, max_tokens)
+
+
+class StubSettings:
+    """Comportamiento simulado del servidor"""
+
+    def __init__(self, latency: str = 'constant:0', tokens_per_second: float = 0.0,
+                 error_rate_429: float = 0.0, error_rate_5xx: float = 0.0,
+                 error_status: int = 500, retry_after: float = 1.0, seed: int = 0):
+        """
+        Args:
+            latency: Distribución de la latencia hasta el primer token
+            tokens_per_second: Velocidad de generación (0 = instantánea)
+            error_rate_429: Probabilidad de responder 429
+            error_rate_5xx: Probabilidad de responder error_status
+            error_status: Código de los errores de servidor inyectados
+            retry_after: Segundos de la cabecera Retry-After de los 429
+            seed: Semilla de las respuestas, latencias y errores
+        """
+        self.latency = latency
+        self.sample_latency = parse_latency(latency)
+        self.tokens_per_second = tokens_per_second
+        self.error_rate_429 = error_rate_429
+        self.error_rate_5xx = error_rate_5xx
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.seed = seed
+
+
+def create_stub_app(settings: Optional[StubSettings] = None,
+                    sleep: Callable[[float], None] = time.sleep) -> Flask:
+    """
+    Crea la aplicación Flask del servidor
+
+    Args:
+        settings: Comportamiento simulado (por defecto sin latencia ni errores)
+        sleep: Función de espera (los tests la sustituyen)
+
+    Returns:
+        Flask: Aplicación con las rutas de chat completions de Azure y de OpenAI
+    """
+    settings = settings or StubSettings()
+    app = Flask(__name__)
+    lock = threading.Lock()
+    # Veces que se ha visto cada petición: las repeticiones (reintentos) varían de forma determinista
+    seen: Dict[str, int] = {}
+    stats = {'requests': 0, 'completions': 0, 'errors_429': 0, 'errors_5xx': 0,
+             'prompt_tokens': 0, 'completion_tokens': 0}
+
+    def request_rng(body: Dict[str, Any]) -> random.Random:
+        digest = hashlib.sha256(json.dumps(body.get('messages', []), sort_keys=True).encode('utf-8')).hexdigest()
+        with lock:
+            occurrence = seen.get(digest, 0)
+            seen[digest] = occurrence + 1
+        return random.Random(f"{settings.seed}:{digest}:{occurrence}")
+
+    def error_response(status: int, code: str, message: str,
+                       headers: Optional[Dict[str, str]] = None) -> Response:
+        response = jsonify({'error': {'code': code, 'message': message}})
+        response.status_code = status
+        response.headers.update(headers or {})
+        return response
+
+    def completion(deployment: str) -> Response:
+        body = request.get_json(silent=True) or {}
+        messages = body.get('messages') or []
+        system_prompt = next((m.get('content', '') for m in messages if m.get('role') == 'system'), '')
+        user_prompt = next((m.get('content', '') for m in reversed(messages) if m.get('role') == 'user'), '')
+        max_tokens = int(body.get('max_tokens') or 1000)
+        json_mode = (body.get('response_format') or {}).get('type') == 'json_object'
+        rng = request_rng(body)
+        with lock:
+            stats['requests'] += 1
+
+        first_token_delay = settings.sample_latency(rng)
+        fault = rng.random()
+        if fault < settings.error_rate_429:
+            sleep(first_token_delay)
+            with lock:
+                stats['errors_429'] += 1
+            return error_response(429, '429', 'Rate limit is exceeded (stub).',
+                                  {'Retry-After': str(settings.retry_after)})
+        if fault < settings.error_rate_429 + settings.error_rate_5xx:
+            sleep(first_token_delay)
+            with lock:
+                stats['errors_5xx'] += 1
+            return error_response(settings.error_status, 'InternalServerError', 'Injected server error (stub).')
+
+        content = canned_response(system_prompt, user_prompt, json_mode, rng, max_tokens)
+        prompt_tokens = sum(count_tokens(m.get('content') or '') for m in messages)
+        completion_tokens = count_tokens(content)
+        with lock:
+            stats['completions'] += 1
+            stats['prompt_tokens'] += prompt_tokens
+            stats['completion_tokens'] += completion_tokens
+        usage = {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                 'total_tokens': prompt_tokens + completion_tokens}
+        completion_id = f"chatcmpl-stub-{rng.getrandbits(48):012x}"
+        base = {'id': completion_id, 'created': int(time.time()), 'model': deployment}
+
+        if body.get('stream'):
+            include_usage = (body.get('stream_options') or {}).get('include_usage', False)
+            return Response(stream_chunks(base, content, usage if include_usage else None, first_token_delay),
+                            mimetype='text/event-stream')
+
+        generation = completion_tokens / settings.tokens_per_second if settings.tokens_per_second > 0 else 0.0
+        sleep(first_token_delay + generation)
+        return jsonify(dict(base, object='chat.completion', usage=usage, choices=[{
+            'index': 0,
+            'finish_reason': 'stop',
+            'message': {'role': 'assistant', 'content': content}
+        }]))
+
+    def stream_chunks(base: Dict[str, Any], content: str, usage: Optional[Dict[str, int]],
+                      first_token_delay: float) -> Iterator[str]:
+        """Eventos SSE: un fragmento por palabra al ritmo de tokens_per_second"""
+        sleep(first_token_delay)
+        pieces = re.findall(r'\S+\s*', content) or ['']
+        for piece in pieces:
+            if settings.tokens_per_second > 0:
+                sleep(count_tokens(piece) / settings.tokens_per_second)
+            yield _sse(dict(base, object='chat.completion.chunk', choices=[{
+                'index': 0, 'finish_reason': None, 'delta': {'content': piece}
+            }]))
+        yield _sse(dict(base, object='chat.completion.chunk', choices=[{
+            'index': 0, 'finish_reason': 'stop', 'delta': {}
+        }]))
+        if usage is not None:
+            yield _sse(dict(base, object='chat.completion.chunk', choices=[], usage=usage))
+        yield 'data: [DONE]\n\n'
+
+    @app.route('/openai/deployments/<deployment>/chat/completions', methods=['POST'])
+    def azure_chat_completions(deployment):
+        """Ruta de Azure OpenAI (AzureOpenAI con azure_endpoint)"""
+        return completion(deployment)
+
+    @app.route('/v1/chat/completions', methods=['POST'])
+    def chat_completions():
+        """Ruta de la API de OpenAI"""
+        body = request.get_json(silent=True) or {}
+        return completion(body.get('model', 'stub'))
+
+    @app.route('/stats', methods=['GET'])
+    def stub_stats():
+        """Peticiones atendidas, errores inyectados y tokens generados"""
+        with lock:
+            return jsonify(dict(stats, latency=settings.latency, tokens_per_second=settings.tokens_per_second))
+
+    return app
+
+
+def _sse(data: Dict[str, Any]) -> str:
+    return f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Servidor local compatible con Azure OpenAI para pruebas de carga')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8008)
+    parser.add_argument('--latency', default='constant:0', help='Latencia hasta el primer token, p. ej. lognormal:0.8,0.5')
+    parser.add_argument('--tokens-per-second', type=float, default=0.0, help='Velocidad de generación (0 = instantánea)')
+    parser.add_argument('--error-rate-429', type=float, default=0.0, help='Probabilidad de responder 429')
+    parser.add_argument('--error-rate-5xx', type=float, default=0.0, help='Probabilidad de responder un error 5xx')
+    parser.add_argument('--error-status', type=int, default=500, help='Código de los errores 5xx inyectados')
+    parser.add_argument('--retry-after', type=float, default=1.0, help='Segundos de Retry-After en los 429')
+    parser.add_argument('--seed', type=int, default=0, help='Semilla de respuestas, latencias y errores')
+    args = parser.parse_args()
+
+    settings = StubSettings(latency=args.latency, tokens_per_second=args.tokens_per_second,
+                            error_rate_429=args.error_rate_429, error_rate_5xx=args.error_rate_5xx,
+                            error_status=args.error_status, retry_after=args.retry_after, seed=args.seed)
+    print(f"🧪 Servidor LLM de pruebas en http://{args.host}:{args.port} "
+          f"(latencia {args.latency}, {args.tokens_per_second or '∞'} tokens/s, "
+          f"429 {args.error_rate_429:.0%}, 5xx {args.error_rate_5xx:.0%})")
+    create_stub_app(settings).run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
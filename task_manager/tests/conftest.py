@@ -22,6 +22,7 @@ from app.models.user_story_db import UserStory
 from app.database.azure_connection import Base, get_db_session
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 from config import Config
 
 # TestConfig is now imported from test_config.py
@@ -62,6 +63,24 @@ def test_db(app_context):
         mock_get_session.return_value = SessionLocal()
         yield SessionLocal()
 
+@pytest.fixture(scope='function')
+def sqlite_session_factory():
+    """Session factory over a shared in-memory SQLite database.
+    
+    Every session returned by the factory sees the same data, so it can be
+    used as side_effect for a patched get_db_session.
+    """
+    engine = create_engine(
+        'sqlite://',
+        echo=False,
+        poolclass=StaticPool,
+        connect_args={'check_same_thread': False}
+    )
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    yield SessionLocal
+    engine.dispose()
+
 @pytest.fixture
 def sample_task_data():
     """Sample task data for testing."""
@@ -241,7 +260,10 @@ def temp_tasks_file():
 @pytest.fixture
 def mock_azure_openai():
     """Mock Azure OpenAI client for testing."""
-    with patch('app.services.ai_service.openai') as mock_openai:
+    with patch('app.services.ai_service.get_openai_client') as mock_get_client:
+        mock_openai = Mock()
+        mock_get_client.return_value = mock_openai
+        
         # Mock response object for new API
         mock_response = Mock()
         mock_response.choices = [Mock()]
@@ -76,6 +76,7 @@ class TestTaskController:
         assert result['data'][0]['title'] == 'Task 1'
         assert result['data'][1]['title'] == 'Task 2'
         assert result['message'] == 'Tareas obtenidas exitosamente'
+        mock_task_manager.get_all_tasks.assert_called_once_with(filters=None, sort=None, view=None)
 
     @pytest.mark.unit
     @patch('app.controllers.task_controller.TaskManager')
@@ -98,6 +99,46 @@ class TestTaskController:
         assert 'error' in result
         assert 'Database error' in result['error']
 
+    @pytest.mark.unit
+    @patch('app.controllers.task_controller.TaskManager')
+    def test_get_tasks_page_success(self, mock_task_manager_class, task_controller):
+        """Test get_tasks_page method returns the cursor of the next page."""
+        mock_task_manager = Mock()
+        mock_task_manager_class.return_value = mock_task_manager
+        mock_task_manager.iter_tasks_page.return_value = {
+            'tasks': [{'id': 3, 'title': 'Task 3', 'category': 'desarrollo'}],
+            'next_cursor': 'cursor-3',
+            'has_more': True,
+            'limit': 1
+        }
+        
+        controller = TaskController()
+        result, status_code = controller.get_tasks_page(limit='1')
+        
+        assert status_code == 200
+        assert result['data'][0]['category'] == 'Desarrollo General'
+        assert result['next_cursor'] == 'cursor-3'
+        assert result['has_more'] is True
+        mock_task_manager.iter_tasks_page.assert_called_once_with(
+            limit=1, after=None, filters=None, sort=None, view=None
+        )
+
+    @pytest.mark.unit
+    def test_get_all_tasks_invalid_filter(self, task_controller):
+        """Test get_all_tasks method with an unknown status filter."""
+        result, status_code = task_controller.get_all_tasks(filters={'status': 'archivada'})
+        
+        assert status_code == 400
+        assert 'Estado inválido' in result['error']
+
+    @pytest.mark.unit
+    def test_get_tasks_page_invalid_limit(self, task_controller):
+        """Test get_tasks_page method with a non numeric limit."""
+        result, status_code = task_controller.get_tasks_page(limit='abc')
+        
+        assert status_code == 400
+        assert result['success'] is False
+
     @pytest.mark.unit
     @patch('app.controllers.task_controller.TaskManager')
     def test_get_task_by_id_success(self, mock_task_manager_class, task_controller):
@@ -388,4 +429,68 @@ class TestTaskController:
     @pytest.mark.unit
     def test_get_stats_method_exists(self, task_controller):
         """Test that get_stats method exists."""
-        assert hasattr(task_controller, 'get_stats') 
\ No newline at end of file
+        assert hasattr(task_controller, 'get_stats')
+
+    @pytest.mark.unit
+    @patch('app.controllers.task_controller.TaskManager')
+    def test_get_stats_uses_aggregated_stats(self, mock_task_manager_class):
+        """Test that get_stats uses TaskManager.get_stats instead of listing tasks."""
+        mock_task_manager = Mock()
+        mock_task_manager_class.return_value = mock_task_manager
+        mock_task_manager.get_stats.return_value = {
+            'total_tasks': 2,
+            'total_effort': 12,
+            'total_hours_incomplete': 4,
+            'total_tokens': 15,
+            'total_costos': 0.6,
+            'status_counts': {'pendiente': 1, 'completada': 1},
+            'priority_counts': {'media': 1, 'alta': 1},
+            'assigned_hours': {'Ana': 12}
+        }
+        
+        controller = TaskController()
+        result, status_code = controller.get_stats()
+        
+        assert status_code == 200
+        assert result['data']['total_effort'] == 12
+        assert result['data']['assigned_hours'] == {'Ana': 12}
+        assert 'tokens_por_tarea' not in result['data']
+        mock_task_manager.get_all_tasks.assert_not_called()
+
+    @pytest.mark.unit
+    @patch('app.controllers.task_controller.enqueue_enrichment')
+    @patch('app.controllers.task_controller.TaskManager')
+    def test_enrich_task_enqueues_job(self, mock_task_manager_class, mock_enqueue):
+        """Test that enrich_task returns 202 with the job id instead of calling the AI inline."""
+        mock_task_manager_class.return_value.get_task.return_value = Mock()
+        mock_enqueue.return_value = {
+            'id': 'abc123', 'task_id': 1, 'status': 'queued', 'attempts': 0, 'result': None, 'error': None
+        }
+        
+        controller = TaskController()
+        result, status_code = controller.enrich_task(1)
+        
+        assert status_code == 202
+        assert result['data']['job_id'] == 'abc123'
+        assert result['data']['status_url'] == '/tasks/enrich-jobs/abc123'
+        mock_enqueue.assert_called_once_with(1)
+        
+        mock_task_manager_class.return_value.get_task.return_value = None
+        result, status_code = TaskController().enrich_task(2)
+        assert status_code == 404
+
+    @pytest.mark.unit
+    @patch('app.controllers.task_controller.start_bulk_enrichment')
+    @patch('app.controllers.task_controller.TaskManager')
+    def test_enrich_pending_tasks_rejects_unknown_mode(self, mock_task_manager_class, mock_start):
+        """Test that an invalid mode is a 400 instead of a run that fails every task."""
+        from app.services import bulk_enrichment
+        mock_start.side_effect = lambda **options: bulk_enrichment.BulkEnrichment(
+            task_manager=Mock(), **{k: v for k, v in options.items() if k != 'reset'}
+        ).progress()
+        
+        result, status_code = TaskController().enrich_pending_tasks({'mode': 'fast'})
+        
+        assert status_code == 400
+        assert result['error'] == 'Modo de enriquecimiento no válido: fast'
+        assert TaskController().enrich_pending_tasks({'mode': 'parallel'})[1] == 202
@@ -0,0 +1,55 @@
+"""
+Unit tests for the description_truncated backfill migration.
+"""
+import json
+import pytest
+from app.database.backfill_description_truncated import backfill_table, backfill_json_file
+from app.models.task_db import TaskDB
+from app.utils.json_store import get_json_store
+from app.utils.task_manager import truncate_text
+from tests.conftest import create_test_task_db
+
+
+class TestBackfillDescriptionTruncated:
+    """Test class for the description_truncated backfill."""
+
+    @pytest.mark.unit
+    @pytest.mark.database
+    def test_backfill_table_fills_missing_rows(self, sqlite_session_factory):
+        """Test that only rows without description_truncated are backfilled, in batches."""
+        session = sqlite_session_factory()
+        long_description = ' '.join(f'word{i}' for i in range(40))
+        for i in range(3):
+            create_test_task_db(session, title=f'Task {i}', description=long_description)
+        create_test_task_db(session, title='Done', description='x', description_truncated='kept')
+
+        updated = backfill_table(session.connection(), 'tasks', batch_size=2)
+        session.expire_all()
+        values = [task.description_truncated for task in session.query(TaskDB).order_by(TaskDB.id)]
+        session.close()
+
+        assert updated == 3
+        assert values == [truncate_text(long_description, 30)] * 3 + ['kept']
+
+    @pytest.mark.unit
+    def test_backfill_json_file(self, tmp_path):
+        """Test that JSON records get description_truncated once, tasks.json through its store."""
+        records = [
+            {'id': 1, 'description': 'texto corto'},
+            {'id': 2, 'description': 'otro', 'description_truncated': 'otro'}
+        ]
+        tasks_file = tmp_path / 'tasks.json'
+        stories_file = tmp_path / 'user_stories.json'
+        tasks_file.write_text(json.dumps(records))
+        stories_file.write_text(json.dumps(records))
+
+        assert backfill_json_file(tasks_file) == 1
+        assert get_json_store(tasks_file).get(1)['description_truncated'] == 'texto corto'
+        # El cambio va al diario, no a la instantánea
+        assert 'description_truncated' not in json.loads(tasks_file.read_text())[0]
+        assert backfill_json_file(tasks_file) == 0
+
+        assert backfill_json_file(stories_file) == 1
+        assert json.loads(stories_file.read_text())[0]['description_truncated'] == 'texto corto'
+        assert backfill_json_file(stories_file) == 0
+        assert backfill_json_file(tmp_path / 'missing.json') == 0
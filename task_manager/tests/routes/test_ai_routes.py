@@ -0,0 +1,80 @@
+"""
+Integration tests for the AI routes.
+"""
+import json
+import pytest
+from unittest.mock import Mock, patch
+
+
+def parse_sse(body):
+    """Split a Server-Sent Events body into (event, data) pairs."""
+    events = []
+    for block in body.strip().split('\n\n'):
+        lines = dict(line.split(': ', 1) for line in block.split('\n'))
+        events.append((lines['event'], json.loads(lines['data'])))
+    return events
+
+
+class TestAIRoutes:
+    """Test class for AI routes."""
+
+    @pytest.mark.integration
+    @pytest.mark.ai
+    def test_generate_description_stream(self, client):
+        """Test that the SSE endpoint forwards tokens and closes with usage and form totals."""
+        service = Mock()
+        service.generate_description_stream.return_value = iter([
+            ('delta', 'Hola '), ('delta', 'mundo'), ('done', {'total_tokens': 52, 'cost': 0.01})
+        ])
+        with patch('app.routes.ai_routes.ai_service', service):
+            form_id = client.post('/ai/create-form').get_json()['form_id']
+            response = client.post('/ai/generate-description/stream',
+                                   json={'title': 'Tarea', 'form_id': form_id})
+
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+        events = parse_sse(response.get_data(as_text=True))
+        assert events[:2] == [('token', {'text': 'Hola '}), ('token', {'text': 'mundo'})]
+        assert events[2][0] == 'done'
+        assert events[2][1]['total_tokens'] == 52
+        assert events[2][1]['form_id'] == form_id
+
+    @pytest.mark.integration
+    @pytest.mark.ai
+    def test_generate_mitigation_stream_error_event(self, client):
+        """Test that a circuit opening mid-call is reported as an error event with status 503."""
+        service = Mock()
+        service.generate_mitigation_stream.return_value = iter([
+            ('error', {'success': False, 'error': 'Servicio no disponible', 'error_code': 'circuit_open'})
+        ])
+        with patch('app.routes.ai_routes.ai_service', service):
+            form_id = client.post('/ai/create-form').get_json()['form_id']
+            response = client.post('/ai/generate-mitigation/stream',
+                                   json={'title': 'Tarea', 'risk_analysis': 'Riesgos', 'form_id': form_id})
+            body = response.get_data(as_text=True)
+            missing = client.post('/ai/generate-mitigation/stream', json={'title': 'Tarea'})
+
+        assert parse_sse(body) == [
+            ('error', {'success': False, 'error': 'Servicio no disponible', 'status': 503})
+        ]
+        assert missing.status_code == 400
+
+    @pytest.mark.integration
+    @pytest.mark.ai
+    def test_stream_endpoints_fail_fast_with_open_circuit(self, client):
+        """Test that an open circuit returns a 503 JSON response before any stream starts."""
+        service = Mock()
+        service.circuit_breaker.state = 'open'
+        with patch('app.routes.ai_routes.ai_service', service):
+            form_id = client.post('/ai/create-form').get_json()['form_id']
+            responses = [
+                client.post('/ai/generate-description/stream', json={'title': 'Tarea', 'form_id': form_id}),
+                client.post('/ai/generate-mitigation/stream', json={'title': 'Tarea', 'form_id': form_id})
+            ]
+
+        for response in responses:
+            assert response.status_code == 503
+            assert response.mimetype == 'application/json'
+            assert response.get_json()['success'] is False
+        service.generate_description_stream.assert_not_called()
+        service.generate_mitigation_stream.assert_not_called()
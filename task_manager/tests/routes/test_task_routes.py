@@ -76,6 +76,51 @@ class TestTaskRoutes:
         assert data['success'] is True
         assert len(data['tasks']) == 2
 
+    @pytest.mark.integration
+    @patch('app.controllers.task_controller.TaskController.get_tasks_page')
+    def test_api_list_tasks_paginated(self, mock_get_tasks_page, client):
+        """Test API endpoint to list one page of tasks."""
+        mock_get_tasks_page.return_value = ({
+            'success': True,
+            'data': [{'id': 2, 'title': 'Test Task 2'}],
+            'total': 1,
+            'next_cursor': 'abc',
+            'has_more': True
+        }, 200)
+        
+        response = client.get('/tasks/api/list?limit=1&after=xyz')
+        
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['next_cursor'] == 'abc'
+        mock_get_tasks_page.assert_called_once_with(limit='1', after='xyz', filters=None, sort=None, view=None)
+
+    @pytest.mark.integration
+    @patch('app.controllers.task_controller.TaskController.get_all_tasks')
+    def test_api_list_tasks_with_filters(self, mock_get_all_tasks, client):
+        """Test that list filters and sort are forwarded to the controller."""
+        mock_get_all_tasks.return_value = ({'success': True, 'data': [], 'total': 0}, 200)
+        
+        response = client.get('/tasks/api/list?status=pendiente&assigned_to=Ana&sort=-effort')
+        
+        assert response.status_code == 200
+        mock_get_all_tasks.assert_called_once_with(
+            filters={'status': 'pendiente', 'assigned_to': 'Ana'},
+            sort='-effort',
+            view=None
+        )
+
+    @pytest.mark.integration
+    @patch('app.controllers.task_controller.TaskController.get_all_tasks')
+    def test_api_list_tasks_summary_view(self, mock_get_all_tasks, client):
+        """Test that the summary view is forwarded to the controller."""
+        mock_get_all_tasks.return_value = ({'success': True, 'data': [], 'total': 0}, 200)
+        
+        response = client.get('/tasks/api/list?view=summary')
+        
+        assert response.status_code == 200
+        mock_get_all_tasks.assert_called_once_with(filters=None, sort=None, view='summary')
+
     @pytest.mark.integration
     @patch('app.controllers.task_controller.TaskController.get_task_by_id')
     def test_api_get_task_success(self, mock_get_task, client):
@@ -224,6 +269,10 @@ class TestTaskRoutes:
         data = json.loads(response.data)
         assert data['success'] is True
         assert 'stats' in data
+        mock_get_stats.assert_called_once_with(include_per_task=False)
+        
+        client.get('/tasks/api/stats?per_task=true')
+        mock_get_stats.assert_called_with(include_per_task=True)
 
     @pytest.mark.integration
     def test_invalid_task_id_format(self, client):
@@ -286,6 +335,21 @@ class TestTaskRoutes:
         # Verify that the controller method was called with correct task_id
         mock_enrich_task.assert_called_once_with(1)
 
+    @pytest.mark.integration
+    @patch('app.controllers.task_controller.TaskController.get_enrichment_job')
+    def test_api_get_enrichment_job(self, mock_get_job, client):
+        """Test API endpoint to poll an enrichment job."""
+        mock_get_job.return_value = ({
+            'success': True,
+            'data': {'job_id': 'abc123', 'task_id': 1, 'status': 'done', 'result': {'id': 1}}
+        }, 200)
+        
+        response = client.get('/tasks/enrich-jobs/abc123')
+        
+        assert response.status_code == 200
+        assert json.loads(response.data)['data']['status'] == 'done'
+        mock_get_job.assert_called_once_with('abc123')
+
     @pytest.mark.integration
     def test_root_redirect(self, client):
         """Test that root URL redirects to tasks."""
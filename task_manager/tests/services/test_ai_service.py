@@ -1,9 +1,11 @@
 """
 Unit tests for the AIService.
 """
+import json
+import threading
 import pytest
 from unittest.mock import patch, Mock, MagicMock
-from app.services.ai_service import AIService
+from app.services.ai_service import AIService, validate_enrichment
 
 
 class TestAIService:
@@ -234,6 +236,147 @@ class TestAIService:
         assert result['tokens_gastados'] == 250  # Sum of all tokens
         assert result['costos'] == 0.025  # Sum of all costs
 
+    @pytest.mark.unit
+    @pytest.mark.ai
+    def test_process_task_parallel_mode(self, mock_azure_openai):
+        """Test that category, effort and risks run concurrently in parallel mode."""
+        barrier = threading.Barrier(3, timeout=5)
+        responses = {
+            'Genera una descripción': ("Generated description", {"total_tokens": 50, "cost": 0.005}),
+            'Categoriza': ("desarrollo", {"total_tokens": 30, "cost": 0.003}),
+            'Estima': ("8", {"total_tokens": 40, "cost": 0.004}),
+            'Analiza': ("Risk analysis", {"total_tokens": 60, "cost": 0.006}),
+            'Genera un plan': ("Mitigation plan", {"total_tokens": 70, "cost": 0.007}),
+        }
+
+        def fake_call_llm(system_prompt, user_prompt):
+            prefix = next(key for key in responses if user_prompt.startswith(key))
+            if prefix in ('Categoriza', 'Estima', 'Analiza'):
+                # Las tres etapas intermedias deben estar en curso a la vez
+                barrier.wait()
+            if prefix == 'Genera un plan':
+                assert 'Risk analysis' in user_prompt
+            return responses[prefix]
+
+        service = AIService()
+        with patch.object(service, '_call_llm', side_effect=fake_call_llm):
+            result = service.process_task({'title': 'Test Task'}, mode='parallel')
+
+        assert result['category'] == "desarrollo"
+        assert result['effort'] == 8
+        assert result['risk_mitigation'] == "Mitigation plan"
+        assert result['tokens_gastados'] == 250
+        assert result['ai_processing']['effort_estimation'] == {"total_tokens": 40, "cost": 0.004}
+        with pytest.raises(ValueError):
+            service.process_task({'title': 'Test Task'}, mode='unknown')
+
+    @pytest.mark.unit
+    @pytest.mark.ai
+    @patch('app.services.ai_service.AIService._call_llm')
+    def test_process_task_one_shot_mode(self, mock_call_llm, mock_azure_openai):
+        """Test that one_shot mode enriches the task with a single JSON call."""
+        mock_call_llm.return_value = (json.dumps({
+            'description': 'Generated description',
+            'category': 'Documentación',
+            'effort': '4',
+            'risk_analysis': 'Risk analysis',
+            'mitigation': 'Mitigation plan'
+        }), {"input_tokens": 80, "total_tokens": 120, "cost": 0.01})
+
+        service = AIService()
+        result = service.process_task({'title': 'Test Task'}, mode='one_shot')
+
+        assert mock_call_llm.call_count == 1
+        assert mock_call_llm.call_args.kwargs == {'json_mode': True}
+        assert result['category'] == 'documentacion'
+        assert result['effort'] == 4
+        assert result['risk_mitigation'] == 'Mitigation plan'
+        assert result['tokens_gastados'] == 120
+        assert list(result['ai_processing']) == ['one_shot']
+
+    @pytest.mark.unit
+    @pytest.mark.ai
+    def test_process_task_one_shot_falls_back(self, mock_azure_openai):
+        """Test that an invalid one_shot response falls back to the staged path."""
+        def fake_call_llm(system_prompt, user_prompt, json_mode=False):
+            if json_mode:
+                return '{"description": "Solo descripción"}', {"total_tokens": 100, "cost": 0.01}
+            return "8", {"total_tokens": 10, "cost": 0.001}
+
+        service = AIService()
+        with patch.object(service, '_call_llm', side_effect=fake_call_llm):
+            result = service.process_task({'title': 'Test Task'}, mode='one_shot')
+
+        assert result['effort'] == 8
+        assert result['tokens_gastados'] == 150
+        assert set(result['ai_processing']) == {
+            'one_shot', 'description', 'categorization', 'effort_estimation', 'risk_analysis', 'mitigation'
+        }
+
+    @pytest.mark.unit
+    @pytest.mark.ai
+    def test_validate_enrichment_rejects_non_finite_effort(self):
+        """Test that an infinite or NaN effort is reported as a validation error."""
+        data = json.loads('{"description": "d", "category": "testing", "effort": 1e999, '
+                          '"risk_analysis": "r", "mitigation": "m"}')
+        with pytest.raises(ValueError):
+            validate_enrichment(data)
+        with pytest.raises(ValueError):
+            validate_enrichment(dict(data, effort='nan'))
+
+    @pytest.mark.unit
+    @pytest.mark.ai
+    @patch('app.services.ai_service.AIService._call_llm')
+    def test_categorize_tasks_batch(self, mock_call_llm, mock_azure_openai):
+        """Test that several tasks are categorized with one aligned call."""
+        mock_call_llm.return_value = (
+            '{"categories": ["Documentación", "Base de Datos", "Desconocida"]}',
+            {"total_tokens": 90, "cost": 0.009}
+        )
+        service = AIService()
+
+        result = service.categorize_tasks_batch([
+            {'title': 'Redactar SOP'}, {'title': 'Crear índice', 'description': 'Tabla de lotes'}, {'title': 'Otra'}
+        ])
+
+        assert mock_call_llm.call_count == 1
+        assert 'Crear índice - Tabla de lotes' in mock_call_llm.call_args.args[1]
+        assert result['categories'] == ['documentacion', 'base_de_datos', 'otro']
+        assert result['total_tokens'] == 90
+        assert service.categorize_tasks_batch([])['categories'] == []
+
+        mock_call_llm.return_value = ('{"categories": ["Documentación"]}', {"total_tokens": 1, "cost": 0.0})
+        assert service.categorize_tasks_batch([{'title': 'A'}, {'title': 'B'}])['success'] is False
+
+    @pytest.mark.unit
+    @pytest.mark.ai
+    def test_generate_description_stream(self, mock_azure_openai):
+        """Test that streamed deltas are forwarded and usage is reported at the end."""
+        def chunk(text=None, usage=None):
+            choices = [Mock(delta=Mock(content=text))] if text is not None else []
+            return Mock(choices=choices, usage=usage)
+
+        mock_azure_openai.chat.completions.create.return_value = iter([
+            chunk('Descripción '), chunk('generada'),
+            chunk(usage=Mock(prompt_tokens=40, completion_tokens=12, total_tokens=52))
+        ])
+        service = AIService()
+
+        events = list(service.generate_description_stream('Tarea'))
+
+        assert events[:2] == [('delta', 'Descripción '), ('delta', 'generada')]
+        assert events[2][0] == 'done'
+        assert events[2][1]['total_tokens'] == 52
+        assert events[2][1]['cost'] == service.calculate_cost(40, 12)
+        kwargs = mock_azure_openai.chat.completions.create.call_args.kwargs
+        assert kwargs['stream'] is True
+        assert kwargs['stream_options'] == {'include_usage': True}
+
+        mock_azure_openai.chat.completions.create.side_effect = Exception('authentication failed')
+        event, result = list(service.generate_mitigation_stream('Tarea'))[-1]
+        assert event == 'error'
+        assert 'Error de autenticación' in result['error']
+
     @pytest.mark.unit
     @pytest.mark.ai
     def test_generate_user_story_method_exists(self, mock_azure_openai):
@@ -291,8 +434,12 @@ class TestAIService:
     @pytest.mark.unit
     @pytest.mark.ai
     def test_ai_service_encoding_initialization(self, mock_azure_openai):
-        """Test that encoding is properly initialized."""
-        service = AIService()
-        
-        assert hasattr(service, 'encoding')
-        assert service.encoding is not None 
\ No newline at end of file
+        """Test that token counts use the process encoder on every call, not one cached at init."""
+        encoding = Mock()
+        encoding.encode.return_value = [1, 2, 3]
+        with patch('app.services.token_counter.get_encoding', return_value=None):
+            service = AIService()
+            assert service.count_tokens('uno dos tres cuatro') == 5
+        # A later successful load is picked up by the existing instance
+        with patch('app.services.token_counter.get_encoding', return_value=encoding):
+            assert service.count_tokens('uno dos tres cuatro') == 3 
\ No newline at end of file
@@ -0,0 +1,103 @@
+"""
+Unit tests for the AsyncAIService.
+"""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+from openai import InternalServerError
+from app.services.async_ai_service import AsyncAIService
+
+
+def completion(content, prompt_tokens=50, completion_tokens=30):
+    response = Mock()
+    response.choices = [Mock()]
+    response.choices[0].message.content = content
+    response.usage = Mock(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                          total_tokens=prompt_tokens + completion_tokens)
+    return response
+
+
+@pytest.fixture
+def mock_async_openai():
+    """Mock AsyncAzureOpenAI client whose create() is awaitable."""
+    with patch('app.services.async_ai_service.create_async_openai_client') as mock_create:
+        client = Mock()
+        client.chat.completions.create = AsyncMock(return_value=completion("Mocked AI response"))
+        client.close = AsyncMock()
+        mock_create.return_value = client
+        yield client
+
+
+class TestAsyncAIService:
+    """Test class for AsyncAIService."""
+
+    @pytest.mark.unit
+    @pytest.mark.ai
+    def test_public_methods_use_async_client(self, mock_async_openai):
+        """Test that the coroutine methods call the async client and shape results like AIService."""
+        mock_async_openai.chat.completions.create.side_effect = [
+            completion("Documentación"), completion(" 16 "), completion("Risk analysis")
+        ]
+
+        async def run():
+            async with AsyncAIService() as service:
+                return (await service.categorize_task('Write docs'),
+                        await service.estimate_effort('Write docs'),
+                        await service.analyze_risks('Write docs'))
+
+        category, effort, risks = asyncio.run(run())
+
+        assert category == {'success': True, 'category': 'documentacion', 'total_tokens': 80,
+                            'cost': pytest.approx(0.000135)}
+        assert effort['effort'] == 16
+        assert risks['risk_analysis'] == "Risk analysis"
+        assert mock_async_openai.chat.completions.create.await_count == 3
+        mock_async_openai.close.assert_awaited_once()
+
+    @pytest.mark.unit
+    @pytest.mark.ai
+    def test_errors_are_returned_as_failed_results(self, mock_async_openai):
+        """Test that API failures surface as success False after the retries."""
+        error = InternalServerError('error', response=Mock(status_code=500, headers={}, request=Mock()), body=None)
+        mock_async_openai.chat.completions.create.side_effect = error
+        service = AsyncAIService()
+        service.retry_policy = Mock(call_async=AsyncMock(side_effect=error))
+        service.circuit_breaker = Mock()
+
+        result = asyncio.run(service.generate_description('Test Task'))
+
+        assert result['success'] is False
+        assert result['error'].startswith('Error inesperado al llamar a la API')
+        service.circuit_breaker.record.assert_called_once_with(False)
+
+    @pytest.mark.unit
+    @pytest.mark.ai
+    def test_process_task_parallel_mode(self, mock_async_openai):
+        """Test that category, effort and risks are awaited concurrently."""
+        responses = {
+            'Genera una descripción': ("Generated description", {"total_tokens": 50, "cost": 0.005}),
+            'Categoriza': ("desarrollo", {"total_tokens": 30, "cost": 0.003}),
+            'Estima': ("8", {"total_tokens": 40, "cost": 0.004}),
+            'Analiza': ("Risk analysis", {"total_tokens": 60, "cost": 0.006}),
+            'Genera un plan': ("Mitigation plan", {"total_tokens": 70, "cost": 0.007}),
+        }
+        in_flight = []
+        peak = []
+
+        async def fake_call_llm(system_prompt, user_prompt, json_mode=False):
+            prefix = next(key for key in responses if user_prompt.startswith(key))
+            in_flight.append(prefix)
+            peak.append(len(in_flight))
+            await asyncio.sleep(0.01)
+            in_flight.remove(prefix)
+            return responses[prefix]
+
+        service = AsyncAIService()
+        with patch.object(service, '_call_llm_async', side_effect=fake_call_llm):
+            result = asyncio.run(service.process_task({'title': 'Test Task'}, mode='parallel'))
+
+        assert max(peak) == 3
+        assert result['category'] == "desarrollo"
+        assert result['effort'] == 8
+        assert result['risk_mitigation'] == "Mitigation plan"
+        assert result['tokens_gastados'] == 250
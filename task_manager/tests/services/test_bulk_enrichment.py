@@ -0,0 +1,110 @@
+"""
+Unit tests for the bulk enrichment pipeline.
+"""
+import asyncio
+import json
+import pytest
+from unittest.mock import patch
+from app.services.bulk_enrichment import COMPLETED, INTERRUPTED, BulkEnrichment
+from app.services.circuit_breaker import CircuitOpenError
+
+
+class FakeTaskManager:
+    """In-memory TaskManager exposing the two methods used by the pipeline."""
+
+    def __init__(self, task_ids):
+        self.tasks = {task_id: {'id': task_id, 'title': f'Task {task_id}', 'description': ''} for task_id in task_ids}
+        self.writes = []
+
+    def get_tasks_pending_enrichment(self, after_id=0, limit=50):
+        return [self.tasks[task_id] for task_id in sorted(self.tasks) if task_id > after_id][:limit]
+
+    def update_tasks_bulk(self, updates):
+        self.writes.append(dict(updates))
+        for task_id in updates:
+            self.tasks.pop(task_id, None)
+        return len(updates)
+
+
+class FakeAsyncAIService:
+    """Async service double: fails or opens the circuit for chosen titles."""
+
+    failures = {}
+    in_flight = 0
+    peak = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return None
+
+    async def process_task(self, task_data, mode=None):
+        cls = FakeAsyncAIService
+        cls.in_flight += 1
+        cls.peak = max(cls.peak, cls.in_flight)
+        await asyncio.sleep(0.01)
+        cls.in_flight -= 1
+        failure = cls.failures.get(task_data['title'])
+        if failure is not None:
+            raise failure
+        return dict(task_data, category='documentacion', risk_analysis='Risks', risk_mitigation='Plan',
+                    effort=4, tokens_gastados=100, costos=0.01)
+
+
+@pytest.fixture
+def fake_service():
+    FakeAsyncAIService.failures = {}
+    FakeAsyncAIService.peak = 0
+    with patch('app.services.bulk_enrichment.AsyncAIService', FakeAsyncAIService):
+        yield FakeAsyncAIService
+
+
+class TestBulkEnrichment:
+    """Test class for BulkEnrichment."""
+
+    @pytest.mark.unit
+    def test_enriches_pending_tasks_in_batches(self, fake_service, tmp_path):
+        """Test bounded concurrency, batched writes, failures and throughput reporting."""
+        fake_service.failures = {'Task 3': Exception('bad response')}
+        task_manager = FakeTaskManager(range(1, 8))
+        reports = []
+        run = BulkEnrichment(concurrency=2, batch_size=2, checkpoint_path=str(tmp_path / 'checkpoint.json'),
+                             task_manager=task_manager, on_progress=reports.append)
+
+        progress = run.run()
+
+        assert fake_service.peak == 2
+        assert progress['status'] == COMPLETED
+        assert progress['succeeded'] == 6
+        assert progress['failed'] == {'3': 'bad response'}
+        assert progress['total_tokens'] == 600
+        assert progress['tasks_per_minute'] > 0
+        assert all(len(batch) <= 2 for batch in task_manager.writes)
+        assert task_manager.writes[0][1]['mitigation_plan'] == 'Plan'
+        assert reports[-1]['succeeded'] == 6
+        assert json.loads((tmp_path / 'checkpoint.json').read_text())['status'] == COMPLETED
+
+    @pytest.mark.unit
+    def test_open_circuit_interrupts_and_run_resumes(self, fake_service, tmp_path):
+        """Test that an open circuit saves a checkpoint and the next run resumes from it."""
+        checkpoint = str(tmp_path / 'checkpoint.json')
+        task_manager = FakeTaskManager(range(1, 6))
+        fake_service.failures = {'Task 2': Exception('bad response'), 'Task 4': CircuitOpenError('open')}
+
+        first = BulkEnrichment(concurrency=1, batch_size=10, checkpoint_path=checkpoint,
+                               task_manager=task_manager).run()
+
+        assert first['status'] == INTERRUPTED
+        # Lo ya enriquecido antes de la interrupción se escribe igualmente
+        assert first['succeeded'] == 2
+        assert sorted(task_manager.tasks) == [2, 4, 5]
+
+        fake_service.failures = {}
+        second = BulkEnrichment(concurrency=1, batch_size=10, checkpoint_path=checkpoint,
+                                task_manager=task_manager).run()
+
+        assert second['status'] == COMPLETED
+        assert second['succeeded'] == 4
+        # La tarea fallida se salta al reanudar
+        assert sorted(task_manager.tasks) == [2]
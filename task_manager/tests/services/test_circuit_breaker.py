@@ -0,0 +1,94 @@
+"""
+Unit tests for the Azure OpenAI circuit breaker.
+"""
+import pytest
+from unittest.mock import Mock, patch
+from openai import InternalServerError
+from app.controllers.task_controller import TaskController
+from app.services.ai_service import AIService
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.services.llm_retry import RetryPolicy
+from app.services.rate_limiter import RateLimitExceeded
+
+
+class TestCircuitBreaker:
+    """Test class for CircuitBreaker."""
+
+    @pytest.mark.unit
+    def test_opens_on_failure_rate_and_recovers_through_half_open(self):
+        """Test closed -> open -> half_open -> closed transitions."""
+        breaker = CircuitBreaker(window_seconds=60, min_calls=4, failure_rate=0.5, open_seconds=30)
+        for success in (True, False, True):
+            breaker.before_call()
+            breaker.record(success)
+        assert breaker.state == 'closed'
+
+        breaker.before_call()
+        breaker.record(False)
+        assert breaker.state == 'open'
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+
+        with patch('app.services.circuit_breaker.time.monotonic', return_value=breaker._opened_at + 31):
+            assert breaker.state == 'half_open'
+            breaker.before_call()
+            # Solo una llamada de prueba a la vez
+            with pytest.raises(CircuitOpenError):
+                breaker.before_call()
+            breaker.record(True)
+            assert breaker.state == 'closed'
+
+        assert breaker.snapshot()['times_opened'] == 1
+        assert breaker.snapshot()['rejected'] == 2
+
+    @pytest.mark.unit
+    def test_failed_probe_reopens(self):
+        """Test that a failing half-open probe opens the circuit again."""
+        breaker = CircuitBreaker(min_calls=1, failure_rate=0.5, open_seconds=0)
+        breaker.before_call()
+        breaker.record(False)
+        assert breaker.state == 'half_open'
+
+        breaker.before_call()
+        breaker.record(False)
+        assert breaker.snapshot()['times_opened'] == 2
+
+    @pytest.mark.unit
+    @pytest.mark.ai
+    def test_local_rejection_releases_probe_without_closing(self, mock_azure_openai):
+        """Test that a rate limiter rejection frees the half-open probe but leaves the circuit half-open."""
+        service = AIService()
+        service.retry_policy = RetryPolicy(max_attempts=1)
+        service.rate_limiter = Mock()
+        service.rate_limiter.acquire.side_effect = RateLimitExceeded('sin presupuesto')
+        service.circuit_breaker = CircuitBreaker(min_calls=1, failure_rate=0.5, open_seconds=0)
+        service.circuit_breaker.before_call()
+        service.circuit_breaker.record(False)
+
+        assert service.generate_description('Tarea')['success'] is False
+
+        assert mock_azure_openai.chat.completions.create.call_count == 0
+        assert service.circuit_breaker.state == 'half_open'
+        # The probe slot is free for the next real call
+        service.circuit_breaker.before_call()
+
+    @pytest.mark.unit
+    @pytest.mark.ai
+    def test_ai_service_fails_fast_while_open(self, mock_azure_openai):
+        """Test that transient failures open the circuit and later calls skip Azure."""
+        response = Mock(status_code=503, headers={}, request=Mock())
+        mock_create = mock_azure_openai.chat.completions.create
+        mock_create.side_effect = InternalServerError('unavailable', response=response, body=None)
+        service = AIService()
+        service.retry_policy = RetryPolicy(max_attempts=1)
+        service.circuit_breaker = CircuitBreaker(min_calls=2, failure_rate=0.5, open_seconds=60)
+
+        for _ in range(2):
+            assert service.generate_description('Tarea')['success'] is False
+        result = service.categorize_task('Tarea')
+
+        assert mock_create.call_count == 2
+        assert result['error_code'] == 'circuit_open'
+        with patch('app.controllers.task_controller.get_ai_service', return_value=service):
+            response, status = TaskController().categorize_task({'title': 'Tarea'})
+        assert status == 503
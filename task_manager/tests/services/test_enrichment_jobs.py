@@ -0,0 +1,183 @@
+"""
+Unit tests for the enrichment job queue and worker pool.
+"""
+import sqlite3
+import time
+import pytest
+from unittest.mock import Mock, patch
+from app.models.enums import TaskCategory
+from app.models.task import Task
+from app.models.task_db import TaskDB
+from app.services.circuit_breaker import CircuitOpenError
+from app.services.enrichment_jobs import (
+    DONE, FAILED, QUEUED, RUNNING, EnrichmentWorkerPool, JobQueue, enrich_task_by_id
+)
+from tests.conftest import create_test_task_db
+
+
+@pytest.fixture
+def job_queue(tmp_path):
+    """Job queue backed by a temporary SQLite file."""
+    return JobQueue(str(tmp_path / 'jobs.sqlite3'))
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, 'timed out waiting for the workers'
+        time.sleep(0.01)
+
+
+class TestEnrichmentJobs:
+    """Test class for the enrichment job subsystem."""
+
+    @pytest.mark.unit
+    def test_queue_lifecycle(self, job_queue):
+        """Test enqueue deduplication, claiming, completion and retries."""
+        job = job_queue.enqueue(7)
+        assert job['status'] == QUEUED
+        assert job_queue.enqueue(7)['id'] == job['id']
+
+        claimed = job_queue.claim()
+        assert claimed['id'] == job['id']
+        assert claimed['status'] == RUNNING
+        assert claimed['attempts'] == 1
+        assert job_queue.claim() is None
+
+        job_queue.fail(job['id'], 'circuit open', retry_in=60)
+        assert job_queue.get(job['id'])['status'] == QUEUED
+        # Todavía no disponible: espera el tiempo de reintento
+        assert job_queue.claim() is None
+
+        other = job_queue.enqueue(8)
+        job_queue.claim()
+        job_queue.complete(other['id'], {'id': 8, 'effort': 4})
+        assert job_queue.get(other['id'])['result'] == {'id': 8, 'effort': 4}
+        assert job_queue.counts() == {QUEUED: 1, RUNNING: 0, DONE: 1, FAILED: 0}
+        assert job_queue.get('missing') is None
+
+    @pytest.mark.unit
+    def test_requeue_stale_running_jobs(self, job_queue):
+        """Test that jobs left running by a dead process go back to the queue."""
+        job = job_queue.enqueue(3)
+        job_queue.claim()
+
+        assert job_queue.requeue_stale(timeout=60) == 0
+        assert job_queue.requeue_stale(timeout=-1) == 1
+        assert job_queue.get(job['id'])['status'] == QUEUED
+
+    @pytest.mark.unit
+    def test_queue_closes_connections(self, tmp_path):
+        """Test that queue operations do not leak SQLite connections."""
+        opened = []
+        real_connect = sqlite3.connect
+
+        def connect(*args, **kwargs):
+            opened.append(real_connect(*args, **kwargs))
+            return opened[-1]
+
+        with patch('app.services.enrichment_jobs.sqlite3.connect', side_effect=connect):
+            queue = JobQueue(str(tmp_path / 'jobs.sqlite3'))
+            job = queue.enqueue(1)
+            queue.claim()
+            queue.complete(job['id'], {'id': 1})
+            queue.counts()
+
+        assert opened
+        for conn in opened:
+            with pytest.raises(sqlite3.ProgrammingError):
+                conn.execute('SELECT 1')
+
+    @pytest.mark.unit
+    def test_idle_workers_requeue_stale_jobs(self, job_queue):
+        """Test that a job left running by a recent crash is picked up once it times out."""
+        job = job_queue.enqueue(4)
+        job_queue.claim()
+        pool = EnrichmentWorkerPool(job_queue, workers=1, run_job=lambda task_id: {'id': task_id},
+                                    poll_interval=0.01, job_timeout=0.2, requeue_interval=0.01)
+
+        pool.start()
+        try:
+            # Not stale yet at start-up: the worker requeues it later, while idle
+            assert job_queue.get(job['id'])['status'] == RUNNING
+            wait_for(lambda: job_queue.get(job['id'])['status'] == DONE)
+        finally:
+            pool.stop(timeout=5)
+        assert job_queue.get(job['id'])['attempts'] == 2
+
+    @pytest.mark.unit
+    def test_worker_pool_runs_jobs(self, job_queue):
+        """Test that workers complete jobs, retry an open circuit and record failures."""
+        outcomes = {1: [{'id': 1}], 2: [CircuitOpenError('open'), {'id': 2}], 3: [ValueError('bad')]}
+
+        def run_job(task_id):
+            outcome = outcomes[task_id].pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        pool = EnrichmentWorkerPool(job_queue, workers=2, run_job=run_job, poll_interval=0.01)
+        jobs = [job_queue.enqueue(task_id) for task_id in (1, 2, 3)]
+        with patch('app.services.enrichment_jobs.get_circuit_breaker', return_value=Mock(open_seconds=0)):
+            pool.start()
+            try:
+                wait_for(lambda: job_queue.counts()[QUEUED] + job_queue.counts()[RUNNING] == 0)
+            finally:
+                pool.stop(timeout=5)
+
+        first, second, third = (job_queue.get(job['id']) for job in jobs)
+        assert first['status'] == DONE and first['result'] == {'id': 1}
+        assert second['status'] == DONE and second['attempts'] == 2
+        assert third['status'] == FAILED and third['error'] == 'bad'
+
+    @pytest.mark.unit
+    @patch('app.services.enrichment_jobs.get_ai_service')
+    @patch('app.services.enrichment_jobs.TaskManager')
+    def test_enrich_task_by_id_writes_results(self, mock_task_manager_class, mock_get_ai_service):
+        """Test that the enriched fields are saved through TaskManager."""
+        mock_task_manager = mock_task_manager_class.return_value
+        mock_task_manager.get_task.return_value = Task(id=5, title='Calibrate scale')
+        mock_task_manager.update_task.side_effect = lambda task_id, data: Task(id=task_id, title='Calibrate scale', **data)
+        mock_get_ai_service.return_value.process_task.return_value = {
+            'description': 'Description', 'category': 'documentacion', 'effort': 4,
+            'risk_analysis': 'Risks', 'risk_mitigation': 'Mitigation',
+            'tokens_gastados': 250, 'costos': 0.02
+        }
+
+        result = enrich_task_by_id(5)
+
+        mock_get_ai_service.return_value.process_task.assert_called_once_with(
+            {'title': 'Calibrate scale', 'description': ''}
+        )
+        saved = mock_task_manager.update_task.call_args.args[1]
+        assert saved['mitigation_plan'] == 'Mitigation'
+        assert result['effort'] == 4
+        assert result['tokens_gastados'] == 250
+
+        mock_task_manager.get_task.return_value = None
+        with pytest.raises(LookupError):
+            enrich_task_by_id(6)
+
+    @pytest.mark.unit
+    @pytest.mark.database
+    @patch('app.services.enrichment_jobs.get_ai_service')
+    def test_enrich_task_by_id_saves_to_database(self, mock_get_ai_service, sqlite_session_factory):
+        """Test that the enum value returned by process_task is stored in the category column."""
+        session = sqlite_session_factory()
+        task_id = create_test_task_db(session, title='Calibrate scale', category=TaskCategory.OTRO).id
+        session.close()
+        mock_get_ai_service.return_value.process_task.return_value = {
+            'description': 'Description', 'category': 'testing', 'effort': 4,
+            'risk_analysis': 'Risks', 'risk_mitigation': 'Mitigation',
+            'tokens_gastados': 250, 'costos': 0.02
+        }
+
+        with patch('app.utils.task_manager.get_db_session', side_effect=sqlite_session_factory):
+            result = enrich_task_by_id(task_id)
+
+        session = sqlite_session_factory()
+        saved = session.get(TaskDB, task_id)
+        assert saved.category == TaskCategory.TESTING
+        assert saved.mitigation_plan == 'Mitigation'
+        session.close()
+        assert result['category'] == 'testing'
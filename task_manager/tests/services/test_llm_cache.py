@@ -0,0 +1,92 @@
+"""
+Unit tests for the LLM response cache.
+"""
+import sqlite3
+import pytest
+from unittest.mock import patch, Mock
+from app.services.ai_service import AIService
+from app.services.llm_cache import MemoryLLMCache, SQLiteLLMCache, cache_key, create_llm_cache
+
+
+class TestLLMCache:
+    """Test class for the LLM cache backends."""
+
+    @pytest.mark.unit
+    def test_cache_key_covers_all_parameters(self):
+        """Test that any sampling parameter change yields a different key."""
+        params = dict(deployment='d', system_prompt='s', user_prompt='u', temperature=0.7,
+                      top_p=0.2, frequency_penalty=0.0, presence_penalty=0.0, max_tokens=1000)
+
+        assert cache_key(**params) == cache_key(**dict(reversed(list(params.items()))))
+        assert cache_key(**params) != cache_key(**{**params, 'top_p': 0.3})
+        assert cache_key(**params) != cache_key(**{**params, 'user_prompt': 'v'})
+
+    @pytest.mark.unit
+    def test_memory_cache_lru_and_ttl(self):
+        """Test LRU eviction, TTL expiry and hit/miss counters."""
+        cache = MemoryLLMCache(max_entries=2, ttl=60)
+        cache.set('a', 'A', {'total_tokens': 1})
+        cache.set('b', 'B', {'total_tokens': 2})
+        assert cache.get('a') == ('A', {'total_tokens': 1})
+        cache.set('c', 'C', {'total_tokens': 3})
+
+        assert cache.get('b') is None
+        assert cache.stats() == {'backend': 'memory', 'hits': 1, 'misses': 1, 'hit_rate': 0.5, 'entries': 2}
+        with patch('app.services.llm_cache.time.time', return_value=10 ** 12):
+            assert cache.get('a') is None
+
+    @pytest.mark.unit
+    def test_sqlite_cache_persists(self, tmp_path):
+        """Test that the SQLite backend is shared across instances."""
+        path = tmp_path / 'llm_cache.sqlite3'
+        SQLiteLLMCache(path).set('k', 'respuesta', {'total_tokens': 70, 'cost': 0.1})
+
+        cache = SQLiteLLMCache(path)
+        assert cache.get('k') == ('respuesta', {'total_tokens': 70, 'cost': 0.1})
+        assert cache.get('otra') is None
+        assert cache.stats()['entries'] == 1
+        assert create_llm_cache('off') is None
+        with pytest.raises(ValueError):
+            create_llm_cache('redis')
+
+    @pytest.mark.unit
+    def test_sqlite_cache_closes_connections(self, tmp_path):
+        """Test that every cache operation closes the connection it opened."""
+        opened = []
+        real_connect = sqlite3.connect
+
+        def connect(*args, **kwargs):
+            opened.append(real_connect(*args, **kwargs))
+            return opened[-1]
+
+        with patch('app.services.llm_cache.sqlite3.connect', side_effect=connect):
+            cache = SQLiteLLMCache(tmp_path / 'llm_cache.sqlite3')
+            cache.set('k', 'respuesta', {'total_tokens': 70})
+            cache.get('k')
+            cache.size()
+
+        assert len(opened) == 4
+        for conn in opened:
+            with pytest.raises(sqlite3.ProgrammingError):
+                conn.execute('SELECT 1')
+
+    @pytest.mark.unit
+    @pytest.mark.ai
+    def test_call_llm_serves_hits_with_zero_cost(self, mock_azure_openai):
+        """Test that a repeated prompt skips the API and records the original cost."""
+        mock_response = Mock()
+        mock_response.choices = [Mock(message=Mock(content='Categoría'))]
+        mock_response.usage = Mock(prompt_tokens=40, completion_tokens=10, total_tokens=50)
+        mock_azure_openai.chat.completions.create.return_value = mock_response
+
+        service = AIService()
+        service.cache = MemoryLLMCache()
+        first = service._call_llm('system', 'user')
+        second = service._call_llm('system', 'user')
+
+        assert mock_azure_openai.chat.completions.create.call_count == 1
+        assert second[0] == first[0] == 'Categoría'
+        assert second[1]['total_tokens'] == 0 and second[1]['cost'] == 0.0
+        assert second[1]['cache_hit'] is True
+        assert second[1]['original_total_tokens'] == 50
+        assert second[1]['original_cost'] == first[1]['cost']
@@ -0,0 +1,90 @@
+"""
+Unit tests for the LLM retry policy.
+"""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+from openai import APITimeoutError, AuthenticationError, InternalServerError, RateLimitError
+from app.services.ai_service import AIService
+from app.services.llm_retry import RetryPolicy, is_retryable, retry_after_seconds
+
+REQUEST = Mock()
+
+
+def api_error(error_class, status, headers=None):
+    response = Mock(status_code=status, headers=headers or {}, request=REQUEST)
+    return error_class('error', response=response, body=None)
+
+
+class TestRetryPolicy:
+    """Test class for RetryPolicy."""
+
+    @pytest.mark.unit
+    def test_classifies_transient_errors(self):
+        """Test which errors are retried and how Retry-After is read."""
+        assert is_retryable(api_error(RateLimitError, 429))
+        assert is_retryable(api_error(InternalServerError, 503))
+        assert is_retryable(APITimeoutError(request=REQUEST))
+        assert not is_retryable(api_error(AuthenticationError, 401))
+        assert not is_retryable(Exception('rate limit exceeded'))
+
+        assert retry_after_seconds(api_error(RateLimitError, 429, {'retry-after': '3'})) == 3.0
+        assert retry_after_seconds(api_error(RateLimitError, 429, {'retry-after-ms': '250'})) == 0.25
+        assert retry_after_seconds(api_error(RateLimitError, 429)) is None
+
+    @pytest.mark.unit
+    def test_retries_with_backoff_until_success(self):
+        """Test that transient failures are replayed and metrics recorded."""
+        sleeps = []
+        policy = RetryPolicy(max_attempts=4, base_delay=0.5, max_delay=10, deadline=60, sleep=sleeps.append)
+        fn = Mock(side_effect=[api_error(RateLimitError, 429, {'retry-after': '2'}),
+                               APITimeoutError(request=REQUEST), 'ok'])
+
+        assert policy.call(fn) == 'ok'
+        assert fn.call_count == 3
+        assert sleeps[0] == 2.0
+        assert 0 <= sleeps[1] <= 1.0
+        assert policy.metrics()['retries'] == 2
+        assert policy.metrics()['backoff_seconds'] == pytest.approx(sum(sleeps), abs=1e-3)
+
+    @pytest.mark.unit
+    def test_gives_up_on_permanent_errors_and_deadline(self):
+        """Test that permanent errors fail fast and waits never exceed the deadline."""
+        sleeps = []
+        policy = RetryPolicy(max_attempts=5, base_delay=0.1, max_delay=30, deadline=1, sleep=sleeps.append)
+
+        with pytest.raises(AuthenticationError):
+            policy.call(Mock(side_effect=api_error(AuthenticationError, 401)))
+        with pytest.raises(RateLimitError):
+            policy.call(Mock(side_effect=api_error(RateLimitError, 429, {'retry-after': '20'})))
+
+        assert sleeps == []
+        assert policy.metrics()['exhausted'] == 1
+
+    @pytest.mark.unit
+    def test_call_async_retries_coroutines(self):
+        """Test that call_async awaits the backoff and replays the coroutine."""
+        policy = RetryPolicy(max_attempts=3, base_delay=0.5, max_delay=10, deadline=60)
+        fn = AsyncMock(side_effect=[api_error(RateLimitError, 429, {'retry-after': '2'}), 'ok'])
+
+        with patch('app.services.llm_retry.asyncio.sleep', new=AsyncMock()) as mock_sleep:
+            assert asyncio.run(policy.call_async(fn)) == 'ok'
+
+        mock_sleep.assert_awaited_once_with(2.0)
+        assert policy.metrics()['retries'] == 1
+
+    @pytest.mark.unit
+    @pytest.mark.ai
+    def test_call_llm_retries_transient_errors(self, mock_azure_openai):
+        """Test that _call_llm replays the request after a 503."""
+        mock_create = mock_azure_openai.chat.completions.create
+        mock_create.side_effect = [api_error(InternalServerError, 503), mock_create.return_value]
+        service = AIService()
+        service.retry_policy = RetryPolicy(max_attempts=3, sleep=lambda seconds: None)
+
+        content, stats = service._call_llm('system', 'user')
+
+        assert content == 'Mocked AI response'
+        assert mock_create.call_count == 2
+        assert mock_create.call_args_list[0].kwargs['messages'] == mock_create.call_args_list[1].kwargs['messages']
+        assert service.retry_policy.metrics()['retries'] == 1
@@ -0,0 +1,52 @@
+"""
+Unit tests for the shared Azure OpenAI client.
+"""
+import pytest
+from unittest.mock import patch
+from app.services import ai_service as ai_service_module
+from app.services import openai_client
+
+
+class TestOpenAIClient:
+    """Test class for the pooled Azure OpenAI client."""
+
+    @pytest.mark.unit
+    @pytest.mark.ai
+    @patch('app.services.openai_client._pool_options', return_value={'limits': 'pool'})
+    @patch('app.services.openai_client.DefaultHttpxClient')
+    @patch('app.services.openai_client.AzureOpenAI')
+    def test_client_is_created_once(self, mock_azure, mock_http_client, mock_pool_options):
+        """Test that the client is built lazily, once, with SDK retries disabled."""
+        openai_client.close_openai_client()
+        try:
+            first = openai_client.get_openai_client()
+            second = openai_client.get_openai_client()
+
+            assert first is second
+            mock_azure.assert_called_once_with(
+                api_key='test_api_key',
+                api_version='2023-12-01-preview',
+                azure_endpoint='https://test.openai.azure.com/',
+                max_retries=0,
+                http_client=mock_http_client.return_value
+            )
+            mock_http_client.assert_called_once_with(limits='pool')
+        finally:
+            openai_client.close_openai_client()
+        first.close.assert_called_once()
+
+    @pytest.mark.unit
+    @pytest.mark.ai
+    def test_ai_service_is_shared_and_uses_pooled_client(self, mock_azure_openai):
+        """Test that get_ai_service reuses one instance and calls go through the shared client."""
+        with patch.object(ai_service_module, '_shared_service', None):
+            service = ai_service_module.get_ai_service()
+            assert ai_service_module.get_ai_service() is service
+
+            content, _ = service._call_llm('system', 'user')
+
+        assert content == 'Mocked AI response'
+        assert service.client is mock_azure_openai
+        with patch.dict('os.environ', {}, clear=True):
+            with pytest.raises(ValueError):
+                openai_client.azure_openai_settings()
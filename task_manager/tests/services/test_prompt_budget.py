@@ -0,0 +1,90 @@
+"""
+Unit tests for the prompt token budget.
+"""
+import pytest
+from unittest.mock import patch
+from app.services.ai_service import AIService
+from app.services.prompt_budget import PromptBudget, truncate_to_tokens
+
+
+@pytest.fixture
+def approximate_counts():
+    """Count tokens as words * 1.3 so the budgets are deterministic."""
+    with patch('app.services.token_counter.get_encoding', return_value=None), \
+            patch('app.services.prompt_budget.get_encoding', return_value=None):
+        yield
+
+
+def words(count, word='riesgo'):
+    return ' '.join([word] * count)
+
+
+class TestPromptBudget:
+    """Test class for PromptBudget."""
+
+    @pytest.mark.unit
+    @pytest.mark.ai
+    def test_truncate_keeps_whole_sentences(self, approximate_counts):
+        """Test that text is cut at the last sentence that fits."""
+        text = f"{words(10)}. {words(10)}. {words(10)}."
+
+        assert truncate_to_tokens(text, 100) == text
+        assert truncate_to_tokens(text, 30) == f"{words(10)}. {words(10)}."
+        # A single sentence longer than the budget is cut at a word boundary
+        assert truncate_to_tokens(words(40), 14) == words(10)
+        assert truncate_to_tokens(text, 0) == ''
+
+    @pytest.mark.unit
+    @pytest.mark.ai
+    def test_fit_trims_oldest_section_first(self, approximate_counts):
+        """Test that the oldest section absorbs the excess and is dropped when little would remain."""
+        budget = PromptBudget(max_prompt_tokens=200)
+        template = "Plan: {title} - {description} - {risks}"
+        description = '. '.join(words(10, 'paso') for _ in range(10)) + '.'
+        risks = words(60)
+
+        prompt, saved = budget.fit(template, {'title': 'Tarea', 'description': description, 'risks': risks},
+                                   ('description', 'risks'))
+
+        assert risks in prompt
+        assert 'paso' in prompt
+        assert len(prompt.split()) * 1.3 <= 200
+        assert saved > 0
+
+        prompt, _ = budget.fit(template, {'title': 'Tarea', 'description': words(30, 'paso'), 'risks': words(140)},
+                               ('description', 'risks'))
+        assert prompt == f"Plan: Tarea -  - {words(140)}"
+
+        short, saved = budget.fit(template, {'title': 'Tarea', 'description': 'Corta.', 'risks': 'Pocos.'},
+                                  ('description', 'risks'))
+        assert short == "Plan: Tarea - Corta. - Pocos." and saved == 0
+        assert budget.metrics()['trimmed_prompts'] == 2
+        assert budget.metrics()['prompts'] == 3
+
+    @pytest.mark.unit
+    @pytest.mark.ai
+    def test_max_output_tokens_uses_remaining_context(self):
+        """Test that max_tokens shrinks to the context left after the prompt, down to a floor."""
+        budget = PromptBudget(context_window=4096, min_output_tokens=256)
+
+        assert budget.max_output_tokens(500, 1000) == 1000
+        assert budget.max_output_tokens(3500, 1000) == 596
+        assert budget.max_output_tokens(4000, 1000) == 256
+
+    @pytest.mark.unit
+    @pytest.mark.ai
+    def test_generate_mitigation_sends_budgeted_prompt(self, mock_azure_openai, approximate_counts):
+        """Test that a huge description is trimmed before the call and the saving is reported."""
+        service = AIService()
+        service.prompt_budget = PromptBudget(context_window=4096, max_prompt_tokens=300)
+        long_description = '. '.join(words(20, 'detalle') for _ in range(50)) + '.'
+
+        result = service.generate_mitigation('Validar HPLC', long_description, 'testing', words(50))
+
+        kwargs = mock_azure_openai.chat.completions.create.call_args.kwargs
+        user_prompt = kwargs['messages'][1]['content']
+        assert result['success'] is True
+        assert result['prompt_tokens_saved'] > 1000
+        assert words(50) in user_prompt
+        assert len(user_prompt.split()) * 1.3 <= 300
+        assert kwargs['max_tokens'] == 1000
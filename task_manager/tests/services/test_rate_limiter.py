@@ -0,0 +1,161 @@
+"""
+Unit tests for the client-side LLM rate limiter.
+"""
+import asyncio
+import threading
+import time
+import pytest
+from contextlib import contextmanager
+from unittest.mock import Mock, patch
+from app.services.ai_service import AIService
+from app.services.rate_limiter import RateLimiter, RateLimitExceeded, TokenBucket
+
+
+class TestRateLimiter:
+    """Test class for RateLimiter."""
+
+    @pytest.mark.unit
+    def test_token_bucket_refills_continuously(self):
+        """Test wait time and continuous refill of a bucket."""
+        bucket = TokenBucket(60)
+        bucket.consume(60)
+
+        assert bucket.wait_time(1, bucket._updated) == pytest.approx(1.0)
+        assert bucket.wait_time(1, bucket._updated + 1) == 0
+        assert TokenBucket(0).wait_time(10 ** 6, 0) == 0
+
+    @pytest.mark.unit
+    def test_requests_budget_rejects_after_max_wait(self):
+        """Test that requests beyond the RPM budget are rejected after the bounded wait."""
+        limiter = RateLimiter(requests_per_minute=2, tokens_per_minute=0, max_concurrent=4, max_wait=0.05)
+        for _ in range(2):
+            with limiter.acquire(10):
+                pass
+
+        with pytest.raises(RateLimitExceeded):
+            with limiter.acquire(10):
+                pass
+
+        usage = limiter.utilization()
+        assert usage['requests_last_minute'] == 2
+        assert usage['requests_utilization'] == 1.0
+        assert usage['rejected'] == 1
+        assert usage['queued'] == 0
+
+    @pytest.mark.unit
+    def test_tokens_are_reconciled_with_actual_usage(self):
+        """Test that the estimate is refunded down to the actual token usage."""
+        limiter = RateLimiter(requests_per_minute=0, tokens_per_minute=1000, max_concurrent=1, max_wait=0)
+        with patch('app.services.rate_limiter.time.monotonic', return_value=100.0):
+            limiter.tokens._updated = 100.0
+            with limiter.acquire(900) as record_usage:
+                assert limiter.tokens.available == 100
+                record_usage(150)
+
+            assert limiter.tokens.available == 850
+            assert limiter.utilization()['tokens_last_minute'] == 150
+
+    @pytest.mark.unit
+    def test_failed_call_refunds_estimate(self):
+        """Test that a failed call gives back its estimate and a disconnected stream keeps it."""
+        limiter = RateLimiter(requests_per_minute=0, tokens_per_minute=1000, max_concurrent=1, max_wait=0)
+
+        async def fail_async():
+            async with limiter.acquire_async(700):
+                raise TimeoutError('timeout')
+
+        with patch('app.services.rate_limiter.time.monotonic', return_value=100.0):
+            limiter.tokens._updated = 100.0
+            with pytest.raises(TimeoutError):
+                with limiter.acquire(900):
+                    raise TimeoutError('timeout')
+            assert limiter.tokens.available == 1000
+
+            with pytest.raises(TimeoutError):
+                asyncio.run(fail_async())
+            assert limiter.tokens.available == 1000
+
+            # Usage reported before the failure is kept
+            with pytest.raises(ValueError):
+                with limiter.acquire(900) as record_usage:
+                    record_usage(200)
+                    raise ValueError('respuesta no válida')
+            assert limiter.tokens.available == 800
+            assert limiter.utilization()['tokens_last_minute'] == 200
+
+            # A streaming client that disconnects has already used tokens: the estimate stays
+            def stream():
+                with limiter.acquire(300):
+                    yield 'delta'
+
+            events = stream()
+            next(events)
+            events.close()
+            assert limiter.tokens.available == 500
+
+    @pytest.mark.unit
+    @pytest.mark.ai
+    def test_queue_wait_counts_against_call_timeout(self, mock_azure_openai):
+        """Test that the wait is bounded by the call timeout and deducted from the request timeout."""
+        limiter = RateLimiter(requests_per_minute=1, tokens_per_minute=0, max_concurrent=1, max_wait=30)
+        with limiter.acquire(1) as record_usage:
+            record_usage(1)
+        started = time.monotonic()
+        with pytest.raises(RateLimitExceeded):
+            with limiter.acquire(1, timeout=0.05):
+                pass
+        assert time.monotonic() - started < 1
+
+        @contextmanager
+        def slow_acquire(estimated_tokens, timeout):
+            time.sleep(0.2)
+            yield Mock()
+
+        service = AIService()
+        service.rate_limiter = Mock(acquire=slow_acquire)
+        service._limited_completion('Sistema', 'Usuario', False, 100, 5.0)
+
+        assert mock_azure_openai.chat.completions.create.call_args.kwargs['timeout'] <= 4.8
+
+    @pytest.mark.unit
+    def test_concurrency_cap_queues_calls(self):
+        """Test that in-flight calls never exceed max_concurrent."""
+        limiter = RateLimiter(requests_per_minute=0, tokens_per_minute=0, max_concurrent=2, max_wait=5)
+        peak = []
+        lock = threading.Lock()
+
+        def call():
+            with limiter.acquire(1):
+                with lock:
+                    peak.append(limiter.in_flight)
+                time.sleep(0.02)
+
+        threads = [threading.Thread(target=call) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert max(peak) == 2
+        assert limiter.utilization()['in_flight'] == 0
+
+    @pytest.mark.unit
+    def test_async_acquire_shares_concurrency_cap(self):
+        """Test that coroutines queue on the same slots without blocking the event loop."""
+        limiter = RateLimiter(requests_per_minute=0, tokens_per_minute=0, max_concurrent=2, max_wait=5)
+        peak = []
+
+        async def call():
+            async with limiter.acquire_async(1) as record_usage:
+                peak.append(limiter.in_flight)
+                await asyncio.sleep(0.02)
+                record_usage(1)
+
+        async def run():
+            await asyncio.gather(*(call() for _ in range(6)))
+
+        asyncio.run(run())
+
+        assert max(peak) == 2
+        assert limiter.utilization()['in_flight'] == 0
+        assert limiter.utilization()['requests_last_minute'] == 6
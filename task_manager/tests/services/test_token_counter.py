@@ -0,0 +1,68 @@
+"""
+Unit tests for the process-wide token counter.
+"""
+import base64
+import pytest
+from unittest.mock import patch
+from app.services import token_counter
+
+
+@pytest.fixture
+def bpe_file(tmp_path):
+    """Tiny local BPE file: every single byte plus a few merges."""
+    tokens = [bytes([i]) for i in range(256)] + [b'he', b'll', b'hell', b'hello']
+    path = tmp_path / 'tiny.tiktoken'
+    path.write_text(''.join(f"{base64.b64encode(token).decode()} {rank}\n" for rank, token in enumerate(tokens)))
+    return str(path)
+
+
+@pytest.fixture
+def fresh_encoding():
+    """Reset the cached encoder around each test."""
+    with patch.object(token_counter, '_encoding', None), patch.object(token_counter, '_failed_at', None):
+        yield
+
+
+class TestTokenCounter:
+    """Test class for the token counter."""
+
+    @pytest.mark.unit
+    @pytest.mark.ai
+    def test_encoder_is_loaded_once_from_local_file(self, bpe_file, fresh_encoding):
+        """Test that the encoder is built from the local BPE file once and then reused."""
+        with patch.object(token_counter, 'BPE_FILE', bpe_file), \
+                patch('app.services.token_counter.tiktoken.encoding_for_model') as encoding_for_model, \
+                patch('app.services.token_counter.load_tiktoken_bpe',
+                      wraps=token_counter.load_tiktoken_bpe) as load_bpe:
+            assert token_counter.prewarm_encoding() is True
+            first = token_counter.get_encoding()
+            second = token_counter.get_encoding()
+
+        assert first is second
+        assert load_bpe.call_count == 1
+        encoding_for_model.assert_not_called()
+        assert token_counter.count_tokens('hello') == 1
+
+    @pytest.mark.unit
+    @pytest.mark.ai
+    def test_batch_counts_match_single_counts(self, bpe_file, fresh_encoding):
+        """Test that count_tokens_batch returns the same counts, in order, as count_tokens."""
+        texts = ['hello world', '', 'hell <|endoftext|>', 'tarea de prueba ' * 50]
+        with patch.object(token_counter, 'BPE_FILE', bpe_file):
+            batch = token_counter.count_tokens_batch(texts, num_threads=2)
+            single = [token_counter.count_tokens(text) for text in texts]
+
+        assert batch == single
+        assert batch[1] == 0
+
+    @pytest.mark.unit
+    @pytest.mark.ai
+    def test_falls_back_to_approximation_without_encoder(self, fresh_encoding):
+        """Test that a failed load is remembered and counting falls back to words * 1.3."""
+        with patch.object(token_counter, 'BPE_FILE', ''), \
+                patch('app.services.token_counter.tiktoken.encoding_for_model',
+                      side_effect=OSError('sin red')) as encoding_for_model:
+            assert token_counter.count_tokens('one two three four five') == 6
+            assert token_counter.count_tokens_batch(['one two', 'three']) == [2, 1]
+
+        assert encoding_for_model.call_count == 1
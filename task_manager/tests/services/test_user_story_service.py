@@ -0,0 +1,96 @@
+"""
+Unit tests for the UserStoryService.
+"""
+import threading
+import pytest
+from unittest.mock import Mock, patch
+from app.models.enums import TaskCategory
+from app.services.user_story_service import UserStoryService
+from tests.conftest import create_test_user_story
+
+
+class TestUserStoryService:
+    """Test class for UserStoryService."""
+
+    @pytest.mark.unit
+    @pytest.mark.database
+    def test_generate_tasks_categorizes_in_one_batch(self, sqlite_session_factory):
+        """Test that generated tasks are categorized with a single batch call."""
+        session = sqlite_session_factory()
+        user_story = create_test_user_story(session)
+        service = UserStoryService(db=session)
+        service.ai_service = Mock()
+        service.ai_service.generate_tasks.return_value = [
+            {'title': 'Redactar SOP', 'description': 'Procedimiento'},
+            'Crear índice de lotes'
+        ]
+        service.ai_service.categorize_tasks_batch.return_value = {
+            'success': True, 'categories': ['documentacion', 'base_de_datos'], 'total_tokens': 10, 'cost': 0.001
+        }
+
+        tasks = service.generate_tasks_for_user_story(user_story.id)
+
+        service.ai_service.categorize_tasks_batch.assert_called_once_with([
+            {'title': 'Redactar SOP', 'description': 'Procedimiento'},
+            {'title': 'Crear índice de lotes', 'description': ''}
+        ])
+        service.ai_service.categorize_task.assert_not_called()
+        assert [task.category for task in tasks] == [TaskCategory.DOCUMENTACION, TaskCategory.BASE_DE_DATOS]
+        session.close()
+
+    @pytest.mark.unit
+    @pytest.mark.database
+    def test_generate_tasks_falls_back_to_single_categorization(self, sqlite_session_factory):
+        """Test the per-task fallback when the batch call fails."""
+        session = sqlite_session_factory()
+        user_story = create_test_user_story(session)
+        service = UserStoryService(db=session)
+        service.ai_service = Mock()
+        service.ai_service.generate_tasks.return_value = [{'title': 'A'}, {'title': 'B'}]
+        service.ai_service.categorize_tasks_batch.return_value = {'success': False, 'error': 'boom'}
+        outcomes = {'A': {'success': True, 'category': 'limpieza'}, 'B': Exception('timeout')}
+
+        def categorize_task(title, description):
+            # Las categorizaciones sueltas van en paralelo: responder según el título
+            if isinstance(outcomes[title], Exception):
+                raise outcomes[title]
+            return outcomes[title]
+
+        service.ai_service.categorize_task.side_effect = categorize_task
+
+        tasks = service.generate_tasks_for_user_story(user_story.id)
+
+        assert [task.category for task in tasks] == [TaskCategory.LIMPIEZA, TaskCategory.OTRO]
+        session.close()
+
+    @pytest.mark.unit
+    @pytest.mark.database
+    def test_generate_tasks_for_many_user_stories(self, sqlite_session_factory):
+        """Test that several stories are generated concurrently and inserted together."""
+        session = sqlite_session_factory()
+        first = create_test_user_story(session, project='Lab A')
+        second = create_test_user_story(session, project='Lab B')
+        service = UserStoryService(db=session)
+        service.ai_service = Mock()
+        barrier = threading.Barrier(2, timeout=5)
+
+        def generate_tasks(prompt):
+            # Las dos historias deben estar generándose a la vez
+            barrier.wait()
+            project = 'A' if 'Lab A' in prompt else 'B'
+            return [{'title': f'{project}1'}, {'title': f'{project}2'}]
+
+        service.ai_service.generate_tasks.side_effect = generate_tasks
+        service.ai_service.categorize_tasks_batch.return_value = {
+            'success': True, 'categories': ['limpieza', 'otro'], 'total_tokens': 10, 'cost': 0.001
+        }
+
+        with patch.object(session, 'commit', wraps=session.commit) as mock_commit:
+            created = service.generate_tasks_for_user_stories([first.id, second.id, 999], workers=2)
+
+        assert set(created) == {first.id, second.id}
+        assert [task.title for task in created[second.id]] == ['B1', 'B2']
+        assert all(task.id is not None for tasks in created.values() for task in tasks)
+        mock_commit.assert_called_once()
+        assert len(service.get_tasks_for_user_story(first.id)) == 2
+        session.close()
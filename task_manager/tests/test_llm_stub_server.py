@@ -0,0 +1,107 @@
+"""
+Unit tests for the local Azure OpenAI stand-in server.
+"""
+import json
+import pytest
+from unittest.mock import Mock
+from app.services.ai_service import (
+    ONE_SHOT_SYSTEM_PROMPT,
+    TASKS_SYSTEM_PROMPT,
+    USER_STORY_SYSTEM_PROMPT,
+    parse_tasks_response,
+    parse_user_story_response,
+    validate_enrichment,
+)
+from llm_stub_server import StubSettings, create_stub_app, parse_latency
+
+COMPLETIONS_URL = '/openai/deployments/stub/chat/completions?api-version=2024-02-01'
+
+
+def chat(system_prompt, user_prompt, **options):
+    return dict({'messages': [{'role': 'system', 'content': system_prompt},
+                              {'role': 'user', 'content': user_prompt}],
+                 'max_tokens': 1000}, **options)
+
+
+def content(response):
+    return response.get_json()['choices'][0]['message']['content']
+
+
+class TestLLMStubServer:
+    """Test class for the stub server."""
+
+    @pytest.mark.unit
+    @pytest.mark.ai
+    def test_canned_json_matches_ai_service_parsers(self):
+        """Test that task, user story and one_shot responses parse like real model output."""
+        client = create_stub_app(StubSettings(seed=7)).test_client()
+
+        tasks = client.post(COMPLETIONS_URL, json=chat(TASKS_SYSTEM_PROMPT, 'Historia: validar HPLC'))
+        story = client.post(COMPLETIONS_URL, json=chat(USER_STORY_SYSTEM_PROMPT, 'Calibrar balanzas'))
+        one_shot = client.post(COMPLETIONS_URL, json=chat(ONE_SHOT_SYSTEM_PROMPT, 'Tarea: Validar HPLC',
+                                                          response_format={'type': 'json_object'}))
+
+        parsed_tasks = parse_tasks_response(content(tasks))
+        assert len(parsed_tasks) == 5
+        assert all(task['title'] and task['description'] for task in parsed_tasks)
+        assert parse_user_story_response(content(story))['priority'] in ('baja', 'media', 'alta', 'bloqueante')
+        assert 2 <= validate_enrichment(json.loads(content(one_shot)))['effort'] <= 48
+        usage = tasks.get_json()['usage']
+        assert usage['total_tokens'] == usage['prompt_tokens'] + usage['completion_tokens'] > 0
+
+    @pytest.mark.unit
+    @pytest.mark.ai
+    def test_responses_and_latency_are_deterministic(self):
+        """Test that the same seed and request give the same content and simulated delay."""
+        def run(seed):
+            sleep = Mock()
+            app = create_stub_app(StubSettings(latency='lognormal:0.5,0.4', tokens_per_second=50, seed=seed),
+                                  sleep=sleep)
+            response = app.test_client().post(COMPLETIONS_URL, json=chat('Sistema', 'Analiza los riesgos'))
+            return content(response), sleep.call_args.args[0], response.get_json()['usage']
+
+        first, delay, usage = run(1)
+        assert run(1) == (first, delay, usage)
+        assert run(2)[0] != first
+        # Latencia hasta el primer token más la generación a 50 tokens/s
+        assert delay > usage['completion_tokens'] / 50
+
+    @pytest.mark.unit
+    @pytest.mark.ai
+    def test_injects_rate_limit_and_server_errors(self):
+        """Test that 429 carries Retry-After and 5xx use the configured status."""
+        throttled = create_stub_app(StubSettings(error_rate_429=1.0, retry_after=2)).test_client()
+        failing = create_stub_app(StubSettings(error_rate_5xx=1.0, error_status=503)).test_client()
+
+        response = throttled.post(COMPLETIONS_URL, json=chat('Sistema', 'Hola'))
+        assert response.status_code == 429
+        assert response.headers['Retry-After'] == '2'
+        assert response.get_json()['error']['code'] == '429'
+        assert failing.post('/v1/chat/completions', json=chat('Sistema', 'Hola')).status_code == 503
+        assert throttled.get('/stats').get_json()['errors_429'] == 1
+
+    @pytest.mark.unit
+    @pytest.mark.ai
+    def test_streaming_sends_chunks_and_usage(self):
+        """Test that stream=True returns SSE chunks ending with usage and [DONE]."""
+        body = chat('Sistema', 'Genera un plan', stream=True, stream_options={'include_usage': True})
+
+        full = content(create_stub_app(StubSettings(seed=3)).test_client().post(
+            COMPLETIONS_URL, json=dict(body, stream=False)))
+        events = create_stub_app(StubSettings(seed=3)).test_client().post(
+            COMPLETIONS_URL, json=body).get_data(as_text=True).split('\n\n')
+
+        payloads = [json.loads(event[len('data: '):]) for event in events if event.startswith('data: {')]
+        streamed = ''.join(chunk['choices'][0]['delta'].get('content', '') for chunk in payloads if chunk['choices'])
+        assert streamed.strip() == full.strip()
+        assert payloads[-1]['usage']['completion_tokens'] > 0
+        assert 'data: [DONE]' in events
+
+    @pytest.mark.unit
+    def test_parse_latency_validates_spec(self):
+        """Test latency spec parsing."""
+        assert parse_latency('constant:0.25')(None) == 0.25
+        with pytest.raises(ValueError):
+            parse_latency('pareto:1')
+        with pytest.raises(ValueError):
+            parse_latency('uniform:1')
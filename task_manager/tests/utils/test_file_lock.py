@@ -0,0 +1,92 @@
+"""
+Unit tests for cross-process file locking and atomic JSON writes.
+"""
+import json
+import multiprocessing
+import pytest
+from app.utils.file_lock import atomic_write_json, file_lock, read_json, update_json
+from app.utils.json_store import JSONTaskStore
+
+
+def _increment_counter(path, times):
+    for _ in range(times):
+        update_json(path, lambda data: {'count': data['count'] + 1}, default={'count': 0})
+
+
+def _insert_tasks(path, prefix, times):
+    store = JSONTaskStore(path, compact_every=7)
+    for i in range(times):
+        store.insert({'title': f'{prefix}-{i}', 'status': 'pendiente'})
+
+
+def _hold_lock(path, ready, release):
+    with file_lock(path):
+        ready.set()
+        release.wait(5)
+
+
+def _run_processes(target, args_list):
+    context = multiprocessing.get_context('fork')
+    processes = [context.Process(target=target, args=args) for args in args_list]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(30)
+        assert process.exitcode == 0
+
+
+class TestFileLock:
+    """Test class for file_lock and atomic writes."""
+
+    @pytest.mark.unit
+    def test_update_json_is_safe_across_processes(self, tmp_path):
+        """Test that concurrent read-modify-write from several processes loses no update."""
+        path = tmp_path / 'counter.json'
+
+        _run_processes(_increment_counter, [(path, 25) for _ in range(4)])
+
+        assert read_json(path) == {'count': 100}
+
+    @pytest.mark.unit
+    def test_json_store_writers_get_unique_ids(self, tmp_path):
+        """Test that several worker processes writing the store never reuse ids."""
+        path = tmp_path / 'tasks.json'
+
+        _run_processes(_insert_tasks, [(path, prefix, 20) for prefix in ('a', 'b', 'c')])
+
+        records = JSONTaskStore(path).all()
+        assert len(records) == 60
+        assert sorted(r['id'] for r in records) == list(range(1, 61))
+
+    @pytest.mark.unit
+    def test_lock_timeout_and_reentrancy(self, tmp_path):
+        """Test that a held lock times out other processes and is reentrant in-thread."""
+        path = tmp_path / 'tasks.json'
+        context = multiprocessing.get_context('fork')
+        ready, release = context.Event(), context.Event()
+        holder = context.Process(target=_hold_lock, args=(path, ready, release))
+        holder.start()
+        try:
+            assert ready.wait(5)
+            with pytest.raises(TimeoutError):
+                with file_lock(path, exclusive=False, timeout=0.1):
+                    pass
+        finally:
+            release.set()
+            holder.join(5)
+
+        with file_lock(path, exclusive=False):
+            with file_lock(path):
+                assert read_json(path, default=[]) == []
+
+    @pytest.mark.unit
+    def test_atomic_write_keeps_previous_file_on_error(self, tmp_path):
+        """Test that a failed write leaves the old file intact and no temp files."""
+        path = tmp_path / 'tasks.json'
+        atomic_write_json(path, [{'id': 1}])
+
+        with pytest.raises(TypeError):
+            atomic_write_json(path, [{'id': object()}])
+
+        assert json.loads(path.read_text()) == [{'id': 1}]
+        assert list(tmp_path.glob('*.tmp')) == []
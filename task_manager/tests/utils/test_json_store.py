@@ -0,0 +1,110 @@
+"""
+Unit tests for the in-memory JSON task store.
+"""
+import json
+import pytest
+from unittest.mock import patch
+from app.utils.json_store import JSONTaskStore, get_json_store
+
+
+def write_tasks(path, tasks):
+    path.write_text(json.dumps(tasks))
+
+
+class TestJSONTaskStore:
+    """Test class for JSONTaskStore."""
+
+    @pytest.mark.unit
+    def test_store_parses_file_once(self, tmp_path):
+        """Test that reads are served from memory until the file changes."""
+        json_file = tmp_path / 'tasks.json'
+        write_tasks(json_file, [
+            {'id': 1, 'status': 'pendiente', 'priority': 'ALTA', 'user_story_id': 3},
+            {'id': 2, 'status': 'completada', 'priority': 'media', 'user_story_id': None},
+        ])
+        store = JSONTaskStore(json_file)
+        store.all()
+
+        with patch('app.utils.json_store.json.load', side_effect=AssertionError('no reload')):
+            assert store.get(2)['status'] == 'completada'
+            assert [r['id'] for r in store.find('priority', 'alta')] == [1]
+            assert [r['id'] for r in store.find('user_story_id', 3)] == [1]
+            assert store.next_id() == 3
+
+        write_tasks(json_file, [{'id': 7, 'status': 'pendiente'}, {'id': 8, 'status': 'pendiente'}])
+        assert [r['id'] for r in store.find('status', 'pendiente')] == [7, 8]
+        assert store.get(1) is None
+
+    @pytest.mark.unit
+    def test_store_updates_indexes_and_counters(self, tmp_path):
+        """Test that writes keep indexes, counters and the file in sync."""
+        json_file = tmp_path / 'tasks.json'
+        store = JSONTaskStore(json_file)
+
+        store.insert({'title': 'A', 'status': 'pendiente', 'effort': 2})
+        store.insert({'title': 'B', 'status': 'pendiente', 'effort': 5})
+        store.update(1, lambda record: record.update(status='completada'))
+        store.delete(2)
+
+        assert store.find('status', 'pendiente') == []
+        assert [r['title'] for r in store.find('status', 'completada')] == ['A']
+        assert store.stats()['total_tasks'] == 1
+        assert store.stats()['total_hours_incomplete'] == 0
+        assert not json_file.exists()
+        assert len(json_file.with_name('tasks.json.wal').read_text().splitlines()) == 4
+        assert store.update(99, lambda record: None) is None
+        with pytest.raises(ValueError):
+            store.find('title', 'A')
+
+    @pytest.mark.unit
+    def test_get_json_store_is_shared(self, tmp_path):
+        """Test that the process keeps one store per file."""
+        json_file = tmp_path / 'tasks.json'
+
+        assert get_json_store(json_file) is get_json_store(tmp_path / '.' / 'tasks.json')
+
+    @pytest.mark.unit
+    def test_wal_replay_and_compaction(self, tmp_path):
+        """Test that the journal is replayed on load and folded into an atomic snapshot."""
+        json_file = tmp_path / 'tasks.json'
+        wal_file = tmp_path / 'tasks.json.wal'
+        write_tasks(json_file, [{'id': 1, 'title': 'A', 'status': 'pendiente'}])
+        writer = JSONTaskStore(json_file, compact_every=0)
+        writer.insert({'title': 'B', 'status': 'pendiente'})
+        writer.update(1, lambda record: record.update(status='completada'))
+        writer.delete(2)
+        writer.insert({'title': 'C', 'status': 'pendiente'})
+        # Escritura interrumpida: la última línea queda incompleta
+        with open(wal_file, 'a') as f:
+            f.write('{"op": "delete", "id"')
+
+        reader = JSONTaskStore(json_file)
+        assert [(r['id'], r['status']) for r in reader.all()] == [(1, 'completada'), (3, 'pendiente')]
+
+        # Otro proceso añade una línea: solo se aplica la cola del diario
+        with open(wal_file, 'w') as f:
+            f.write('')
+        writer = JSONTaskStore(json_file, compact_every=0)
+        reader = JSONTaskStore(json_file)
+        reader.all()
+        writer.insert({'id': 5, 'title': 'E', 'status': 'pendiente'})
+        with patch('app.utils.json_store.json.load', side_effect=AssertionError('no full reload')):
+            assert reader.get(5)['title'] == 'E'
+
+        writer.compact()
+        assert wal_file.read_text() == ''
+        assert [r['id'] for r in json.loads(json_file.read_text())] == [1, 5]
+        assert list(tmp_path.glob('*.tmp')) == []
+
+    @pytest.mark.unit
+    def test_store_compacts_every_n_operations(self, tmp_path):
+        """Test the periodic compaction threshold."""
+        json_file = tmp_path / 'tasks.json'
+        store = JSONTaskStore(json_file, compact_every=3)
+
+        for title in ('A', 'B', 'C', 'D'):
+            store.insert({'title': title})
+
+        assert [r['title'] for r in json.loads(json_file.read_text())] == ['A', 'B', 'C']
+        assert len((tmp_path / 'tasks.json.wal').read_text().splitlines()) == 1
+        assert [r['title'] for r in JSONTaskStore(json_file).all()] == ['A', 'B', 'C', 'D']
@@ -1,11 +1,19 @@
 """
 Unit tests for the TaskManager utility class.
 """
+import json
 import pytest
+from datetime import datetime
 from unittest.mock import patch, Mock, MagicMock
-from app.utils.task_manager import TaskManager
+from app.utils.task_manager import (
+    TaskManager, encode_cursor, decode_cursor, normalize_task_filters, truncate_prefix, truncate_text
+)
+from app.models.enums import TaskCategory, PriorityEnum
+from app.models.task_db import StatusEnum
 from app.models.task import Task
 from app.models.task_db import TaskDB
+from app.utils.task_stats import reconcile_task_stats
+from tests.conftest import create_test_task_db, create_test_user_story
 
 
 class TestTaskManager:
@@ -331,4 +339,434 @@ class TestTaskManager:
         
         for method_name in expected_methods:
             assert hasattr(manager, method_name)
-            assert callable(getattr(manager, method_name)) 
\ No newline at end of file
+            assert callable(getattr(manager, method_name))
+
+    @pytest.mark.unit
+    def test_cursor_round_trip(self):
+        """Test that pagination cursors can be decoded back."""
+        cursor = encode_cursor('2025-01-01T10:00:00', 42)
+        
+        assert decode_cursor(cursor) == ('2025-01-01T10:00:00', 42)
+
+    @pytest.mark.unit
+    def test_decode_invalid_cursor(self):
+        """Test that an invalid cursor raises ValueError."""
+        with pytest.raises(ValueError):
+            decode_cursor('not-a-cursor')
+
+    @pytest.mark.unit
+    def test_iter_tasks_page_with_database(self, sqlite_session_factory):
+        """Test keyset pagination walks every task exactly once."""
+        session = sqlite_session_factory()
+        # Tasks 3-5 share created_at so the id tie-breaker is exercised
+        created = [datetime(2025, 1, 1), datetime(2025, 1, 2)] + [datetime(2025, 1, 3)] * 3
+        for i, created_at in enumerate(created):
+            create_test_task_db(session, title=f'Task {i+1}', created_at=created_at)
+        session.close()
+        
+        with patch('app.utils.task_manager.get_db_session', side_effect=sqlite_session_factory):
+            manager = TaskManager(use_database=True)
+            first = manager.iter_tasks_page(limit=2)
+            second = manager.iter_tasks_page(limit=2, after=first['next_cursor'])
+            third = manager.iter_tasks_page(limit=2, after=second['next_cursor'])
+        
+        assert [t['id'] for t in first['tasks']] == [5, 4]
+        assert [t['id'] for t in second['tasks']] == [3, 2]
+        assert [t['id'] for t in third['tasks']] == [1]
+        assert first['has_more'] is True
+        assert third['has_more'] is False
+        assert third['next_cursor'] is None
+
+    @pytest.mark.unit
+    def test_iter_tasks_page_json_mode(self):
+        """Test keyset pagination over the JSON fallback."""
+        tasks = [
+            {'id': i, 'title': f'Task {i}', 'created_at': f'2025-01-0{i}T00:00:00'}
+            for i in range(1, 4)
+        ]
+        manager = TaskManager(use_database=False)
+        
+        with patch.object(manager, '_get_tasks_from_json', side_effect=lambda: [dict(t) for t in tasks]):
+            first = manager.iter_tasks_page(limit=2)
+            second = manager.iter_tasks_page(limit=2, after=first['next_cursor'])
+        
+        assert [t['id'] for t in first['tasks']] == [3, 2]
+        assert [t['id'] for t in second['tasks']] == [1]
+        assert second['has_more'] is False
+
+    @pytest.mark.unit
+    def test_iter_tasks_page_limit_is_capped(self):
+        """Test that the page size never exceeds MAX_PAGE_SIZE."""
+        manager = TaskManager(use_database=False)
+        
+        with patch.object(manager, '_get_tasks_from_json', return_value=[]):
+            page = manager.iter_tasks_page(limit=TaskManager.MAX_PAGE_SIZE + 100)
+        
+        assert page['limit'] == TaskManager.MAX_PAGE_SIZE
+        with pytest.raises(ValueError):
+            manager.iter_tasks_page(limit=0)
+
+    @pytest.mark.unit
+    def test_normalize_task_filters(self):
+        """Test filter validation and normalization."""
+        filters = normalize_task_filters({
+            'status': 'pendiente,en_progreso',
+            'priority': 'ALTA',
+            'user_story_id': '7',
+            'created_to': '2025-01-31'
+        })
+        
+        assert filters['status'] == ['pendiente', 'en_progreso']
+        assert filters['priority'] == ['alta']
+        assert filters['user_story_id'] == 7
+        assert filters['created_to'] == datetime(2025, 1, 31, 23, 59, 59, 999999)
+        with pytest.raises(ValueError):
+            normalize_task_filters({'status': 'archivada'})
+        with pytest.raises(ValueError):
+            normalize_task_filters({'owner': 'x'})
+
+    @pytest.mark.unit
+    def test_get_all_tasks_filters_in_sql(self, sqlite_session_factory):
+        """Test that filters and sort are applied by the database query."""
+        session = sqlite_session_factory()
+        create_test_task_db(session, title='Open Ana', assigned_to='Ana', effort=4)
+        create_test_task_db(session, title='Done Ana', assigned_to='Ana', status=StatusEnum.COMPLETADA)
+        create_test_task_db(session, title='Open Ana high', assigned_to='Ana', effort=12,
+                            priority=PriorityEnum.ALTA)
+        create_test_task_db(session, title='Open Luis', assigned_to='Luis', category=TaskCategory.TESTING)
+        session.close()
+        
+        with patch('app.utils.task_manager.get_db_session', side_effect=sqlite_session_factory):
+            manager = TaskManager(use_database=True)
+            mine = manager.get_all_tasks(
+                filters={'assigned_to': 'Ana', 'status': 'pendiente'}, sort='-effort'
+            )
+            high = manager.get_all_tasks(filters={'priority': 'alta'})
+            testing = manager.get_all_tasks(filters={'category': 'testing'})
+        
+        assert [t['title'] for t in mine] == ['Open Ana high', 'Open Ana']
+        assert [t['title'] for t in high] == ['Open Ana high']
+        assert [t['title'] for t in testing] == ['Open Luis']
+
+    @pytest.mark.unit
+    def test_get_all_tasks_filters_json_mode(self, tmp_path):
+        """Test that the JSON fallback applies the same filter semantics."""
+        tasks = [
+            {'id': 1, 'title': 'A', 'status': 'pendiente', 'assigned_to': 'Ana', 'effort': 4,
+             'user_story_id': 2, 'created_at': '2025-01-10T09:00:00'},
+            {'id': 2, 'title': 'B', 'status': 'completada', 'assigned_to': 'Ana', 'effort': 8,
+             'user_story_id': 2, 'created_at': '2025-01-20T09:00:00'},
+            {'id': 3, 'title': 'C', 'status': 'pendiente', 'assigned_to': 'Ana', 'effort': 12,
+             'user_story_id': None, 'created_at': '2025-02-01T09:00:00'},
+        ]
+        json_file = tmp_path / 'tasks.json'
+        json_file.write_text(json.dumps(tasks))
+        manager = TaskManager(use_database=False)
+        
+        with patch.object(manager, '_json_file', return_value=json_file):
+            pending = manager.get_all_tasks(filters={'status': 'pendiente'}, sort='effort')
+            story = manager.get_all_tasks(filters={'user_story_id': 2})
+            january = manager.get_all_tasks(filters={'created_from': '2025-01-01', 'created_to': '2025-01-31'})
+            page = manager.iter_tasks_page(limit=1, filters={'assigned_to': 'Ana'}, sort='effort')
+            next_page = manager.iter_tasks_page(limit=1, after=page['next_cursor'],
+                                                filters={'assigned_to': 'Ana'}, sort='effort')
+        
+        assert [t['id'] for t in pending] == [1, 3]
+        assert [t['id'] for t in story] == [2, 1]
+        assert [t['id'] for t in january] == [2, 1]
+        assert [t['id'] for t in page['tasks']] == [1]
+        assert [t['id'] for t in next_page['tasks']] == [2]
+        with pytest.raises(ValueError):
+            manager.iter_tasks_page(limit=1, after=page['next_cursor'])
+
+    @pytest.mark.unit
+    def test_get_stats_with_database(self, sqlite_session_factory):
+        """Test that stats are aggregated by the database."""
+        session = sqlite_session_factory()
+        create_test_task_db(session, title='A', assigned_to='Ana', effort=4, tokens_gastados=10, costos=0.5)
+        create_test_task_db(session, title='B', assigned_to='Ana', effort=8, status=StatusEnum.COMPLETADA,
+                            tokens_gastados=20, costos=0.25)
+        create_test_task_db(session, title='C', assigned_to=None, effort=2, priority=PriorityEnum.ALTA,
+                            tokens_gastados=0, costos=0.0)
+        session.close()
+        
+        with patch('app.utils.task_manager.get_db_session', side_effect=sqlite_session_factory):
+            manager = TaskManager(use_database=True)
+            stats = manager.get_stats()
+            with_series = manager.get_stats(include_per_task=True)
+        
+        assert stats['total_tasks'] == 3
+        assert stats['total_effort'] == 14
+        assert stats['total_hours_incomplete'] == 6
+        assert stats['total_tokens'] == 30
+        assert stats['total_costos'] == 0.75
+        assert stats['status_counts'] == {'pendiente': 2, 'en_progreso': 0, 'en_revision': 0, 'completada': 1}
+        assert stats['priority_counts'] == {'baja': 0, 'media': 2, 'alta': 1, 'bloqueante': 0}
+        assert stats['assigned_hours'] == {'Ana': 12, 'Sin asignar': 2}
+        assert 'tokens_por_tarea' not in stats
+        assert sorted(with_series['titulos_tareas']) == ['A', 'B', 'C']
+
+    @pytest.mark.unit
+    def test_get_stats_json_mode(self, tmp_path):
+        """Test that the JSON fallback produces the same stats shape."""
+        tasks = [
+            {'id': 1, 'title': 'A', 'status': 'pendiente', 'priority': 'media', 'effort': 4,
+             'assigned_to': 'Ana', 'tokens_gastados': 10, 'costos': 0.5},
+            {'id': 2, 'title': 'B', 'status': 'completada', 'priority': 'alta', 'effort': 8,
+             'assigned_to': '', 'tokens_gastados': 5, 'costos': 0.1},
+        ]
+        json_file = tmp_path / 'tasks.json'
+        json_file.write_text(json.dumps(tasks))
+        manager = TaskManager(use_database=False)
+        
+        with patch.object(manager, '_json_file', return_value=json_file):
+            stats = manager.get_stats()
+        
+        assert stats['total_tasks'] == 2
+        assert stats['total_effort'] == 12
+        assert stats['total_hours_incomplete'] == 4
+        assert stats['status_counts']['completada'] == 1
+        assert stats['priority_counts']['alta'] == 1
+        assert stats['assigned_hours'] == {'Ana': 4, 'Sin asignar': 8}
+
+    @pytest.mark.unit
+    def test_stats_counters_maintained_on_writes(self, sqlite_session_factory):
+        """Test that task_stats counters follow create, update and delete."""
+        session = sqlite_session_factory()
+        create_test_task_db(session, title='Existing', assigned_to='Ana', effort=3)
+        report = reconcile_task_stats(session)
+        session.close()
+        assert report['initialized'] is False
+        
+        with patch('app.utils.task_manager.get_db_session', side_effect=sqlite_session_factory):
+            manager = TaskManager(use_database=True)
+            created = manager.create_task({
+                'title': 'New', 'description': 'd', 'priority': 'alta', 'effort': 5,
+                'assigned_to': 'Luis', 'category': 'testing', 'tokens_gastados': 7, 'costos': 0.2
+            })
+            manager.update_task(created.id, {'effort': 9, 'assigned_to': 'Ana'})
+            manager.delete_task(1)
+            
+            with patch.object(manager, '_aggregate_stats', side_effect=AssertionError('not used')):
+                stats = manager.get_stats()
+        
+        assert stats['total_tasks'] == 1
+        assert stats['total_effort'] == 9
+        assert stats['total_tokens'] == 7
+        assert stats['priority_counts']['alta'] == 1
+        assert stats['assigned_hours'] == {'Ana': 9}
+        
+        session = sqlite_session_factory()
+        assert reconcile_task_stats(session, dry_run=True)['drift'] == []
+        session.close()
+
+    @pytest.mark.unit
+    def test_reconcile_reports_drift(self, sqlite_session_factory):
+        """Test that reconciliation reports and repairs drifted counters."""
+        from app.models.task_stats_db import TaskStatsDB
+        session = sqlite_session_factory()
+        create_test_task_db(session, title='A', effort=4)
+        reconcile_task_stats(session)
+        total = session.query(TaskStatsDB).filter_by(dimension='total').one()
+        total.effort = 40
+        session.commit()
+        
+        report = reconcile_task_stats(session)
+        
+        assert report['drift'] == [
+            {'dimension': 'total', 'bucket': '*', 'field': 'effort', 'expected': 4, 'actual': 40}
+        ]
+        assert reconcile_task_stats(session, dry_run=True)['drift'] == []
+        session.close()
+
+    @pytest.mark.unit
+    def test_new_counter_bucket_is_upserted(self, sqlite_session_factory):
+        """Test that creating an existing bucket adds to it instead of failing on the primary key."""
+        from sqlalchemy.dialects import mysql
+        from app.models.task_stats_db import TaskStatsDB
+        from app.utils.task_stats import _upsert_counter
+        session = sqlite_session_factory()
+
+        # Dos transacciones que estrenan el mismo grupo a la vez
+        session.execute(_upsert_counter(session, ('status', 'bloqueada'), [1, 4, 10, 0.5]))
+        session.execute(_upsert_counter(session, ('status', 'bloqueada'), [1, 2, 5, 0.25]))
+        session.commit()
+
+        row = session.query(TaskStatsDB).filter_by(dimension='status', bucket='bloqueada').one()
+        assert (row.task_count, row.effort, row.tokens, row.costos) == (2, 6, 15, 0.75)
+        mysql_session = Mock(**{'get_bind.return_value.dialect.name': 'mysql'})
+        compiled = str(_upsert_counter(mysql_session, ('status', 'x'), [1, 0, 0, 0.0]).compile(dialect=mysql.dialect()))
+        assert 'ON DUPLICATE KEY UPDATE task_count = (task_stats.task_count + VALUES(task_count))' in compiled
+        session.close()
+
+    @pytest.mark.unit
+    def test_task_writes_survive_missing_stats_table(self, sqlite_session_factory):
+        """Test that tasks are still saved when the task_stats table has not been created yet."""
+        from sqlalchemy import text
+        session = sqlite_session_factory()
+        session.execute(text('DROP TABLE task_stats'))
+        session.commit()
+
+        with patch('app.utils.task_stats.logging.warning') as warning:
+            task_id = create_test_task_db(session, title='Sin contadores').id
+
+        assert session.get(TaskDB, task_id).title == 'Sin contadores'
+        warning.assert_called_once()
+        session.close()
+
+    @pytest.mark.unit
+    def test_truncate_prefix_matches_truncate_text(self):
+        """Test that truncating a SUBSTR prefix matches truncating the full text."""
+        long_text = ' '.join(f'palabra{i}' for i in range(100))
+        
+        assert truncate_prefix(long_text[:51], max_chars=50) == ' '.join(f'palabra{i}' for i in range(5)) + '...'
+        assert truncate_prefix(long_text[:501]) == truncate_text(long_text, 30)
+        assert truncate_prefix('corto') == 'corto'
+        assert truncate_prefix(None) == ''
+
+    @pytest.mark.unit
+    def test_get_all_tasks_summary_view(self, sqlite_session_factory):
+        """Test that the summary view skips heavy TEXT columns."""
+        session = sqlite_session_factory()
+        story = create_test_user_story(session, description='Historia ' * 80)
+        create_test_task_db(session, title='A', description='desc ' * 40, risk_analysis='riesgo',
+                            mitigation_plan='plan', user_story_id=story.id)
+        session.close()
+        
+        with patch('app.utils.task_manager.get_db_session', side_effect=sqlite_session_factory):
+            manager = TaskManager(use_database=True)
+            tasks = manager.get_all_tasks(view='summary')
+            page = manager.iter_tasks_page(limit=1, view='summary')
+            full = manager.get_all_tasks()
+        
+        summary = tasks[0]
+        for field in ('description', 'risk_analysis', 'mitigation_plan', 'user_story_description'):
+            assert field not in summary
+        assert summary['description_truncated'] == full[0]['description_truncated']
+        assert summary['user_story_description_truncated'] == full[0]['user_story_description_truncated']
+        assert summary['user_story_project'] == full[0]['user_story_project']
+        assert summary['status'] == 'pendiente'
+        assert page['tasks'] == tasks
+        with pytest.raises(ValueError):
+            manager.get_all_tasks(view='compact')
+
+    @pytest.mark.unit
+    def test_get_all_tasks_summary_view_json_mode(self):
+        """Test that the JSON fallback drops heavy fields in the summary view."""
+        tasks = [{'id': 1, 'title': 'A', 'description': 'texto', 'risk_analysis': 'r', 'mitigation_plan': 'm'}]
+        manager = TaskManager(use_database=False)
+        
+        with patch.object(manager, '_get_tasks_from_json', side_effect=lambda: [manager._json_task_to_dict(t) for t in tasks]):
+            summary = manager.get_all_tasks(view='summary')
+        
+        assert 'description' not in summary[0]
+        assert 'risk_analysis' not in summary[0]
+        assert summary[0]['description_truncated'] == 'texto'
+
+    @pytest.mark.unit
+    def test_description_truncated_persisted_on_write(self, sqlite_session_factory):
+        """Test that description_truncated is stored on create and update and reused by the list."""
+        long_description = ' '.join(f'word{i}' for i in range(40))
+        
+        with patch('app.utils.task_manager.get_db_session', side_effect=sqlite_session_factory):
+            manager = TaskManager(use_database=True)
+            created = manager.create_task({'title': 'A', 'description': long_description})
+            session = sqlite_session_factory()
+            stored = session.query(TaskDB).get(created.id).description_truncated
+            session.close()
+            manager.update_task(created.id, {'description': 'short text'})
+            
+            with patch('app.utils.task_manager.truncate_text', side_effect=AssertionError('not used')):
+                full = manager.get_all_tasks()
+                summary = manager.get_all_tasks(view='summary')
+        
+        assert stored == truncate_text(long_description, 30)
+        assert full[0]['description_truncated'] == 'short text'
+        assert summary[0]['description_truncated'] == 'short text'
+
+    @pytest.mark.unit
+    def test_json_mode_crud_uses_store(self, tmp_path):
+        """Test JSON create/get/update/delete through the in-memory store."""
+        json_file = tmp_path / 'tasks.json'
+        json_file.write_text(json.dumps([{'form_id': 'x', 'title': 'legacy'}]))
+        manager = TaskManager(use_database=False)
+        
+        with patch.object(manager, '_json_file', return_value=json_file):
+            created = manager.create_task({'title': 'A', 'description': 'uno', 'status': 'pendiente', 'effort': 3})
+            manager.update_task(created.id, {'status': 'completada'})
+            with patch('app.utils.json_store.json.load', side_effect=AssertionError('no reload')):
+                task = manager.get_task(created.id)
+                done = manager.get_all_tasks(filters={'status': 'completada'})
+                stats = manager.get_stats()
+            deleted = manager.delete_task(created.id)
+            manager._json_store().compact()
+        
+        records = json.loads(json_file.read_text())
+        assert task.status == 'completada'
+        assert [t['id'] for t in done] == [created.id]
+        assert stats['status_counts']['completada'] == 1
+        assert stats['total_tasks'] == 2
+        assert deleted is True
+        assert records == [{'form_id': 'x', 'title': 'legacy'}]
+
+    @pytest.mark.unit
+    def test_json_create_stores_a_copy(self, tmp_path):
+        """Test that later changes to the caller's dict do not leak into the store."""
+        json_file = tmp_path / 'tasks.json'
+        json_file.write_text('[]')
+        manager = TaskManager(use_database=False)
+        task_data = {'title': 'A', 'description': 'uno', 'status': 'pendiente'}
+        
+        with patch.object(manager, '_json_file', return_value=json_file):
+            created = manager.create_task(task_data)
+            task_data['status'] = 'completada'
+            stored = manager._json_store().get(created.id)
+        
+        assert stored['status'] == 'pendiente'
+        assert 'id' not in task_data
+
+    @pytest.mark.unit
+    def test_json_pending_enrichment_skips_records_without_id(self, tmp_path):
+        """Test that id-less legacy records are ignored when paging pending tasks."""
+        json_file = tmp_path / 'tasks.json'
+        json_file.write_text(json.dumps([
+            {'form_id': 'x', 'title': 'legacy'},
+            {'id': 2, 'title': 'B', 'description': 'dos'},
+            {'id': 1, 'title': 'A', 'risk_analysis': 'Riesgos', 'category': 'testing'}
+        ]))
+        manager = TaskManager(use_database=False)
+        
+        with patch.object(manager, '_json_file', return_value=json_file):
+            pending = manager.get_tasks_pending_enrichment()
+            after = manager.get_tasks_pending_enrichment(after_id=2)
+        
+        assert pending == [{'id': 2, 'title': 'B', 'description': 'dos'}]
+        assert after == []
+
+    @pytest.mark.unit
+    def test_pending_enrichment_and_bulk_update(self, sqlite_session_factory):
+        """Test selecting tasks without enrichment and writing a batch in one transaction."""
+        session = sqlite_session_factory()
+        enriched_id = create_test_task_db(session, title='Enriched').id
+        no_risks_id = create_test_task_db(session, title='No risks', risk_analysis=None).id
+        imported_id = create_test_task_db(session, title='Imported', category=TaskCategory.OTRO, tokens_gastados=0).id
+        session.close()
+        
+        with patch('app.utils.task_manager.get_db_session', side_effect=sqlite_session_factory):
+            manager = TaskManager(use_database=True)
+            pending = manager.get_tasks_pending_enrichment()
+            after_first = manager.get_tasks_pending_enrichment(after_id=no_risks_id, limit=5)
+            updated = manager.update_tasks_bulk({
+                no_risks_id: {'risk_analysis': 'Risks', 'category': 'documentacion', 'description': 'New text'},
+                imported_id: {'category': 'documentacion', 'tokens_gastados': 250}
+            })
+            remaining = manager.get_tasks_pending_enrichment()
+            task = manager.get_task(no_risks_id)
+        
+        assert [t['id'] for t in pending] == [no_risks_id, imported_id]
+        assert [t['id'] for t in after_first] == [imported_id]
+        assert enriched_id not in [t['id'] for t in pending]
+        assert updated == 2
+        assert remaining == []
+        assert task.category == 'documentacion'
+        assert task.description == 'New text'